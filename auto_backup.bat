@@ -8,6 +8,12 @@ cd "C:\Users\Ariel Acuña\Documents\Ariel\Ariel\FACULTAD\DIPLOMATURA\Proyecto_ho
 :: Activar el entorno virtual y ejecutar el comando
 call venv\Scripts\activate
 python manage.py crear_backup
+:: Si el backup o su verificación fallan el comando sale con error: la tarea programada lo ve en el resultado
+set RESULTADO=%ERRORLEVEL%
+
+:: Para una tarea programada cada hora conviene el modo incremental (solo guarda lo que cambió):
+:: python manage.py crear_backup --incremental
 
 :: (Opcional) Esperar 5 segundos para ver si hubo error antes de cerrar, si lo pruebas manual
-timeout /t 5
\ No newline at end of file
+timeout /t 5
+exit /b %RESULTADO%
\ No newline at end of file
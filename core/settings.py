@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tareas.instrumentacion.MiddlewareInstrumentacion',  # Primero: mide el pedido completo (ver INSTRUMENTACIÓN)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,10 +74,41 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 
 # Database
+# ==========================================
+# PERFIL DE CONEXIÓN SQLITE (se aplica en cada conexión nueva)
+# ==========================================
+# 'concurrente': WAL (los que leen no frenan al que escribe), espera en vez de
+# "database is locked" y BEGIN IMMEDIATE para que las escrituras hagan fila desde el inicio.
+# 'clasico': el comportamiento por defecto de SQLite. Se compara con: manage.py prueba_carga_sqlite
+SQLITE_PERFILES = {
+    'clasico': {
+        'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+        'transaction_mode': 'DEFERRED',
+        'timeout': 5,                       # Segundos (valor por defecto de Python)
+    },
+    'concurrente': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',        # Seguro con WAL; no hace fsync en cada commit
+            'mmap_size': 134217728,         # 128 MB de lectura por memoria mapeada
+            'cache_size': -20000,           # ~20 MB de caché de páginas por conexión
+            'temp_store': 'MEMORY',
+        },
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 20,                      # busy_timeout: espera por el candado antes de fallar
+    },
+}
+SQLITE_PERFIL = os.environ.get('SQLITE_PERFIL', 'concurrente')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {k}={v}' for k, v in SQLITE_PERFILES[SQLITE_PERFIL]['pragmas'].items()),
+            'transaction_mode': SQLITE_PERFILES[SQLITE_PERFIL]['transaction_mode'],
+            'timeout': SQLITE_PERFILES[SQLITE_PERFIL]['timeout'],
+        },
     }
 }
 
@@ -115,6 +147,56 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "core/static"),
 ]
 
+# ==========================================
+# REPORTES EN SEGUNDO PLANO (tareas/trabajos.py)
+# ==========================================
+REPORTES_EN_SEGUNDO_PLANO = True       # False: se generan en el mismo pedido (útil para depurar)
+REPORTES_HILOS = 2                     # Reportes que se generan a la vez por proceso
+REPORTES_DIR = BASE_DIR / 'reportes_generados'
+REPORTES_RETENCION_DIAS = 7            # Pasado este plazo se borran los PDF generados
+REPORTES_SIN_AVANCE_MINUTOS = 30       # Un reporte "Generando" sin avanzar este tiempo se da por interrumpido
+REPORTES_CACHE_DIR = REPORTES_DIR / 'cache'   # PDF reutilizables (tareas/cache_reportes.py)
+REPORTES_CACHE_MAX_MB = 200            # Tamaño máximo de la caché; se descartan los menos usados
+GRAFICOS_CACHE_MAX = 200               # Gráficos ya dibujados que se conservan (en REPORTES_CACHE_DIR/graficos)
+REPORTE_GRAFICOS_FORMATO = 'png'       # 'svg': gráficos vectoriales, PDF más chico y nítido al imprimir
+LOTES_PROCESOS = None                  # Procesos para los lotes de sueldos por área (None: uno por núcleo)
+REPORTE_SUELDOS_MOTOR = 'xhtml2pdf'    # 'reportlab' arma la tabla directo con ReportLab (mucho más rápido)
+AUDITORIA_FILAS_POR_BLOQUE = 250       # Un log más largo se genera en bloques de estas filas y se une con pypdf
+AUDITORIA_PROCESOS = 1                 # Bloques que se generan a la vez (pool de tareas/lotes.py; None: uno por núcleo)
+
+# ==========================================
+# INSTRUMENTACIÓN (tareas/instrumentacion.py)
+# ==========================================
+# Cada pedido y cada reporte en segundo plano deja una línea JSON con consultas, tiempo en SQL,
+# las consultas más lentas y los tramos (gráficos, plantilla, pisa.CreatePDF).
+# Los superusuarios (y quien tenga el permiso tareas.ver_rendimiento) ven los lentos en /admin/rendimiento/.
+# La carpeta del log se crea recién al escribir la primera línea (tareas.instrumentacion.ArchivoRendimiento).
+INSTRUMENTACION_ACTIVA = True
+INSTRUMENTACION_LENTO_MS = 1000        # Desde cuánto un pedido se considera lento
+INSTRUMENTACION_CONSULTAS_LENTAS = 5   # Consultas más lentas que se guardan por pedido
+INSTRUMENTACION_LOG = BASE_DIR / 'logs' / 'rendimiento.log'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {'solo_mensaje': {'format': '%(message)s'}},
+    'handlers': {
+        'rendimiento': {
+            'class': 'tareas.instrumentacion.ArchivoRendimiento', 'filename': INSTRUMENTACION_LOG, 'delay': True,
+            'maxBytes': 5 * 1024 * 1024, 'backupCount': 5, 'encoding': 'utf-8', 'formatter': 'solo_mensaje',
+        },
+    },
+    'loggers': {'tareas.rendimiento': {'handlers': ['rendimiento'], 'level': 'INFO', 'propagate': False}},
+}
+
+# Métricas para Prometheus en /metrics (tareas/metricas.py): IPs que las pueden leer sin iniciar sesión.
+# Ojo: detrás de un proxy inverso en la misma máquina (IIS, nginx) todos los pedidos llegan desde 127.0.0.1
+# y esta lista deja pasar a cualquiera. En ese caso vaciarla y usar METRICAS_TOKEN
+# (en Prometheus: authorization: {credentials: <token>}, que manda "Authorization: Bearer <token>").
+METRICAS_IPS = ['127.0.0.1', '::1']
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
+METRICAS_HISTORIAL_SEGUNDOS = 300      # Cada cuánto se recuentan las tablas de historial (COUNT(*) de tablas grandes)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -149,8 +231,10 @@ JAZZMIN_SETTINGS = {
         "tareas.Secretaria": "fas fa-building",
         "tareas.Departamento": "fas fa-network-wired",
         "tareas.Empleado": "fas fa-id-card",
+        "tareas.Destinatario": "fas fa-user-tie",
         "tareas.Periodo": "fas fa-calendar-alt",
         "tareas.RegistroHora": "fas fa-clock",
+        "tareas.TrabajoReporte": "fas fa-file-pdf",
     },
 
     # ORDEN DEL MENÚ LATERAL (Barra izquierda)
@@ -160,11 +244,18 @@ JAZZMIN_SETTINGS = {
         "tareas.Secretaria",
         "tareas.Departamento",
         "tareas.Empleado",
+        "tareas.Destinatario",
         "tareas.Periodo",
         "tareas.RegistroHora",
+        "tareas.TrabajoReporte",
     ],
 
     # ARCHIVOS PERSONALIZADOS (JS y CSS)
+    # Enlaces extra en el menú (solo los ve quien tiene el permiso; el superusuario los tiene todos)
+    "custom_links": {
+        "tareas": [{"name": "Pedidos lentos", "url": "rendimiento", "icon": "fas fa-tachometer-alt", "permissions": ["tareas.ver_rendimiento"]}],
+    },
+
     "custom_js": "js/login.js",
     "custom_css": "css/custom_admin.css",
 }
@@ -207,7 +298,9 @@ ADMIN_REORDER = (
         'tareas.Secretaria',
         'tareas.Departamento',
         'tareas.Empleado',
+        'tareas.Destinatario',
         'tareas.Periodo',
         'tareas.RegistroHora',
+        'tareas.TrabajoReporte',
     )},
 )
\ No newline at end of file
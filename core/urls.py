@@ -17,6 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from tareas import views
+
 urlpatterns = [
+    path('admin/rendimiento/', admin.site.admin_view(views.rendimiento), name='rendimiento'),
     path('admin/', admin.site.urls),
+    path('metrics', views.metricas_view, name='metricas'),
 ]
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Reportes que quedaron en cola o a medias si el servidor anterior se cortó (tareas/trabajos.py)
+from tareas import trabajos  # noqa: E402
+trabajos.recuperar_interrumpidos()
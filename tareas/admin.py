@@ -1,233 +1,228 @@
 import os
-import io
-import base64
-import datetime
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-
-from django.conf import settings
-from django.contrib import admin
-from django.http import HttpResponse
-from django.template.loader import get_template
-from django.contrib.staticfiles import finders
-from django.db.models import Sum
+import time
+
+from django.contrib import admin, messages
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.urls import path, reverse
 from django.utils.html import format_html
-from xhtml2pdf import pisa
 from simple_history.admin import SimpleHistoryAdmin 
+from simple_history.utils import bulk_create_with_history
 
 # Importaciones de Excel
 from import_export import resources, fields
-from import_export.widgets import ForeignKeyWidget, IntegerWidget
+from import_export.widgets import ForeignKeyWidget, Widget
 from import_export.admin import ImportExportModelAdmin 
-from .models import Secretaria, Departamento, Empleado, Periodo, RegistroHora
+from .models import Secretaria, Departamento, Destinatario, Empleado, Periodo, RegistroHora, TrabajoReporte, VersionDatos
+from . import cache_reportes, exportacion, lotes, metricas, referencias, resumenes, trabajos
 
 # ========================================================
-# 1. UTILIDADES Y REPORTES
+# 1. REPORTES (SE GENERAN EN SEGUNDO PLANO, VER tareas/trabajos.py)
 # ========================================================
-def link_callback(uri, rel):
-    result = finders.find(uri)
-    if result:
-        if not isinstance(result, (list, tuple)): result = [result]
-        result = list(os.path.realpath(path) for path in result)
-        path = result[0]
-    else:
-        sUrl = settings.STATIC_URL; sRoot = settings.STATIC_ROOT
-        mUrl = settings.MEDIA_URL; mRoot = settings.MEDIA_ROOT
-        if uri.startswith(mUrl): path = os.path.join(mRoot, uri.replace(mUrl, ""))
-        elif uri.startswith(sUrl): path = os.path.join(sRoot, uri.replace(sUrl, ""))
-        else: return uri
-    if not os.path.isfile(path): raise Exception('media URI must start with %s or %s' % (sUrl, mUrl))
-    return path
+def encolar_reporte(request, queryset, tipo, parametros, descripcion):
+    if queryset is not None: parametros['registros'] = list(queryset.values_list('pk', flat=True))
+    # Si el mismo PDF ya se generó con estos datos, se descarga directamente desde la caché
+    cacheado = cache_reportes.obtener(cache_reportes.clave_reporte(tipo, parametros))
+    if cacheado:
+        nombre, ruta = cacheado
+        try: respuesta = FileResponse(open(ruta, 'rb'), as_attachment=True, filename=nombre)  # El tipo sale del nombre (PDF o ZIP)
+        except FileNotFoundError: pass  # Se descartó justo ahora: lo generamos de nuevo
+        else:
+            metricas.sumar('muni_reportes_total', tipo=tipo, resultado='cache'); return respuesta
+    trabajo = trabajos.encolar(tipo, parametros, usuario=request.user, descripcion=descripcion)
+    messages.info(request, f"⏳ {trabajo.get_tipo_display()} en preparación (#{trabajo.pk}). Lo puede descargar desde esta lista cuando esté listo.")
+    return HttpResponseRedirect(reverse('admin:tareas_trabajoreporte_changelist'))
 
 @admin.action(description='📊 Reporte Estadístico (Gráficos)')
 def generar_estadisticas(modeladmin, request, queryset):
-    periodo_actual = Periodo.objects.filter(vigente=True).first()
-    if not periodo_actual: return HttpResponse("Error: No hay período vigente.", content_type='text/plain')
-    
-    periodos_historicos = Periodo.objects.filter(fecha_inicio__lte=periodo_actual.fecha_inicio).order_by('-fecha_inicio')[:6]
-    periodos_historicos = sorted(periodos_historicos, key=lambda p: p.fecha_inicio)
-    nombres_periodos = []; totales_periodos = []; lista_datos_barras = [] 
-    for p in periodos_historicos:
-        total = RegistroHora.objects.filter(periodo=p).aggregate(Sum('cantidad_horas'))['cantidad_horas__sum'] or 0
-        nombres_periodos.append(p.nombre); totales_periodos.append(total)
-        lista_datos_barras.append({'periodo': p.nombre, 'horas': total})
-    plt.figure(figsize=(10, 3.5)); plt.bar(nombres_periodos, totales_periodos, color='#007bff', width=0.5)
-    plt.grid(axis='y', linestyle='--', alpha=0.5); plt.tight_layout()
-    buffer_barras = io.BytesIO(); plt.savefig(buffer_barras, format='png'); plt.close()
-    grafico_barras_b64 = base64.b64encode(buffer_barras.getvalue()).decode('utf-8')
-    
-    datos_secretarias = RegistroHora.objects.filter(periodo=periodo_actual).values('empleado__departamento__secretaria__nombre').annotate(total=Sum('cantidad_horas'))
-    labels = []; sizes = []; colors = []; lista_datos_torta = [] 
-    color_map = {'gobierno': '#dc3545', 'ciudadania': '#ffc107', 'ciudadanía': '#ffc107', 'obras': '#0056b3', 'modernizacion': '#28a745', 'modernización': '#28a745'}
-    total_absoluto = sum(item['total'] for item in datos_secretarias)
-    for item in datos_secretarias:
-        nombre_sec = item['empleado__departamento__secretaria__nombre'] or "Sin Secretaría"
-        total_hs = item['total']
-        if total_hs > 0:
-            labels.append(nombre_sec); sizes.append(total_hs)
-            nombre_lower = nombre_sec.lower(); c = '#6c757d' 
-            if 'gobierno' in nombre_lower: c = color_map['gobierno']
-            elif 'ciudadan' in nombre_lower: c = color_map['ciudadania']
-            elif 'obra' in nombre_lower: c = color_map['obras']
-            elif 'moderniza' in nombre_lower: c = color_map['modernizacion']
-            colors.append(c)
-            porc = round((total_hs / total_absoluto) * 100, 1)
-            lista_datos_torta.append({'label': nombre_sec, 'value': total_hs, 'color': c, 'porcentaje': porc})
-    plt.figure(figsize=(8, 4))
-    if sizes: plt.pie(sizes, labels=None, colors=colors, startangle=140); plt.axis('equal') 
-    else: plt.text(0.5, 0.5, 'Sin datos', ha='center')
-    plt.tight_layout(); buffer_torta = io.BytesIO(); plt.savefig(buffer_torta, format='png'); plt.close()
-    grafico_torta_b64 = base64.b64encode(buffer_torta.getvalue()).decode('utf-8')
-
-    contexto = {'fecha_hoy': datetime.date.today(), 'periodo_actual': periodo_actual.nombre, 'grafico_barras': grafico_barras_b64, 'grafico_torta': grafico_torta_b64, 'datos_barras': lista_datos_barras, 'datos_torta': lista_datos_torta}
-    template = get_template('admin/tareas/registrohora/estadisticas_pdf.html')
-    html = template.render(contexto)
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="Estadisticas_{periodo_actual.nombre}.pdf"'
-    pisa_status = pisa.CreatePDF(html, dest=response, link_callback=link_callback)
-    if pisa_status.err: return HttpResponse('Error PDF Gráfico.')
-    return response
-
-# 🌟 FUNCIÓN CORREGIDA CON LA LÓGICA DE IMPUTACIÓN INTELIGENTE
-def generar_pdf_base(queryset, destinatario_nombre, destinatario_cargo):
-    periodo_obj = Periodo.objects.filter(vigente=True).first()
-    if not periodo_obj and queryset.exists(): periodo_obj = queryset.first().periodo
-    
-    # Estructura temporal para agrupar
-    datos_agrupados = {}
-    total_general = 0
-    
-    for registro in queryset:
-        empleado = registro.empleado
-        
-        # 1. Determinamos dónde hizo ESTAS horas específicas
-        # Si tiene 'otro_departamento' escrito, es ahí. Si no, es su departamento base.
-        lugar_trabajo_actual = registro.otro_departamento if registro.otro_departamento else str(empleado.departamento)
-        
-        if empleado.id not in datos_agrupados:
-            datos_agrupados[empleado.id] = {
-                'nombre_completo': f"{empleado.apellido}, {empleado.nombre}",
-                'dni': empleado.dni,
-                'empleado_obj': empleado,   # Guardamos el objeto para sacar su depto base despues
-                'lugares': set(),           # Usamos un SET para guardar lugares únicos
-                'total_horas': 0
-            }
-        
-        datos_agrupados[empleado.id]['total_horas'] += registro.cantidad_horas
-        datos_agrupados[empleado.id]['lugares'].add(lugar_trabajo_actual) # Agregamos el lugar
-        total_general += registro.cantidad_horas
-
-    # 2. Procesamos la lista final decidiendo la imputación
-    lista_final = []
-    for emp_id, info in datos_agrupados.items():
-        lugares = info['lugares']
-        empleado_obj = info['empleado_obj']
-        
-        # LÓGICA DE IMPUTACIÓN:
-        if len(lugares) == 1:
-            # Si solo trabajó en UN lugar, ponemos ese lugar.
-            imputacion_final = list(lugares)[0]
-        else:
-            # Si trabajó en VARIOS lugares, ponemos su departamento de origen (Vinculado).
-            imputacion_final = str(empleado_obj.departamento) if empleado_obj.departamento else "-"
-            
-        lista_final.append({
-            'nombre_completo': info['nombre_completo'],
-            'dni': info['dni'],
-            'imputacion': imputacion_final,
-            'total_horas': info['total_horas']
-        })
-
-    # Ordenamos alfabéticamente
-    lista_final.sort(key=lambda x: x['nombre_completo'])
-    
-    contexto = {'periodo': periodo_obj, 'fecha_hoy': datetime.date.today(), 'datos': lista_final, 'total_general': total_general, 'destinatario_nombre': destinatario_nombre, 'destinatario_cargo': destinatario_cargo}
-    template = get_template('admin/tareas/registrohora/reporte_pdf.html')
-    html = template.render(contexto)
-    response = HttpResponse(content_type='application/pdf')
-    filename = f"Reporte_{periodo_obj.nombre if periodo_obj else 'Horas'}.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    pisa_status = pisa.CreatePDF(html, dest=response, link_callback=link_callback)
-    if pisa_status.err: return HttpResponse('Error al generar PDF.')
-    return response
-
-@admin.action(description='📄 Reporte para ANDREA (Sueldos)')
-def reporte_andrea(modeladmin, request, queryset): return generar_pdf_base(queryset, "SRA. BALTIERI ANDREA SOLEDAD", "A/C del Área Sueldos")
-
-@admin.action(description='📄 Reporte para EDITH (Sueldos)')
-def reporte_edith(modeladmin, request, queryset): return generar_pdf_base(queryset, "SRA. SHORT EDITH MARISA", "Encargada del Área Sueldos")
+    periodo_actual = referencias.periodo_vigente()
+    if not periodo_actual:
+        modeladmin.message_user(request, "Error: No hay período vigente.", messages.ERROR); return None
+    return encolar_reporte(request, None, TrabajoReporte.TIPO_ESTADISTICAS, {}, f"Estadísticas {periodo_actual.nombre}")
+
+def generar_pdf_base(request, queryset, destinatario_nombre, destinatario_cargo):
+    parametros = {'destinatario_nombre': destinatario_nombre, 'destinatario_cargo': destinatario_cargo}
+    return encolar_reporte(request, queryset, TrabajoReporte.TIPO_SUELDOS, parametros, f"Sueldos para {destinatario_nombre}")
+
+def accion_destinatario(destinatario):
+    """Acción "Reporte para <alias>" de un destinatario (RegistroHoraAdmin.get_actions arma una por cada activo)."""
+    def accion(modeladmin, request, queryset): return generar_pdf_base(request, queryset, destinatario.nombre, destinatario.cargo)
+    accion.__name__ = destinatario.nombre_accion
+    return admin.action(description=f'📄 Reporte para {destinatario.alias} (Sueldos)')(accion)
+
+@admin.action(description='📄 Reporte para TODOS los destinatarios (ZIP)')
+def reporte_todos(modeladmin, request, queryset):
+    # Una copia por destinatario: la tabla se genera una sola vez (documentos.pdf_sueldos_destinatarios)
+    destinatarios = [{'alias': d.alias, 'nombre': d.nombre, 'cargo': d.cargo} for d in referencias.destinatarios()]
+    if not destinatarios:
+        modeladmin.message_user(request, "Error: No hay destinatarios activos.", messages.ERROR); return None
+    return encolar_reporte(request, queryset, TrabajoReporte.TIPO_SUELDOS_DESTINATARIOS, {'destinatarios': destinatarios}, f"Sueldos para {len(destinatarios)} destinatarios")
+
+def generar_lote(modeladmin, request, queryset, por):
+    # Un PDF por unidad en un ZIP, para el primer destinatario (tareas/lotes.py)
+    destinatarios = referencias.destinatarios()
+    if not destinatarios:
+        modeladmin.message_user(request, "Error: No hay destinatarios activos.", messages.ERROR); return None
+    parametros = {'por': por, 'destinatario_nombre': destinatarios[0].nombre, 'destinatario_cargo': destinatarios[0].cargo}
+    return encolar_reporte(request, queryset, TrabajoReporte.TIPO_LOTE_SUELDOS, parametros, f"Sueldos por {por} para {destinatarios[0].nombre}")
+
+@admin.action(description='🗂️ Lote de Sueldos por Secretaría (ZIP)')
+def lote_por_secretaria(modeladmin, request, queryset): return generar_lote(modeladmin, request, queryset, lotes.POR_SECRETARIA)
+
+@admin.action(description='🗂️ Lote de Sueldos por Departamento (ZIP)')
+def lote_por_departamento(modeladmin, request, queryset): return generar_lote(modeladmin, request, queryset, lotes.POR_DEPARTAMENTO)
 
 @admin.action(description='🕵️ Descargar Auditoría de Cambios (PDF Seguro)')
 def descargar_auditoria_pdf(modeladmin, request, queryset):
-    lista_auditoria = []
-    periodos_ids = queryset.values_list('periodo_id', flat=True).distinct()
-    for registro in queryset:
-        if registro.history.count() <= 1: continue
-        historial = registro.history.all().order_by('-history_date')
-        for i in range(len(historial)):
-            record = historial[i]
-            item = {'fecha': record.history_date.strftime("%d/%m/%Y"), 'hora': record.history_date.strftime("%H:%M"), 'usuario': record.history_user.username if record.history_user else "Sistema", 'empleado': f"{record.empleado.apellido}, {record.empleado.nombre}", 'sort_key': record.history_date}
-            if i == len(historial) - 1:
-                item['accion'] = "✅ CREACIÓN"; item['detalle'] = "Carga inicial"; item['valor_ant'] = "-"; item['valor_nue'] = f"{record.cantidad_horas} hs"; lista_auditoria.append(item)
-            else:
-                previo = historial[i+1]; delta = record.diff_against(previo)
-                for change in delta.changes:
-                    if change.field == 'cantidad_horas':
-                        c = item.copy(); c['accion'] = "⚠️ EDICIÓN"; c['detalle'] = "Modificación Cantidad"; c['valor_ant'] = f"{change.old} hs"; c['valor_nue'] = f"{change.new} hs"; lista_auditoria.append(c)
-                    elif change.field == 'imputacion':
-                        c = item.copy(); c['accion'] = "⚠️ EDICIÓN"; c['detalle'] = "Cambio Imputación"; c['valor_ant'] = str(change.old); c['valor_nue'] = str(change.new); lista_auditoria.append(c)
-    borrados = RegistroHora.history.filter(history_type='-', periodo_id__in=periodos_ids).order_by('-history_date')
-    for record in borrados:
-        try: n = f"{record.empleado.apellido}, {record.empleado.nombre}"
-        except: n = "Empleado Desconocido"
-        lista_auditoria.append({'fecha': record.history_date.strftime("%d/%m/%Y"), 'hora': record.history_date.strftime("%H:%M"), 'usuario': record.history_user.username if record.history_user else "Sistema", 'empleado': n, 'accion': "❌ ELIMINADO", 'detalle': "Registro eliminado", 'valor_ant': f"{record.cantidad_horas} hs", 'valor_nue': "0 hs", 'sort_key': record.history_date})
-    lista_auditoria.sort(key=lambda x: x['sort_key'], reverse=True)
-    contexto = {'fecha_hoy': datetime.datetime.now(), 'usuario_solicitante': request.user.username, 'logs': lista_auditoria}
-    template = get_template('admin/tareas/registrohora/auditoria_pdf.html')
-    html = template.render(contexto)
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="Auditoria_Segura.pdf"'
-    pisa_status = pisa.CreatePDF(html, dest=response, link_callback=link_callback)
-    if pisa_status.err: return HttpResponse('Error al generar PDF Auditoría.')
-    return response
+    return encolar_reporte(request, queryset, TrabajoReporte.TIPO_AUDITORIA, {'usuario_solicitante': request.user.username}, "Auditoría de cambios")
+
+# ========================================================
+# 2. EXPORTACIÓN PARA EL SISTEMA DE SUELDOS (SE ESCRIBE A MEDIDA QUE SE LEE, VER tareas/exportacion.py)
+# ========================================================
+def _nombre_exportacion(queryset, extension):
+    periodo = referencias.periodo_vigente() or (queryset.first().periodo if queryset.exists() else None)
+    return f"Sueldos_{periodo.nombre if periodo else 'Horas'}.{extension}"
+
+@admin.action(description='📑 Exportar Sueldos (CSV)')
+def exportar_sueldos_csv(modeladmin, request, queryset): return exportacion.respuesta_csv(queryset, _nombre_exportacion(queryset, 'csv'))
+
+@admin.action(description='📗 Exportar Sueldos (Excel)')
+def exportar_sueldos_xlsx(modeladmin, request, queryset): return exportacion.respuesta_xlsx(queryset, _nombre_exportacion(queryset, 'xlsx'))
 
 # ========================================================
 # 3. RESOURCES (CONFIGURACIÓN BLINDADA)
 # ========================================================
-class DepartamentoResource(resources.ModelResource):
+class ForeignKeyPrecargado(ForeignKeyWidget):
+    """ForeignKeyWidget que busca en un diccionario armado una sola vez por importación, no con una consulta por fila."""
+    def __init__(self, model, field, relacionados=(), **kwargs):
+        super().__init__(model, field=field, **kwargs); self.relacionados = relacionados; self.objetos = {}
+
+    def precargar(self):
+        self.objetos = {str(getattr(obj, self.field)): obj for obj in self.model.objects.select_related(*self.relacionados)}
+
+    def clean(self, value, row=None, **kwargs):
+        valor = Widget.clean(self, value)
+        if not valor: return None
+        try: return self.objetos[str(valor)]
+        except KeyError: raise self.model.DoesNotExist(f"{self.model._meta.object_name} matching query does not exist.") from None
+
+class ImportacionMedida:
+    """Se antepone a un ModelResource: deja en /metrics las filas por segundo y el resultado de cada fila (tareas/metricas.py)."""
+    def import_data(self, dataset, dry_run=False, **kwargs):
+        inicio = time.perf_counter()
+        resultado = super().import_data(dataset, dry_run=dry_run, **kwargs)
+        metricas.registrar_importacion(type(self).__name__, len(dataset), time.perf_counter() - inicio, resultado.totals, dry_run)
+        return resultado
+
+class DepartamentoResource(ImportacionMedida, resources.ModelResource):
     secretaria = fields.Field(column_name='secretaria', attribute='secretaria', widget=ForeignKeyWidget(Secretaria, field='imputacion'))
     class Meta: 
         model = Departamento; fields = ('nombre', 'imputacion', 'secretaria'); import_id_fields = ('nombre',)
 
-class EmpleadoResource(resources.ModelResource):
-    dni = fields.Field(column_name='dni', attribute='dni', widget=IntegerWidget())
+def normalizar_dni(valor):
+    """'12.345.678', ' 12345678 ', 12345678 o 12345678.0 (Excel) -> '12345678'. None si no es un número."""
+    if isinstance(valor, float) and valor.is_integer(): valor = int(valor)
+    limpio = str(valor).strip().replace('.', '') if valor is not None else ''
+    return str(int(limpio)) if limpio.isdigit() else None
+
+class DniWidget(Widget):
+    """El DNI se limpia una sola vez con normalizar_dni: lo que se guarda es lo mismo que se compara para saltear repetidos."""
+    def clean(self, value, row=None, **kwargs):
+        if value is None or str(value).strip() == '': return None
+        dni = normalizar_dni(value)
+        if dni is None: raise ValueError(f"DNI inválido: {value}")
+        return dni
+
+class EmpleadoResource(ImportacionMedida, resources.ModelResource):
+    dni = fields.Field(column_name='dni', attribute='dni', widget=DniWidget())
     apellido = fields.Field(column_name='apellido', attribute='apellido')
     nombre = fields.Field(column_name='nombre', attribute='nombre')
-    departamento = fields.Field(column_name='Departamento', attribute='departamento', widget=ForeignKeyWidget(Departamento, field='nombre'))
+    departamento = fields.Field(column_name='Departamento', attribute='departamento', widget=ForeignKeyPrecargado(Departamento, field='nombre'))
     
     class Meta: 
         model = Empleado; fields = ('dni', 'apellido', 'nombre', 'departamento'); import_id_fields = ('dni',)
+        force_init_instance = True  # Los DNI ya cargados se saltean en skip_row: no hace falta buscarlos fila por fila
+
+    def before_import(self, dataset, **kwargs):
+        # Una consulta por importación (no una por fila): DNI ya cargados y departamentos por nombre
+        self.dnis_existentes = {normalizar_dni(dni) for dni in Empleado.objects.values_list('dni', flat=True)}
+        self.dnis_vistos = set()  # Repetidos dentro de la misma planilla
+        self.fields['departamento'].widget.precargar()
 
     def skip_row(self, instance, original, row, import_validation_errors=None):
-        dni_excel = row.get('dni')
-        if not dni_excel: return True
-        try:
-            dni_limpio = int(str(dni_excel).strip().replace('.', ''))
-            if Empleado.objects.filter(dni=dni_limpio).exists(): return True
-        except ValueError: return True
+        if import_validation_errors: return False  # DNI ilegible (u otra columna): queda como fila inválida
+        if not instance.dni or instance.dni in self.dnis_existentes or instance.dni in self.dnis_vistos: return True
+        self.dnis_vistos.add(instance.dni)
         return super().skip_row(instance, original, row, import_validation_errors)
 
-class RegistroHoraResource(resources.ModelResource):
+class RegistroHoraResource(ImportacionMedida, resources.ModelResource):
     empleado = fields.Field(column_name='DNI', attribute='empleado', widget=ForeignKeyWidget(Empleado, field='dni'))
     periodo = fields.Field(column_name='PERIODO', attribute='periodo', widget=ForeignKeyWidget(Periodo, field='nombre'))
     cantidad_horas = fields.Field(column_name='HORAS', attribute='cantidad_horas')
     class Meta: 
         model = RegistroHora; fields = ('periodo', 'empleado', 'cantidad_horas'); import_id_fields = []
+        name = "Carga normal (fila por fila)"
+
+# --- CARGA MASIVA DE HORAS (PLANILLAS GRANDES) ---
+class RegistroHoraMasivoResource(RegistroHoraResource):
+    """
+    Misma planilla y mismos errores por fila que RegistroHoraResource, pero:
+    - DNI y PERÍODO se resuelven contra diccionarios precargados.
+    - Las reglas de RegistroHora.clean() (período cerrado, tope de 180 hs) se validan en memoria.
+    - Sin la transacción única de import-export: al leer la planilla no se escribe nada, y al final las
+      filas válidas se insertan con su historial de a LOTE_IMPORTACION por transacción, así la base
+      queda libre entre lote y lote. Si alguna fila dio error no se inserta ninguna (como antes).
+    - Los resúmenes de los períodos tocados se recalculan una sola vez, en after_import.
+    """
+    LOTE_IMPORTACION = 500
+    empleado = fields.Field(column_name='DNI', attribute='empleado', widget=ForeignKeyPrecargado(Empleado, field='dni', relacionados=('departamento',)))
+    periodo = fields.Field(column_name='PERIODO', attribute='periodo', widget=ForeignKeyPrecargado(Periodo, field='nombre'))
+    class Meta(RegistroHoraResource.Meta):
+        name = "Carga masiva (rápida)"; use_bulk = True
+        use_transactions = False  # La vista previa (dry_run) igual corre dentro de una transacción que se descarta
+        batch_size = None         # Todas las filas se insertan al final, cuando ya se sabe si hubo errores
+
+    def before_import(self, dataset, **kwargs):
+        self.usuario = kwargs.get('user'); self.periodos_tocados = set()
+        self.fields['empleado'].widget.precargar(); self.fields['periodo'].widget.precargar()
+
+    def before_save_instance(self, instance, row, **kwargs):
+        instance.clean()  # La misma validación que hace save(), sin volver a la base
+
+    def bulk_create(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        # bulk_create no dispara señales: resúmenes y versiones de caché se actualizan en after_import
+        if self.create_instances and (using_transactions or not dry_run) and not (result and result.has_errors()):
+            try:
+                for inicio in range(0, len(self.create_instances), self.LOTE_IMPORTACION):
+                    lote = self.create_instances[inicio:inicio + self.LOTE_IMPORTACION]
+                    with transaction.atomic():
+                        bulk_create_with_history(lote, RegistroHora, default_user=self.usuario)
+                    self.periodos_tocados.update(r.periodo_id for r in lote)
+            except Exception as e:
+                self.actualizar_resumenes()  # Los lotes ya confirmados quedan: sus resúmenes también
+                self.handle_import_error(result, e, raise_errors)
+        self.create_instances.clear()
+
+    def after_import(self, dataset, result, **kwargs):
+        self.actualizar_resumenes()
+
+    def actualizar_resumenes(self):
+        if not self.periodos_tocados: return
+        with transaction.atomic():
+            resumenes.recalcular_periodos(self.periodos_tocados)
+            for periodo_id in self.periodos_tocados: VersionDatos.incrementar(f'periodo:{periodo_id}')
+        self.periodos_tocados = set()
 
 # ========================================================
 # 4. ADMINS
 # ========================================================
+class FiltroDepartamento(admin.RelatedFieldListFilter):
+    # Las opciones salen de la caché de referencias (tareas/referencias.py), ordenadas por imputación
+    def field_choices(self, field, request, model_admin):
+        return sorted(referencias.etiquetas_departamentos().items(), key=lambda opcion: opcion[1])
+
 @admin.register(Secretaria)
 class SecretariaAdmin(admin.ModelAdmin):
     list_display = ('imputacion', 'nombre'); search_fields = ('nombre', 'imputacion'); ordering = ('imputacion',)
@@ -235,7 +230,8 @@ class SecretariaAdmin(admin.ModelAdmin):
 @admin.register(Departamento)
 class DepartamentoAdmin(ImportExportModelAdmin):
     resource_class = DepartamentoResource
-    list_display = ('imputacion', 'nombre', 'secretaria'); list_filter = ('secretaria',); search_fields = ('nombre', 'imputacion'); ordering = ('imputacion',)
+    list_display = ('imputacion_completa', 'nombre', 'secretaria'); list_filter = ('secretaria',); list_select_related = ('secretaria',)
+    search_fields = ('nombre', '^imputacion_completa'); ordering = ('imputacion_completa',)
 
 @admin.register(Empleado)
 class EmpleadoAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
@@ -246,26 +242,48 @@ class EmpleadoAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
 class PeriodoAdmin(admin.ModelAdmin):
     list_display = ('nombre', 'fecha_inicio', 'fecha_fin', 'vigente', 'cerrado'); list_filter = ('vigente', 'cerrado'); list_editable = ('vigente', 'cerrado'); ordering = ('-fecha_inicio',)
 
+@admin.register(Destinatario)
+class DestinatarioAdmin(admin.ModelAdmin):
+    list_display = ('alias', 'nombre', 'cargo', 'orden', 'activo'); list_editable = ('orden', 'activo'); search_fields = ('alias', 'nombre')
+
 @admin.register(RegistroHora)
 class RegistroHoraAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
-    resource_class = RegistroHoraResource
+    resource_classes = [RegistroHoraResource, RegistroHoraMasivoResource]
     list_display = ('empleado', 'cantidad_horas', 'imputacion_real', 'estado_auditoria')
-    list_filter = ('periodo', 'empleado__departamento', 'otro_departamento')
-    search_fields = ('empleado__apellido', 'empleado__dni')
+    list_filter = ('periodo', ('empleado__departamento', FiltroDepartamento), ('otro_departamento', FiltroDepartamento))
+    list_select_related = ('periodo', 'empleado__departamento', 'otro_departamento')
+    search_fields = ('empleado__apellido', 'empleado__dni', '^empleado__departamento__imputacion_completa', '^otro_departamento__imputacion_completa')
     autocomplete_fields = ['empleado']
     fields = ('periodo', 'empleado', 'cantidad_horas', 'otro_departamento', 'autorizado_exceso')
-    actions = [reporte_andrea, reporte_edith, generar_estadisticas, descargar_auditoria_pdf]
+    actions = [reporte_todos, lote_por_secretaria, lote_por_departamento, generar_estadisticas, descargar_auditoria_pdf, exportar_sueldos_csv, exportar_sueldos_xlsx]
+
+    def get_queryset(self, request):
+        # Cantidad de versiones en el historial, calculada en la misma consulta de la página
+        historial = (RegistroHora.history.model.objects.filter(id=OuterRef('pk')).order_by()
+                     .values('id').annotate(total=Count('history_id')).values('total'))
+        return super().get_queryset(request).annotate(cantidad_historial=Coalesce(Subquery(historial), 0))
+
+    def get_actions(self, request):
+        # Una acción "Reporte para ..." por cada destinatario activo, antes de las fijas
+        acciones = super().get_actions(request)
+        if not acciones: return acciones  # Sin permiso (o en un popup) no hay acciones
+        propias = {}
+        for destinatario in referencias.destinatarios():
+            accion = accion_destinatario(destinatario)
+            propias[accion.__name__] = (accion, accion.__name__, accion.short_description)
+        borrar = {k: v for k, v in acciones.items() if k == 'delete_selected'}
+        return {**borrar, **propias, **acciones}
 
     def estado_auditoria(self, obj):
         try:
-            if obj.history.count() > 1: return format_html('<span style="color:orange; font-weight:bold;">⚠️ Editado</span>')
+            if obj.cantidad_historial > 1: return format_html('<span style="color:orange; font-weight:bold;">⚠️ Editado</span>')
             return format_html('<span style="color:green;">✅ Original</span>')
         except: return "-"
     estado_auditoria.short_description = "Estado Carga"
 
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
-        extra_context['periodo_vigente'] = Periodo.objects.filter(vigente=True).first()
+        extra_context['periodo_vigente'] = referencias.periodo_vigente()
         response = super().changelist_view(request, extra_context=extra_context)
         if hasattr(response, 'template_name'):
             template_name = str(response.template_name)
@@ -275,7 +293,43 @@ class RegistroHoraAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "periodo":
-            kwargs["queryset"] = Periodo.objects.filter(vigente=True)
-            vigente = Periodo.objects.filter(vigente=True).first()
+            kwargs["queryset"] = Periodo.objects.filter(vigente=True)  # La validación del formulario sí va contra la base
+            vigente = referencias.periodo_vigente()
             if vigente: kwargs["initial"] = vigente
-        return super().formfield_for_foreignkey(db_field, request, **kwargs)
\ No newline at end of file
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+@admin.register(TrabajoReporte)
+class TrabajoReporteAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'descripcion', 'barra_progreso', 'usuario', 'creado', 'terminado', 'descarga')
+    list_filter = ('tipo', 'estado'); list_select_related = ('usuario',)
+    readonly_fields = [f.name for f in TrabajoReporte._meta.fields]
+
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+
+    def get_queryset(self, request):
+        # Cada usuario ve sus reportes; el superusuario ve todos
+        qs = super().get_queryset(request)
+        return qs if request.user.is_superuser else qs.filter(usuario=request.user)
+
+    def barra_progreso(self, obj):
+        color = {TrabajoReporte.ERROR: '#dc3545', TrabajoReporte.TERMINADO: '#28a745'}.get(obj.estado, '#007bff')
+        return format_html('<div style="width:120px; background:#e9ecef; border-radius:3px;"><div style="width:{}%; background:{}; color:white; font-size:8pt; text-align:center; border-radius:3px;">{}%</div></div>', obj.progreso, color, obj.progreso)
+    barra_progreso.short_description = "Progreso"
+
+    def descarga(self, obj):
+        if obj.estado == TrabajoReporte.TERMINADO:
+            return format_html('<a class="btn btn-sm btn-success" href="{}"><i class="fas fa-download"></i> {}</a>', reverse('admin:tareas_trabajoreporte_descargar', args=[obj.pk]), obj.nombre_archivo)
+        if obj.estado == TrabajoReporte.ERROR: return obj.mensaje_error.strip().splitlines()[-1][:120] if obj.mensaje_error else "-"
+        return "-"
+    descarga.short_description = "Descarga"
+
+    def get_urls(self):
+        propias = [path('<int:pk>/descargar/', self.admin_site.admin_view(self.descargar_view), name='tareas_trabajoreporte_descargar')]
+        return propias + super().get_urls()
+
+    def descargar_view(self, request, pk):
+        trabajo = self.get_queryset(request).filter(pk=pk, estado=TrabajoReporte.TERMINADO).first()
+        ruta = trabajos.ruta_archivo(trabajo) if trabajo else None
+        if not ruta or not os.path.isfile(ruta): raise Http404("El reporte no existe o ya fue eliminado por antigüedad.")
+        return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=trabajo.nombre_archivo)
\ No newline at end of file
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class TareasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tareas'
-    verbose_name = 'Módulos'  # <--- Esto cambia el nombre en el menú lateral
\ No newline at end of file
+    verbose_name = 'Módulos'  # <--- Esto cambia el nombre en el menú lateral
+
+    def ready(self):
+        from . import signals  # noqa: F401  (conecta los resúmenes precalculados)
\ No newline at end of file
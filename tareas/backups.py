@@ -0,0 +1,186 @@
+# Archivo: tareas/backups.py
+# Copias de seguridad de la base SQLite (comandos crear_backup y restaurar_backup).
+# La foto se toma con la API de backup en línea de SQLite, de a tandas de páginas:
+# entre tanda y tanda los demás pueden seguir escribiendo, y la copia siempre queda consistente.
+# Cada backup completo es un .sqlite3.gz más un manifiesto .json con los SHA-256 para verificarlo;
+# los incrementales (sección 4) guardan solo las páginas que cambiaron.
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+from django.conf import settings
+
+PAGINAS_POR_PASO = 1024
+TAMANO_BLOQUE = 1024 * 1024
+
+class ErrorBackup(Exception):
+    """El backup o la restauración no se pueden completar (archivo dañado, checksum distinto, etc.)."""
+
+# ========================================================
+# 1. UTILIDADES
+# ========================================================
+def carpeta_backups():
+    carpeta = str(getattr(settings, 'BACKUP_DIR', os.path.join(settings.BASE_DIR, 'backups')))
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def ruta_base():
+    return str(settings.DATABASES['default']['NAME'])
+
+def sha256_archivo(ruta):
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''): resumen.update(bloque)
+    return resumen.hexdigest()
+
+class Cronometro:
+    """Mide cada fase: with cronometro('copia'): ... -> cronometro.tiempos['copia'] en segundos."""
+    def __init__(self): self.tiempos = {}
+    def __call__(self, fase): self._fase = fase; return self
+    def __enter__(self): self._inicio = time.perf_counter()
+    def __exit__(self, *exc): self.tiempos[self._fase] = round(time.perf_counter() - self._inicio, 3)
+
+# ========================================================
+# 2. FASES
+# ========================================================
+def copiar_en_linea(origen, destino, paginas=PAGINAS_POR_PASO, pausa=0.005):
+    """Foto consistente de 'origen' en 'destino' con la API de backup. Devuelve la cantidad de páginas."""
+    total = {'paginas': 0}
+    def progreso(estado, restantes, cantidad): total['paginas'] = cantidad; time.sleep(pausa)  # Deja pasar a los que escriben
+    fuente = sqlite3.connect(origen); copia = sqlite3.connect(destino)
+    try:
+        with copia: fuente.backup(copia, pages=paginas, progress=progreso)
+    finally:
+        copia.close(); fuente.close()
+    return total['paginas']
+
+def verificar_integridad(ruta):
+    conexion = sqlite3.connect(ruta)
+    try: resultado = [fila[0] for fila in conexion.execute('PRAGMA integrity_check')]
+    finally: conexion.close()
+    if resultado != ['ok']: raise ErrorBackup(f"integrity_check falló: {'; '.join(resultado[:5])}")
+
+def comprimir(origen, destino):
+    """gzip por bloques; devuelve el SHA-256 del archivo sin comprimir."""
+    resumen = hashlib.sha256()
+    with open(origen, 'rb') as entrada, gzip.open(destino, 'wb', compresslevel=6) as salida:
+        for bloque in iter(lambda: entrada.read(TAMANO_BLOQUE), b''):
+            resumen.update(bloque); salida.write(bloque)
+    return resumen.hexdigest()
+
+def descomprimir(origen, destino):
+    with gzip.open(origen, 'rb') as entrada, open(destino, 'wb') as salida: shutil.copyfileobj(entrada, salida, TAMANO_BLOQUE)
+
+# ========================================================
+# 3. MANIFIESTO
+# ========================================================
+def ruta_manifiesto(ruta_backup):
+    return ruta_backup[:-len('.sqlite3.gz')] + '.json' if ruta_backup.endswith('.sqlite3.gz') else ruta_backup + '.json'
+
+def guardar_manifiesto(ruta_backup, datos):
+    with open(ruta_manifiesto(ruta_backup), 'w', encoding='utf-8') as f: json.dump(datos, f, indent=2, ensure_ascii=False)
+
+def leer_manifiesto(ruta_backup):
+    try:
+        with open(ruta_manifiesto(ruta_backup), encoding='utf-8') as f: return json.load(f)
+    except (OSError, ValueError) as e:
+        raise ErrorBackup(f"No se pudo leer el manifiesto de {os.path.basename(ruta_backup)}: {e}")
+
+def verificar_backup(ruta_backup, destino, cronometro):
+    """Comprueba checksums e integridad y deja la base descomprimida en 'destino'. Devuelve el manifiesto."""
+    manifiesto = leer_manifiesto(ruta_backup)
+    with cronometro('checksum comprimido'):
+        if sha256_archivo(ruta_backup) != manifiesto['sha256_comprimido']: raise ErrorBackup("El .gz no coincide con el manifiesto (archivo dañado o modificado).")
+    with cronometro('descompresión'):
+        descomprimir(ruta_backup, destino)
+    with cronometro('checksum base'):
+        if sha256_archivo(destino) != manifiesto['sha256_base']: raise ErrorBackup("La base descomprimida no coincide con el manifiesto.")
+    with cronometro('integridad'):
+        verificar_integridad(destino)
+    return manifiesto
+
+# ========================================================
+# 4. BACKUP INCREMENTAL (PÁGINAS DEDUPLICADAS)
+# ========================================================
+# La base se corta en páginas de TAMANO_PAGINA bytes; cada página se guarda una sola vez
+# en backups/paginas/ con su SHA-256 como nombre. Un backup incremental es solo un manifiesto
+# con la lista de hashes: entre una hora y la siguiente se escriben únicamente las páginas que cambiaron.
+TAMANO_PAGINA = 64 * 1024
+GRACIA_GC_SEGUNDOS = 3600  # Páginas más nuevas que esto no se borran (puede haber un backup en curso)
+
+def carpeta_incrementales():
+    carpeta = os.path.join(carpeta_backups(), 'incrementales'); os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def carpeta_paginas():
+    carpeta = os.path.join(carpeta_backups(), 'paginas'); os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def ruta_pagina(hash_pagina):
+    return os.path.join(carpeta_paginas(), hash_pagina[:2], hash_pagina)
+
+def guardar_paginas(ruta_snapshot, tamano_pagina=TAMANO_PAGINA):
+    """Guarda las páginas nuevas del snapshot. Devuelve (hashes en orden, páginas nuevas, bytes escritos)."""
+    hashes, nuevas, escritos = [], 0, 0
+    with open(ruta_snapshot, 'rb') as f:
+        for pagina in iter(lambda: f.read(tamano_pagina), b''):
+            hash_pagina = hashlib.sha256(pagina).hexdigest()
+            hashes.append(hash_pagina)
+            ruta = ruta_pagina(hash_pagina)
+            if os.path.exists(ruta):
+                os.utime(ruta)  # "Sigue en uso": la recolección respeta las páginas tocadas hace poco
+                continue
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = f'{ruta}.{os.getpid()}.tmp'
+            with gzip.open(temporal, 'wb', compresslevel=6) as salida: salida.write(pagina)
+            os.replace(temporal, ruta)
+            nuevas += 1; escritos += os.path.getsize(ruta)
+    return hashes, nuevas, escritos
+
+def reconstruir_incremental(manifiesto, destino):
+    """Arma en 'destino' la base del manifiesto, verificando el hash de cada página."""
+    with open(destino, 'wb') as salida:
+        for numero, hash_pagina in enumerate(manifiesto['paginas']):
+            try:
+                with gzip.open(ruta_pagina(hash_pagina), 'rb') as entrada: pagina = entrada.read()
+            except OSError as e:
+                raise ErrorBackup(f"Falta o está dañada la página {numero} ({hash_pagina[:12]}…): {e}")
+            if hashlib.sha256(pagina).hexdigest() != hash_pagina: raise ErrorBackup(f"La página {numero} no coincide con su hash.")
+            salida.write(pagina)
+
+def verificar_incremental(ruta_manifiesto_inc, destino, cronometro):
+    """Igual que verificar_backup(), pero reconstruyendo la base desde las páginas. Devuelve el manifiesto."""
+    try:
+        with open(ruta_manifiesto_inc, encoding='utf-8') as f: manifiesto = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ErrorBackup(f"No se pudo leer el manifiesto {os.path.basename(ruta_manifiesto_inc)}: {e}")
+    with cronometro('reconstrucción'):
+        reconstruir_incremental(manifiesto, destino)
+    with cronometro('checksum base'):
+        if sha256_archivo(destino) != manifiesto['sha256_base']: raise ErrorBackup("La base reconstruida no coincide con el manifiesto.")
+    with cronometro('integridad'):
+        verificar_integridad(destino)
+    return manifiesto
+
+def recolectar_paginas():
+    """Borra las páginas que ya no nombra ningún manifiesto incremental. Devuelve (páginas borradas, bytes liberados)."""
+    en_uso = set()
+    for nombre in os.listdir(carpeta_incrementales()):
+        if not nombre.endswith('.json'): continue
+        with open(os.path.join(carpeta_incrementales(), nombre), encoding='utf-8') as f: en_uso.update(json.load(f)['paginas'])
+    borradas, liberados, limite = 0, 0, time.time() - GRACIA_GC_SEGUNDOS
+    for raiz, _, archivos in os.walk(carpeta_paginas()):
+        for nombre in archivos:
+            ruta = os.path.join(raiz, nombre)
+            if nombre in en_uso: continue
+            try:
+                datos = os.stat(ruta)
+                if datos.st_mtime > limite: continue
+                os.remove(ruta)
+            except FileNotFoundError: continue
+            borradas += 1; liberados += datos.st_size
+    return borradas, liberados
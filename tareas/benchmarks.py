@@ -0,0 +1,127 @@
+# Archivo: tareas/benchmarks.py
+# Utilidades para las pruebas de rendimiento (comandos prueba_carga_sqlite, benchmark_indices, ...):
+# bases SQLite temporales con datos inventados, para medir sin tocar la base real.
+import contextlib
+import datetime
+import json
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections, transaction
+
+from . import referencias
+
+# ========================================================
+# 1. BASE TEMPORAL
+# ========================================================
+def usar_base(ruta, perfil=None):
+    """Apunta la conexión 'default' a otra base, con las opciones de un perfil de SQLITE_PERFILES."""
+    config = settings.SQLITE_PERFILES[perfil or settings.SQLITE_PERFIL]
+    conexion = connections['default']
+    conexion.close()
+    referencias.invalidar()  # La caché es de la base anterior
+    conexion.settings_dict['NAME'] = ruta
+    conexion.settings_dict['OPTIONS'] = {
+        'init_command': ';'.join(f'PRAGMA {k}={v}' for k, v in config['pragmas'].items()),
+        'transaction_mode': config['transaction_mode'],
+        'timeout': config['timeout'],
+    }
+
+@contextlib.contextmanager
+def base_temporal(perfil=None):
+    """Base migrada en una carpeta temporal; al salir se borra y la conexión vuelve a la base real."""
+    conexion = connections['default']
+    original = (conexion.settings_dict['NAME'], conexion.settings_dict.get('OPTIONS', {}))
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as carpeta:
+        ruta = os.path.join(carpeta, 'benchmark.sqlite3')
+        usar_base(ruta, perfil)
+        call_command('migrate', verbosity=0)
+        try:
+            yield ruta
+        finally:
+            conexion.close()
+            conexion.settings_dict['NAME'], conexion.settings_dict['OPTIONS'] = original
+            referencias.invalidar()
+
+# ========================================================
+# 2. DATOS INVENTADOS
+# ========================================================
+def sembrar(empleados=2000, periodos=12, registros_por_periodo=4000, secretarias=6, departamentos=40, prestamos=0.2, ediciones=0.05, bajas=0.01, semilla=1):
+    """
+    Carga secretarías, departamentos, empleados y horas con su historial (altas, ediciones y bajas),
+    parecido a la base real pero más grande. 'prestamos', 'ediciones' y 'bajas' son fracciones de los
+    registros de cada período. Todo con bulk_create; al final reconstruye los resúmenes.
+    """
+    from .models import Departamento, Empleado, Periodo, RegistroHora, Secretaria, VersionDatos
+    from . import resumenes
+    azar = random.Random(semilla)
+    Historico = RegistroHora.history.model
+    with transaction.atomic():
+        lista_secretarias = Secretaria.objects.bulk_create([Secretaria(nombre=f'Secretaría {s}', imputacion=f'{s:02d}.00') for s in range(1, secretarias + 1)])
+        lista_departamentos = Departamento.objects.bulk_create([
+            Departamento(secretaria=lista_secretarias[d % secretarias], nombre=f'Departamento {d}', imputacion=f'{d:02d}',
+                         imputacion_completa=f'{lista_secretarias[d % secretarias].prefijo_imputacion()}.{d:02d}') for d in range(1, departamentos + 1)])
+        plantel = Empleado.objects.bulk_create([
+            Empleado(dni=str(20000000 + e), apellido=f'Apellido{e:05d}', nombre=f'Nombre{e % 97}', departamento=azar.choice(lista_departamentos + [None]))
+            for e in range(empleados)])
+        inicio = datetime.date(2024, 1, 1)
+        lista_periodos = Periodo.objects.bulk_create([
+            Periodo(nombre=f'Período {p + 1:02d}', fecha_inicio=inicio + datetime.timedelta(days=30 * p), fecha_fin=inicio + datetime.timedelta(days=30 * p + 29),
+                    cerrado=p < periodos - 1, vigente=p == periodos - 1) for p in range(periodos)])
+        fecha_historial = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        for periodo in lista_periodos:
+            registros = RegistroHora.objects.bulk_create([
+                RegistroHora(empleado=azar.choice(plantel), periodo=periodo, cantidad_horas=Decimal(azar.randint(1, 160)) / 2,
+                             otro_departamento=azar.choice(lista_departamentos) if azar.random() < prestamos else None)
+                for _ in range(registros_por_periodo)], batch_size=2000)
+            RegistroHora.history.bulk_history_create(registros, batch_size=2000, default_date=fecha_historial)
+            editados = azar.sample(registros, int(len(registros) * ediciones))
+            for r in editados: r.cantidad_horas += 1
+            RegistroHora.objects.bulk_update(editados, ['cantidad_horas'], batch_size=2000)
+            RegistroHora.history.bulk_history_create(editados, batch_size=2000, update=True, default_date=fecha_historial + datetime.timedelta(days=1))
+            # Bajas: quedan solo en el historial (como las borra el admin)
+            borrados = azar.sample(registros, int(len(registros) * bajas))
+            Historico.objects.bulk_create([
+                Historico(id=r.pk, empleado_id=r.empleado_id, periodo_id=r.periodo_id, cantidad_horas=r.cantidad_horas, fecha_carga=r.fecha_carga,
+                          otro_departamento_id=r.otro_departamento_id, autorizado_exceso=False, history_type='-',
+                          history_date=fecha_historial + datetime.timedelta(days=2)) for r in borrados], batch_size=2000)
+            RegistroHora.objects.filter(pk__in=[r.pk for r in borrados])._raw_delete(RegistroHora.objects.db)
+            fecha_historial += datetime.timedelta(days=30)
+        resumenes.recalcular_periodos()
+        # bulk_create no dispara señales: la caché de referencias se entera por la versión
+        VersionDatos.incrementar(referencias.CLAVE_VERSION); referencias.invalidar()
+
+# ========================================================
+# 3. MEDICIÓN
+# ========================================================
+def medir(funcion, repeticiones=3):
+    """Mejor tiempo (segundos) de varias corridas: descarta el ruido de la primera lectura de disco."""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter(); funcion()
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor
+
+def comparar_resultados(comando, ruta_antes, ruta_despues, metricas, tolerancia):
+    """Enfrenta dos JSON de resultados ({'escenarios': {nombre: {métrica: valor}}}); CommandError si algo empeoró más que la tolerancia."""
+    with open(ruta_antes, encoding='utf-8') as f: antes = json.load(f)['escenarios']
+    with open(ruta_despues, encoding='utf-8') as f: despues = json.load(f)['escenarios']
+    regresiones = []
+    comando.stdout.write(f"{'ESCENARIO':<26} {'MÉTRICA':<20} {'ANTES':>10} {'DESPUÉS':>10} {'CAMBIO':>8}")
+    for nombre in sorted(set(antes) & set(despues)):
+        for metrica in metricas:
+            a, d = antes[nombre][metrica], despues[nombre][metrica]
+            cambio = (d - a) / a if a else 0
+            estilo = comando.style.ERROR if cambio > tolerancia else (comando.style.SUCCESS if cambio < -tolerancia else str)
+            if cambio > tolerancia: regresiones.append(f'{nombre}.{metrica}')
+            comando.stdout.write(estilo(f'{nombre:<26} {metrica:<20} {a:>10} {d:>10} {cambio:>+8.0%}'))
+    for nombre in sorted(set(antes) ^ set(despues)): comando.stdout.write(comando.style.WARNING(f'⚠️ {nombre} solo está en uno de los archivos'))
+    if regresiones: raise CommandError(f"⛔ {len(regresiones)} regresiones (más de {tolerancia:.0%} peor): {', '.join(regresiones)}")
+    comando.stdout.write(comando.style.SUCCESS('✅ Sin regresiones.'))
@@ -0,0 +1,117 @@
+# Archivo: tareas/cache_reportes.py
+# Caché en disco de los PDF ya generados. La clave es un hash de todo lo que define
+# el contenido (tipo, registros elegidos, destinatario, fecha y versión de los datos),
+# así que nunca hay que "borrar" nada: si los datos cambian, cambia la clave.
+# Un período cerrado completo se identifica por su cierre (tareas/cierres.py): esos PDF no vencen.
+# Cuando la carpeta supera REPORTES_CACHE_MAX_MB se descartan los menos usados (LRU).
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+from django.conf import settings
+
+from .models import Periodo, RegistroHora, TrabajoReporte, VersionDatos
+from . import cierres, referencias
+
+TIPO_CUERPO_SUELDOS = 'sueldos_cuerpo'  # Solo las hojas de la tabla, sin la nota (tareas/documentos.py)
+TIPO_CUERPO_AUDITORIA = 'auditoria_cuerpo'  # Solo las hojas del log congelado, sin encabezado ni pie
+
+_lock = threading.Lock()
+contadores = {'aciertos': 0, 'fallos': 0, 'descartes': 0}  # Por proceso
+
+# ========================================================
+# 1. CLAVE
+# ========================================================
+def _periodos_del_reporte(tipo, parametros):
+    if tipo == TrabajoReporte.TIPO_ESTADISTICAS:
+        vigente = referencias.periodo_vigente()
+        if vigente is None: return []
+        return Periodo.objects.filter(fecha_inicio__lte=vigente.fecha_inicio).order_by('-fecha_inicio').values_list('pk', flat=True)[:6]
+    return RegistroHora.objects.filter(pk__in=parametros.get('registros', [])).order_by().values_list('periodo_id', flat=True).distinct()
+
+def _hash(contenido):
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode('utf-8')).hexdigest()
+
+def clave_reporte(tipo, parametros):
+    """Hash SHA-256 de los datos que determinan el PDF."""
+    if tipo in (TrabajoReporte.TIPO_SUELDOS, TrabajoReporte.TIPO_SUELDOS_DESTINATARIOS, TIPO_CUERPO_SUELDOS, TIPO_CUERPO_AUDITORIA):
+        cierre = cierres.cierre_de(RegistroHora.objects.filter(pk__in=parametros.get('registros', [])))
+        if cierre:
+            # Sale de la foto del cierre: no depende de la fecha ni de las versiones.
+            # La auditoría completa no entra acá: lleva quién la pide y cuándo (solo su cuerpo sale del cierre).
+            # 'creado' distingue un cierre nuevo aunque la base reuse el id del que se borró al reabrir
+            return _hash({
+                'tipo': tipo, 'cierre': [cierre.pk, cierre.creado.isoformat()],
+                'destinatario': [parametros.get('destinatario_nombre', ''), parametros.get('destinatario_cargo', '')],
+                'destinatarios': parametros.get('destinatarios', []),
+                'hojas_nota': parametros.get('hojas_nota', 0),  # Cuerpo de sueldos: la tabla se numera a continuación de la nota
+                'motor': getattr(settings, 'REPORTE_SUELDOS_MOTOR', 'xhtml2pdf'),
+            })
+    claves_version = ['global'] + sorted(f'periodo:{p}' for p in _periodos_del_reporte(tipo, parametros))
+    contenido = {
+        'tipo': tipo,
+        'registros': sorted(parametros.get('registros', [])),
+        'por': parametros.get('por', ''),  # Lotes: por secretaría o por departamento
+        'destinatarios': parametros.get('destinatarios', []),  # Copias para todos los destinatarios
+        'hojas_nota': parametros.get('hojas_nota', 0),  # Cuerpo de sueldos: la tabla se numera a continuación de la nota
+        'destinatario': [parametros.get('destinatario_nombre', ''), parametros.get('destinatario_cargo', ''), parametros.get('usuario_solicitante', '')],
+        'fecha': datetime.date.today().isoformat(),  # Los PDF llevan la fecha del día
+        'motor': getattr(settings, 'REPORTE_SUELDOS_MOTOR', 'xhtml2pdf'),
+        'graficos': getattr(settings, 'REPORTE_GRAFICOS_FORMATO', 'png'),
+        'versiones': VersionDatos.actuales(claves_version),
+    }
+    return _hash(contenido)
+
+# ========================================================
+# 2. LECTURA Y ESCRITURA
+# ========================================================
+def _carpeta():
+    carpeta = str(getattr(settings, 'REPORTES_CACHE_DIR', os.path.join(settings.BASE_DIR, 'reportes_generados', 'cache')))
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def obtener(clave, contar=True):
+    """Devuelve (nombre_archivo, ruta) si el PDF está en caché, o None. contar=False no suma a los contadores."""
+    ruta = os.path.join(_carpeta(), f'{clave}.pdf')
+    try:
+        with open(os.path.join(_carpeta(), f'{clave}.json'), encoding='utf-8') as f: nombre = json.load(f)['nombre']
+        os.utime(ruta)  # Marca de "usado recién" para el LRU
+    except (OSError, ValueError, KeyError):
+        if contar:
+            with _lock: contadores['fallos'] += 1
+        return None
+    if contar:
+        with _lock: contadores['aciertos'] += 1
+    return nombre, ruta
+
+def guardar(clave, nombre, contenido):
+    carpeta = _carpeta()
+    temporal = os.path.join(carpeta, f'{clave}.{threading.get_ident()}.tmp')
+    with open(temporal, 'wb') as f: f.write(contenido)
+    os.replace(temporal, os.path.join(carpeta, f'{clave}.pdf'))  # Nunca queda un PDF a medio escribir
+    with open(os.path.join(carpeta, f'{clave}.json'), 'w', encoding='utf-8') as f: json.dump({'nombre': nombre}, f)
+    descartar_sobrantes()
+
+def descartar_sobrantes():
+    """Borra los PDF usados hace más tiempo hasta quedar debajo de REPORTES_CACHE_MAX_MB."""
+    limite = getattr(settings, 'REPORTES_CACHE_MAX_MB', 200) * 1024 * 1024
+    with _lock:
+        carpeta = _carpeta()
+        archivos = []
+        for nombre in os.listdir(carpeta):
+            if not nombre.endswith('.pdf'): continue
+            try: datos = os.stat(os.path.join(carpeta, nombre))
+            except FileNotFoundError: continue
+            archivos.append((datos.st_mtime, datos.st_size, nombre[:-4]))
+        ocupado = sum(tamano for _, tamano, _ in archivos)
+        for _, tamano, clave in sorted(archivos):
+            if ocupado <= limite: break
+            for extension in ('.pdf', '.json'):
+                try: os.remove(os.path.join(carpeta, clave + extension))
+                except FileNotFoundError: pass
+            ocupado -= tamano; contadores['descartes'] += 1
+
+def estadisticas():
+    with _lock: return dict(contadores)
@@ -0,0 +1,74 @@
+# Archivo: tareas/cierres.py
+# Foto inmutable de un período al cerrarlo: totales por empleado con su imputación y el log de auditoría.
+# Un período cerrado no admite horas nuevas (RegistroHora.clean), así que los reportes del período
+# completo salen de la foto y no dependen de cambios posteriores en empleados o áreas.
+# Al cerrar se pregeneran en segundo plano los PDF de sueldos y estadísticas, y las hojas del log de auditoría;
+# al reabrir se borra la foto (y con ella la clave de esos PDF en la caché).
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CierrePeriodo, RegistroHora, TotalCierre, TrabajoReporte
+from . import referencias
+from .reportes import armar_log_auditoria, etiquetas_departamentos, fila_reporte, totales_por_empleado
+
+USUARIO_CIERRE = "Cierre del período"  # Solicitante de la auditoría que se pregenera al cerrar
+
+# ========================================================
+# 1. CERRAR Y REABRIR (DESDE tareas/signals.py)
+# ========================================================
+def congelar(periodo):
+    """Arma la foto del período (reemplaza la anterior si la hubiera). Devuelve el CierrePeriodo."""
+    registros = RegistroHora.objects.filter(periodo=periodo)
+    etiquetas = etiquetas_departamentos()
+    filas = [(fila['empleado_id'], fila_reporte(fila, etiquetas)) for fila in totales_por_empleado(registros)]
+    # El log se guarda ya ordenado: la clave de orden (datetime) no va al JSON
+    auditoria = [{k: v for k, v in item.items() if k != 'sort_key'} for item in armar_log_auditoria(registros)]
+    with transaction.atomic():
+        CierrePeriodo.objects.filter(periodo=periodo).delete()
+        cierre = CierrePeriodo.objects.create(
+            periodo=periodo, cantidad_registros=registros.count(), auditoria=auditoria,
+            total_horas=sum((fila['total_horas'] for _, fila in filas), 0))
+        TotalCierre.objects.bulk_create([
+            TotalCierre(cierre=cierre, orden=orden, empleado_id=empleado_id, nombre_completo=fila['nombre_completo'],
+                        dni=fila['dni'], imputacion=fila['imputacion'], total_horas=fila['total_horas'])
+            for orden, (empleado_id, fila) in enumerate(filas)])
+    return cierre
+
+def reabrir(periodo):
+    CierrePeriodo.objects.filter(periodo=periodo).delete()
+
+def prerenderizar(periodo):
+    """Encola los PDF del período recién cerrado: quedan en la caché para cuando se pidan."""
+    from . import trabajos  # trabajos -> documentos -> cierres
+    registros = list(RegistroHora.objects.filter(periodo=periodo).values_list('pk', flat=True))
+    if not registros: return
+    for destinatario in referencias.destinatarios():
+        # La tabla se genera en el primero; los demás solo suman su nota (documentos.pdf_sueldos_destinatarios)
+        trabajos.encolar(TrabajoReporte.TIPO_SUELDOS, {'registros': registros, 'destinatario_nombre': destinatario.nombre, 'destinatario_cargo': destinatario.cargo},
+                         descripcion=f"Cierre {periodo.nombre}: sueldos para {destinatario.nombre}")
+    # Deja en la caché las hojas del log: cada pedido posterior solo agrega su encabezado (documentos.pdf_auditoria)
+    trabajos.encolar(TrabajoReporte.TIPO_AUDITORIA, {'registros': registros, 'usuario_solicitante': USUARIO_CIERRE}, descripcion=f"Cierre {periodo.nombre}: auditoría")
+    if periodo.vigente:
+        # Las estadísticas son siempre las del período vigente (y llevan la fecha del día)
+        trabajos.encolar(TrabajoReporte.TIPO_ESTADISTICAS, {}, descripcion=f"Cierre {periodo.nombre}: estadísticas")
+
+# ========================================================
+# 2. LECTURA (REPORTES Y CACHÉ DE PDF)
+# ========================================================
+def cierre_de(registros):
+    """El CierrePeriodo si la selección es un período cerrado completo; si no, None."""
+    periodos = list(registros.order_by().values_list('periodo_id', flat=True).distinct()[:2])
+    if len(periodos) != 1: return None
+    cierre = CierrePeriodo.objects.filter(periodo_id=periodos[0], periodo__cerrado=True).select_related('periodo').first()
+    # Cerrado no se cargan horas nuevas: misma cantidad es la misma selección (si se borró alguna, ya no coincide)
+    if cierre is None or registros.count() != cierre.cantidad_registros: return None
+    return cierre
+
+def datos_sueldos(cierre):
+    """(filas, total general) congelados, con la misma forma que reportes.agrupar_datos_reporte()."""
+    filas = [{'nombre_completo': nombre, 'dni': dni, 'imputacion': imputacion, 'total_horas': total}
+             for nombre, dni, imputacion, total in cierre.filas.values_list('nombre_completo', 'dni', 'imputacion', 'total_horas')]
+    return filas, cierre.total_horas
+
+def fecha_cierre(cierre):
+    return timezone.localtime(cierre.creado)
@@ -0,0 +1,255 @@
+# Archivo: tareas/documentos.py
+# Generación de los PDF (sueldos, estadísticas y auditoría).
+# Cada función devuelve (nombre_archivo, contenido_en_bytes): las acciones del admin
+# y los trabajos en segundo plano (tareas/trabajos.py) deciden qué hacer con eso.
+# matplotlib (tareas/graficos.py), xhtml2pdf, ReportLab y pypdf se importan recién con el primer reporte: el admin carga este
+# módulo en cada arranque (manage.py, crear_backup, workers) y esas librerías tardan más de un segundo.
+import os
+import io
+import datetime
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.contrib.staticfiles import finders
+
+from .instrumentacion import medir
+from .models import Periodo, ResumenPeriodo, ResumenSecretaria
+from .reportes import agrupar_datos_reporte, armar_log_auditoria
+from . import cache_reportes, cierres, graficos, referencias
+
+class ErrorReporte(Exception):
+    """Error 'esperable' al generar un reporte: el mensaje se le muestra tal cual al usuario."""
+
+# ========================================================
+# 1. UTILIDADES
+# ========================================================
+def link_callback(uri, rel):
+    if uri.startswith(graficos.PREFIJO): return graficos.ruta(uri)  # Gráfico ya dibujado en disco
+    result = finders.find(uri)
+    if result:
+        if not isinstance(result, (list, tuple)): result = [result]
+        result = list(os.path.realpath(path) for path in result)
+        path = result[0]
+    else:
+        sUrl = settings.STATIC_URL; sRoot = settings.STATIC_ROOT
+        mUrl = settings.MEDIA_URL; mRoot = settings.MEDIA_ROOT
+        if uri.startswith(mUrl): path = os.path.join(mRoot, uri.replace(mUrl, ""))
+        elif uri.startswith(sUrl): path = os.path.join(sRoot, uri.replace(sUrl, ""))
+        else: return uri
+    if not os.path.isfile(path): raise Exception('media URI must start with %s or %s' % (sUrl, mUrl))
+    return path
+
+def renderizar_pdf(nombre_template, contexto, mensaje_error='Error al generar PDF.'):
+    from xhtml2pdf import pisa
+    with medir('plantilla'):
+        html = get_template(nombre_template).render(contexto)
+    destino = io.BytesIO()
+    with medir('pisa.CreatePDF'):
+        pisa_status = pisa.CreatePDF(html, dest=destino, link_callback=link_callback)
+    if pisa_status.err: raise ErrorReporte(mensaje_error)
+    return destino.getvalue()
+
+def _sin_progreso(porcentaje): pass
+
+# ========================================================
+# 2. REPORTES
+# ========================================================
+def pdf_estadisticas(progreso=_sin_progreso):
+    periodo_actual = referencias.periodo_vigente()
+    if not periodo_actual: raise ErrorReporte("Error: No hay período vigente.")
+
+    periodos_historicos = Periodo.objects.filter(fecha_inicio__lte=periodo_actual.fecha_inicio).order_by('-fecha_inicio')[:6]
+    periodos_historicos = sorted(periodos_historicos, key=lambda p: p.fecha_inicio)
+    nombres_periodos = []; totales_periodos = []; lista_datos_barras = []
+    # Totales leídos de los resúmenes precalculados (tareas/resumenes.py): una sola consulta
+    totales_resumen = dict(ResumenPeriodo.objects.filter(periodo__in=periodos_historicos).values_list('periodo_id', 'total_horas'))
+    for p in periodos_historicos:
+        total = totales_resumen.get(p.id) or 0
+        nombres_periodos.append(p.nombre); totales_periodos.append(total)
+        lista_datos_barras.append({'periodo': p.nombre, 'horas': total})
+    # Si los datos no cambiaron desde el último reporte, el gráfico sale de la caché (tareas/graficos.py)
+    with medir('gráfico barras'):
+        grafico_barras = graficos.barras(nombres_periodos, totales_periodos)
+    progreso(30)
+
+    datos_secretarias = [{'nombre': r['secretaria__nombre'], 'total': r['total_horas']} for r in ResumenSecretaria.objects.filter(periodo=periodo_actual).values('secretaria__nombre', 'total_horas')]
+    labels = []; sizes = []; colors = []; lista_datos_torta = []
+    color_map = {'gobierno': '#dc3545', 'ciudadania': '#ffc107', 'ciudadanía': '#ffc107', 'obras': '#0056b3', 'modernizacion': '#28a745', 'modernización': '#28a745'}
+    total_absoluto = sum(item['total'] for item in datos_secretarias)
+    for item in datos_secretarias:
+        nombre_sec = item['nombre'] or "Sin Secretaría"
+        total_hs = item['total']
+        if total_hs > 0:
+            labels.append(nombre_sec); sizes.append(total_hs)
+            nombre_lower = nombre_sec.lower(); c = '#6c757d'
+            if 'gobierno' in nombre_lower: c = color_map['gobierno']
+            elif 'ciudadan' in nombre_lower: c = color_map['ciudadania']
+            elif 'obra' in nombre_lower: c = color_map['obras']
+            elif 'moderniza' in nombre_lower: c = color_map['modernizacion']
+            colors.append(c)
+            porc = round((total_hs / total_absoluto) * 100, 1)
+            lista_datos_torta.append({'label': nombre_sec, 'value': total_hs, 'color': c, 'porcentaje': porc})
+    with medir('gráfico torta'):
+        grafico_torta = graficos.torta(sizes, colors)
+    progreso(60)
+
+    contexto = {'fecha_hoy': datetime.date.today(), 'periodo_actual': periodo_actual.nombre, 'grafico_barras': grafico_barras, 'grafico_torta': grafico_torta, 'datos_barras': lista_datos_barras, 'datos_torta': lista_datos_torta}
+    pdf = renderizar_pdf('admin/tareas/registrohora/estadisticas_pdf.html', contexto, 'Error PDF Gráfico.')
+    return f"Estadisticas_{periodo_actual.nombre}.pdf", pdf
+
+# 🌟 REPORTE DE SUELDOS CON LA LÓGICA DE IMPUTACIÓN INTELIGENTE
+# Las copias para cada destinatario solo difieren en la nota de la hoja 1: la tabla (hoja 2 en adelante)
+# se genera una vez, queda en la caché de PDF y a cada copia se le pega su nota con pypdf.
+def _renderizar_sueldos(contexto):
+    """solo_nota: la hoja 1 sola. solo_tabla: las hojas de la tabla, numeradas desde hojas_nota + 1."""
+    if getattr(settings, 'REPORTE_SUELDOS_MOTOR', 'xhtml2pdf') == 'reportlab':
+        from .pdf_reportlab import renderizar_sueldos
+        with medir('reportlab'):
+            return renderizar_sueldos(contexto)
+    if not contexto.get('solo_tabla'):
+        return renderizar_pdf('admin/tareas/registrohora/reporte_pdf.html', contexto, 'Error al generar PDF.')
+    # xhtml2pdf numera desde la hoja 1: la plantilla pone hojas en blanco en lugar de la nota y acá se quitan
+    from pypdf import PdfReader, PdfWriter
+    hojas_nota = contexto['hojas_nota']
+    pdf = PdfReader(io.BytesIO(renderizar_pdf('admin/tareas/registrohora/reporte_pdf.html', {**contexto, 'hojas_en_blanco': range(hojas_nota)}, 'Error al generar PDF.')))
+    escritor = PdfWriter(); escritor.append(pdf, pages=(hojas_nota, len(pdf.pages)))
+    destino = io.BytesIO(); escritor.write(destino)
+    return destino.getvalue()
+
+def _periodo_y_fecha(queryset):
+    """(cierre, período, fecha) del reporte: un período cerrado completo sale de su foto, con la fecha del cierre."""
+    cierre = cierres.cierre_de(queryset)
+    if cierre: return cierre, cierre.periodo, cierres.fecha_cierre(cierre).date()
+    periodo_obj = referencias.periodo_vigente()
+    if not periodo_obj and queryset.exists(): periodo_obj = queryset.first().periodo
+    return None, periodo_obj, datetime.date.today()
+
+def _cuerpo_sueldos(queryset, cierre, contexto, hojas_nota, progreso):
+    """PDF con las hojas de la tabla, sin la nota. Se genera una sola vez por selección, datos y largo de la nota."""
+    clave = cache_reportes.clave_reporte(cache_reportes.TIPO_CUERPO_SUELDOS, {'registros': list(queryset.values_list('pk', flat=True)), 'hojas_nota': hojas_nota})
+    cacheado = cache_reportes.obtener(clave, contar=False)
+    if cacheado:
+        with open(cacheado[1], 'rb') as origen: return origen.read()
+
+    # Totales por empleado e imputación: de la foto del cierre o de una consulta agrupada (tareas/reportes.py)
+    lista_final, total_general = cierres.datos_sueldos(cierre) if cierre else agrupar_datos_reporte(queryset)
+    progreso(40)
+    cuerpo = _renderizar_sueldos({**contexto, 'solo_tabla': True, 'hojas_nota': hojas_nota, 'datos': lista_final, 'total_general': total_general})
+    cache_reportes.guardar(clave, 'cuerpo.pdf', cuerpo)
+    return cuerpo
+
+def pdf_sueldos_destinatarios(queryset, destinatarios, progreso=_sin_progreso):
+    """Una copia por destinatario [(nombre, cargo)]: devuelve (nombre base del archivo, [bytes de cada copia])."""
+    from pypdf import PdfReader, PdfWriter
+    cierre, periodo_obj, fecha = _periodo_y_fecha(queryset)
+    contexto = {'periodo': periodo_obj, 'fecha_hoy': fecha}
+    cuerpos = {}  # Hojas de la nota -> tabla numerada a continuación (casi siempre hay una sola)
+    copias = []
+    for destinatario_nombre, destinatario_cargo in destinatarios:
+        with medir('nota'):
+            nota = PdfReader(io.BytesIO(_renderizar_sueldos({**contexto, 'destinatario_nombre': destinatario_nombre, 'destinatario_cargo': destinatario_cargo, 'solo_nota': True})))
+        hojas_nota = len(nota.pages)
+        if hojas_nota not in cuerpos:
+            cuerpos[hojas_nota] = PdfReader(io.BytesIO(_cuerpo_sueldos(queryset, cierre, contexto, hojas_nota, progreso)))
+            progreso(80)
+        with medir('pypdf'):
+            escritor = PdfWriter(); escritor.append(nota); escritor.append(cuerpos[hojas_nota])
+            destino = io.BytesIO(); escritor.write(destino)
+        copias.append(destino.getvalue())
+    return f"Reporte_{periodo_obj.nombre if periodo_obj else 'Horas'}", copias
+
+def pdf_sueldos(queryset, destinatario_nombre, destinatario_cargo, progreso=_sin_progreso):
+    nombre, copias = pdf_sueldos_destinatarios(queryset, [(destinatario_nombre, destinatario_cargo)], progreso)
+    return f"{nombre}.pdf", copias[0]
+
+# 🔍 AUDITORÍA: xhtml2pdf tarda cada vez más por fila (y usa más memoria) cuanto más larga es la tabla,
+# así que un log grande se genera en bloques de AUDITORIA_FILAS_POR_BLOQUE filas que se unen con pypdf.
+# El pie "Página N" se estampa después con ReportLab sobre el documento unido: la numeración es continua.
+# En un período cerrado el log está congelado: sus hojas se generan una vez y cada pedido les pone
+# su propia hoja de encabezado (quién lo pide y cuándo) antes de numerar.
+PLANTILLA_AUDITORIA = 'admin/tareas/registrohora/auditoria_pdf.html'
+
+def _bloque_auditoria(contexto):
+    """PDF de un bloque del log, sin pie (también corre en los procesos del pool de tareas/lotes.py)."""
+    return renderizar_pdf(PLANTILLA_AUDITORIA, {**contexto, 'sin_pie': True}, 'Error al generar PDF Auditoría.')
+
+def _numerar_paginas(escritor):
+    """Estampa "Página N" en cada hoja, en el mismo lugar y estilo que el pie de la plantilla."""
+    from pypdf import PdfReader
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen.canvas import Canvas
+    destino = io.BytesIO(); lienzo = Canvas(destino)
+    for numero, hoja in enumerate(escritor.pages, 1):
+        ancho, alto = float(hoja.mediabox.width), float(hoja.mediabox.height)
+        lienzo.setPageSize((ancho, alto)); lienzo.setFont('Helvetica', 8); lienzo.setFillColor(HexColor('#999999'))
+        lienzo.drawRightString(ancho - 1 * cm, 0.8 * cm, f"Documento de Control Interno - Página {numero}")
+        lienzo.showPage()
+    lienzo.save()
+    for hoja, pie in zip(escritor.pages, PdfReader(destino).pages):
+        hoja.merge_page(pie); hoja.compress_content_streams()
+    escritor.compress_identical_objects()  # Cada hoja trae su copia de las fuentes del pie
+
+def _auditoria_en_bloques(contexto, logs, filas, progreso, encabezado=True):
+    """Log unido con pypdf. encabezado=False: solo las hojas de la tabla, sin numerar (el cuerpo de un cierre)."""
+    import tempfile
+    from pypdf import PdfWriter
+    from . import lotes
+    bloques = [{**contexto, 'logs': logs[i:i + filas], 'continuacion': i > 0 or not encabezado} for i in range(0, max(len(logs), 1), filas)]
+    procesos = min(getattr(settings, 'AUDITORIA_PROCESOS', 1) or lotes.procesos_por_defecto(), len(bloques))
+    if not lotes.puede_usar_procesos(): procesos = 1
+    with tempfile.TemporaryDirectory(prefix='auditoria_') as carpeta:
+        # Cada bloque va a disco apenas termina: en memoria queda uno por proceso, no el documento entero
+        rutas = [os.path.join(carpeta, f'{n:05d}.pdf') for n in range(len(bloques))]
+        def guardar(n, contenido):
+            with open(rutas[n], 'wb') as archivo: archivo.write(contenido)
+            progreso(40 + int(45 * sum(os.path.exists(r) for r in rutas) / len(rutas)))
+
+        with medir('bloques auditoría'):
+            if procesos == 1:
+                for n, bloque in enumerate(bloques): guardar(n, _bloque_auditoria(bloque))
+            else:
+                with lotes.pool(procesos) as ejecutor:
+                    for n, contenido in enumerate(ejecutor.map(_bloque_auditoria, bloques)): guardar(n, contenido)
+        with medir('pypdf'):
+            escritor = PdfWriter()
+            for ruta in rutas: escritor.append(ruta)
+            if encabezado: _numerar_paginas(escritor)
+            destino = io.BytesIO(); escritor.write(destino)
+    return destino.getvalue()
+
+def _cuerpo_auditoria(queryset, cierre, filas, progreso):
+    """Hojas del log congelado de un cierre, sin encabezado ni pie. Se generan una sola vez por cierre."""
+    clave = cache_reportes.clave_reporte(cache_reportes.TIPO_CUERPO_AUDITORIA, {'registros': list(queryset.values_list('pk', flat=True))})
+    cacheado = cache_reportes.obtener(clave, contar=False)
+    if cacheado:
+        with open(cacheado[1], 'rb') as origen: return origen.read()
+    cuerpo = _auditoria_en_bloques({}, cierre.auditoria, filas, progreso, encabezado=False)
+    cache_reportes.guardar(clave, 'cuerpo_auditoria.pdf', cuerpo)
+    return cuerpo
+
+def pdf_auditoria(queryset, usuario_solicitante, progreso=_sin_progreso):
+    contexto = {'fecha_hoy': datetime.datetime.now(), 'usuario_solicitante': usuario_solicitante}
+    filas = getattr(settings, 'AUDITORIA_FILAS_POR_BLOQUE', 250)
+    cierre = cierres.cierre_de(queryset)
+    if cierre:
+        # Período cerrado completo: el log congelado al cerrar (tareas/cierres.py) con el encabezado de este pedido
+        from pypdf import PdfReader, PdfWriter
+        cuerpo = _cuerpo_auditoria(queryset, cierre, filas, progreso)
+        progreso(85)
+        encabezado = renderizar_pdf(PLANTILLA_AUDITORIA, {**contexto, 'solo_encabezado': True, 'sin_pie': True, 'cierre': cierre, 'fecha_cierre': cierres.fecha_cierre(cierre)},
+                                    'Error al generar PDF Auditoría.')
+        with medir('pypdf'):
+            escritor = PdfWriter(); escritor.append(PdfReader(io.BytesIO(encabezado))); escritor.append(PdfReader(io.BytesIO(cuerpo)))
+            _numerar_paginas(escritor)
+            destino = io.BytesIO(); escritor.write(destino)
+        return "Auditoria_Segura.pdf", destino.getvalue()
+
+    # Historial completo en una sola consulta (tareas/reportes.py)
+    lista_auditoria = armar_log_auditoria(queryset)
+    progreso(40)
+    if len(lista_auditoria) <= filas:
+        pdf = renderizar_pdf(PLANTILLA_AUDITORIA, {**contexto, 'logs': lista_auditoria}, 'Error al generar PDF Auditoría.')
+    else:
+        pdf = _auditoria_en_bloques(contexto, lista_auditoria, filas, progreso)
+    return "Auditoria_Segura.pdf", pdf
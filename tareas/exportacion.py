@@ -0,0 +1,51 @@
+# Archivo: tareas/exportacion.py
+# Exportación del reporte de sueldos en CSV / XLSX para cargar en el sistema de sueldos.
+# Son las mismas filas que el PDF (tareas/reportes.py), pero se escriben a medida que
+# salen de la base, de a tandas: la memoria no depende de cuántos empleados tenga el período.
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+
+from .reportes import etiquetas_departamentos, fila_reporte, totales_por_empleado
+
+TAMANO_TANDA = 2000
+ENCABEZADOS = ['DNI', 'APELLIDO Y NOMBRE', 'IMPUTACION', 'HORAS']
+
+def filas_sueldos(queryset):
+    """Genera las filas del reporte de sueldos de a una, leyendo la base de a TAMANO_TANDA."""
+    etiquetas = etiquetas_departamentos()
+    for fila in totales_por_empleado(queryset).iterator(chunk_size=TAMANO_TANDA):
+        datos = fila_reporte(fila, etiquetas)
+        yield [datos['dni'], datos['nombre_completo'], datos['imputacion'], datos['total_horas']]
+
+# ========================================================
+# 1. CSV (se escribe directo en la respuesta)
+# ========================================================
+class _Eco:
+    """'Archivo' que devuelve lo que se le escribe, para usar csv.writer con StreamingHttpResponse."""
+    def write(self, valor): return valor
+
+def respuesta_csv(queryset, nombre_archivo):
+    escritor = csv.writer(_Eco())
+    def contenido():
+        yield escritor.writerow(ENCABEZADOS)
+        for fila in filas_sueldos(queryset): yield escritor.writerow(fila)
+    respuesta = StreamingHttpResponse(contenido(), content_type='text/csv; charset=utf-8')
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return respuesta
+
+# ========================================================
+# 2. XLSX (openpyxl en modo write_only: las filas van a disco, no a memoria)
+# ========================================================
+def respuesta_xlsx(queryset, nombre_archivo):
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Sueldos')
+    hoja.append(ENCABEZADOS)
+    for fila in filas_sueldos(queryset): hoja.append(fila)
+    # El XLSX es un ZIP y se arma al final: lo guardamos en un temporal y lo mandamos por partes
+    temporal = tempfile.TemporaryFile()
+    libro.save(temporal); temporal.seek(0)
+    return FileResponse(temporal, as_attachment=True, filename=nombre_archivo,
+                        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
@@ -0,0 +1,88 @@
+# Archivo: tareas/graficos.py
+# Gráficos del reporte estadístico. Cada gráfico es una Figure propia (sin el estado global de
+# pyplot, que no es seguro con varios hilos generando reportes a la vez) y se guarda en disco con
+# un nombre que es el hash de sus datos: si los datos no cambiaron, no se vuelve a dibujar.
+# El PDF los lee como archivo a través de documentos.link_callback ("grafico:<archivo>"),
+# sin pasar por base64. REPORTE_GRAFICOS_FORMATO = 'svg' los deja vectoriales (PDF más chico).
+import hashlib
+import json
+import os
+import threading
+
+from django.conf import settings
+
+VERSION_DIBUJO = 1          # Subirla si cambia cómo se dibuja: invalida los archivos ya guardados
+PREFIJO = 'grafico:'        # Así los referencia la plantilla; link_callback lo traduce a la ruta
+FORMATOS = ('png', 'svg')
+
+# ========================================================
+# 1. CACHÉ EN DISCO
+# ========================================================
+def carpeta():
+    # Dentro de la caché de PDF: se vacían juntas (cache_reportes solo cuenta los .pdf)
+    carpeta = os.path.join(str(getattr(settings, 'REPORTES_CACHE_DIR', os.path.join(settings.BASE_DIR, 'reportes_generados', 'cache'))), 'graficos')
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def formato():
+    elegido = getattr(settings, 'REPORTE_GRAFICOS_FORMATO', 'png')
+    if elegido not in FORMATOS: raise ValueError(f"REPORTE_GRAFICOS_FORMATO debe ser uno de {FORMATOS}, no {elegido!r}")
+    return elegido
+
+def ruta(uri):
+    """Ruta en disco de un "grafico:<archivo>" (lo usa documentos.link_callback)."""
+    return os.path.join(carpeta(), os.path.basename(uri[len(PREFIJO):]))
+
+def _obtener(tipo, datos, dibujar):
+    """Devuelve la referencia "grafico:<archivo>", dibujándolo solo si no estaba guardado."""
+    extension = formato()
+    clave = hashlib.sha256(json.dumps([VERSION_DIBUJO, tipo, extension, datos], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    nombre = f'{tipo}_{clave[:32]}.{extension}'
+    destino = os.path.join(carpeta(), nombre)
+    if os.path.exists(destino):
+        os.utime(destino)  # Marca de "usado recién" para descartar los más viejos
+        return PREFIJO + nombre
+    figura = dibujar(*datos)
+    temporal = f'{destino}.{threading.get_ident()}.tmp'
+    figura.savefig(temporal, format=extension)
+    os.replace(temporal, destino)  # Otro hilo que lo pida a la vez nunca ve un archivo a medio escribir
+    descartar_sobrantes()
+    return PREFIJO + nombre
+
+def descartar_sobrantes():
+    """Deja los GRAFICOS_CACHE_MAX archivos usados más recientemente."""
+    limite = getattr(settings, 'GRAFICOS_CACHE_MAX', 200)
+    archivos = []
+    for nombre in os.listdir(carpeta()):
+        if not nombre.endswith(FORMATOS): continue
+        try: archivos.append((os.stat(os.path.join(carpeta(), nombre)).st_mtime, nombre))
+        except FileNotFoundError: continue
+    for _, nombre in sorted(archivos, reverse=True)[limite:]:
+        try: os.remove(os.path.join(carpeta(), nombre))
+        except FileNotFoundError: pass
+
+# ========================================================
+# 2. DIBUJO (matplotlib se importa recién acá)
+# ========================================================
+def _dibujar_barras(nombres, totales):
+    from matplotlib.figure import Figure
+    figura = Figure(figsize=(10, 3.5))
+    eje = figura.add_subplot()
+    eje.bar(nombres, totales, color='#007bff', width=0.5)
+    eje.grid(axis='y', linestyle='--', alpha=0.5); figura.tight_layout()
+    return figura
+
+def _dibujar_torta(valores, colores):
+    from matplotlib.figure import Figure
+    figura = Figure(figsize=(8, 4))
+    eje = figura.add_subplot()
+    if valores: eje.pie(valores, labels=None, colors=colores, startangle=140); eje.axis('equal')
+    else: eje.text(0.5, 0.5, 'Sin datos', ha='center')
+    figura.tight_layout()
+    return figura
+
+def barras(nombres, totales):
+    return _obtener('barras', [list(nombres), [float(t) for t in totales]], _dibujar_barras)
+
+def torta(valores, colores):
+    return _obtener('torta', [[float(v) for v in valores], list(colores)], _dibujar_torta)
@@ -0,0 +1,124 @@
+# Archivo: tareas/instrumentacion.py
+# Mide cada pedido (y cada reporte en segundo plano): cantidad de consultas, tiempo en SQL,
+# las consultas más lentas y tramos con nombre (gráficos, plantilla, pisa.CreatePDF...).
+# Cada medición se escribe como una línea JSON en el log rotativo 'tareas.rendimiento'
+# (ver LOGGING en core/settings.py) y los superusuarios (o quien tenga tareas.ver_rendimiento) ven las lentas en /admin/rendimiento/.
+import collections
+import contextlib
+import contextvars
+import heapq
+import json
+import logging
+import logging.handlers
+import os
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger('tareas.rendimiento')
+
+class ArchivoRendimiento(logging.handlers.RotatingFileHandler):
+    """El handler del log (LOGGING en core/settings.py). Con delay=True la carpeta se crea al escribir, no al importar settings."""
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+_actual = contextvars.ContextVar('medicion_actual', default=None)
+
+# ========================================================
+# 1. MEDICIÓN
+# ========================================================
+class Medicion:
+    def __init__(self, nombre, **extra):
+        self.nombre = nombre
+        self.extra = extra        # Datos para el log que se pueden completar durante la medición (status, usuario...)
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.lentas = []          # Montículo con las N consultas más lentas: (segundos, sql)
+        self.tramos = {}          # nombre -> segundos (se suman si el tramo se repite)
+        self.inicio = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Se instala con connection.execute_wrapper: envuelve cada consulta del ORM
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.consultas += 1; self.tiempo_sql += duracion
+            limite = getattr(settings, 'INSTRUMENTACION_CONSULTAS_LENTAS', 5)
+            if len(self.lentas) < limite: heapq.heappush(self.lentas, (duracion, sql))
+            elif duracion > self.lentas[0][0]: heapq.heapreplace(self.lentas, (duracion, sql))
+
+    def resumen(self):
+        total = time.perf_counter() - self.inicio
+        return {
+            'fecha': timezone.now().isoformat(), 'nombre': self.nombre, **self.extra,
+            'total_ms': round(total * 1000, 1), 'consultas': self.consultas, 'sql_ms': round(self.tiempo_sql * 1000, 1),
+            'tramos_ms': {k: round(v * 1000, 1) for k, v in self.tramos.items()},
+            'lentas': [{'ms': round(d * 1000, 1), 'sql': sql[:500]} for d, sql in sorted(self.lentas, reverse=True)],
+            'lento': total * 1000 >= getattr(settings, 'INSTRUMENTACION_LENTO_MS', 1000),
+        }
+
+@contextlib.contextmanager
+def instrumentar(nombre, **extra):
+    """
+    Mide todo lo que pase adentro (en este hilo) y lo escribe en el log al salir.
+    Si ya hay una medición en curso (un reporte generado dentro del mismo pedido) se suma a esa.
+    """
+    if _actual.get() is not None or not getattr(settings, 'INSTRUMENTACION_ACTIVA', True):
+        yield _actual.get(); return
+    medicion = Medicion(nombre, **extra)
+    token = _actual.set(medicion)
+    try:
+        with connection.execute_wrapper(medicion):
+            yield medicion
+    finally:
+        _actual.reset(token)
+        logger.info(json.dumps(medicion.resumen(), ensure_ascii=False, default=str))
+
+@contextlib.contextmanager
+def medir(nombre):
+    """Tramo con nombre dentro de la medición actual (si no hay ninguna, no hace nada)."""
+    medicion = _actual.get()
+    if medicion is None:
+        yield; return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion.tramos[nombre] = medicion.tramos.get(nombre, 0) + time.perf_counter() - inicio
+
+# ========================================================
+# 2. MIDDLEWARE
+# ========================================================
+class MiddlewareInstrumentacion:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path.startswith('/' + settings.STATIC_URL.lstrip('/')): return self.get_response(request)
+        with instrumentar('pedido', metodo=request.method, ruta=request.get_full_path()[:300]) as medicion:
+            response = self.get_response(request)
+            if medicion is not None:
+                medicion.extra.update(status=response.status_code, usuario=getattr(getattr(request, 'user', None), 'username', ''))
+        return response
+
+# ========================================================
+# 3. LECTURA DEL LOG
+# ========================================================
+def mediciones_recientes(limite=200, solo_lentas=True):
+    """Últimas mediciones del log (la más nueva primero). Solo mira el archivo actual, no los rotados."""
+    ruta = str(getattr(settings, 'INSTRUMENTACION_LOG', ''))
+    if not ruta or not os.path.exists(ruta): return []
+    with open(ruta, encoding='utf-8', errors='replace') as f:
+        lineas = collections.deque(f, maxlen=20000)
+    resultado = []
+    for linea in reversed(lineas):
+        try: medicion = json.loads(linea)
+        except ValueError: continue
+        if solo_lentas and not medicion.get('lento'): continue
+        resultado.append(medicion)
+        if len(resultado) >= limite: break
+    return resultado
@@ -0,0 +1,111 @@
+# Archivo: tareas/lotes.py
+# Reporte de sueldos en lote: un PDF por secretaría o por departamento (el del legajo del empleado,
+# igual que el filtro del listado de horas), todos juntos en un ZIP.
+# xhtml2pdf es Python puro y usa la CPU todo el tiempo: con hilos no se gana nada (GIL), así que cada
+# unidad se genera en un pool de procesos. Cada proceso arranca Django por su cuenta y lee la misma
+# base (SQLite admite varios lectores); los PDF se van agregando al ZIP a medida que terminan.
+# El mismo pool genera en paralelo los bloques de una auditoría grande (documentos.pdf_auditoria).
+import csv
+import io
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connections
+from django.utils.text import slugify
+
+from . import referencias
+
+POR_SECRETARIA = 'secretaria'; POR_DEPARTAMENTO = 'departamento'
+CAMPOS = {POR_SECRETARIA: 'empleado__departamento__secretaria_id', POR_DEPARTAMENTO: 'empleado__departamento_id'}
+
+def _sin_progreso(porcentaje): pass
+
+# ========================================================
+# 1. UNIDADES (SECRETARÍAS O DEPARTAMENTOS)
+# ========================================================
+def unidades(registros, por):
+    """[(etiqueta, [ids de registros])] de cada unidad con horas, en orden de imputación ("Sin ..." al final)."""
+    grupos = {}
+    for pk, clave in registros.order_by().values_list('pk', CAMPOS[por]):
+        grupos.setdefault(clave, []).append(pk)
+    if por == POR_DEPARTAMENTO: etiquetas, sin_unidad = referencias.etiquetas_departamentos(), "Sin departamento"
+    else: etiquetas, sin_unidad = {pk: str(s) for pk, s in referencias.secretarias().items()}, "Sin secretaría"
+    return sorted(((etiquetas.get(clave, sin_unidad), pks) for clave, pks in grupos.items()), key=lambda u: (u[0] == sin_unidad, u[0]))
+
+def procesos_por_defecto():
+    return getattr(settings, 'LOTES_PROCESOS', None) or os.cpu_count() or 1
+
+# ========================================================
+# 2. GENERACIÓN (EN CADA PROCESO DEL POOL)
+# ========================================================
+def _iniciar_proceso(base):
+    # Proceso nuevo ("spawn", igual en Linux y en Windows): hay que levantar Django de cero
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    connections['default'].settings_dict['NAME'] = base  # La misma base que el proceso que lo pidió
+    from . import documentos  # noqa: F401  Se importa una vez acá: no cuenta en el tiempo de la primera unidad
+    from xhtml2pdf import pisa  # noqa: F401
+
+def _renderizar(etiqueta, registros_ids, destinatario_nombre, destinatario_cargo):
+    from .documentos import pdf_sueldos
+    from .models import RegistroHora
+    inicio = time.perf_counter()
+    _, contenido = pdf_sueldos(RegistroHora.objects.filter(pk__in=registros_ids), destinatario_nombre, destinatario_cargo)
+    return etiqueta, contenido, time.perf_counter() - inicio
+
+def puede_usar_procesos():
+    conexion = connections['default']
+    # Una base en memoria (la de las pruebas) no se ve desde otro proceso
+    return conexion.vendor != 'sqlite' or not conexion.creation.is_in_memory_db(conexion.settings_dict['NAME'])
+
+def pool(procesos):
+    """Pool de procesos nuevos con Django levantado sobre la misma base que este proceso."""
+    return ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn'), initializer=_iniciar_proceso,
+                               initargs=(str(connections['default'].settings_dict['NAME']),))
+
+# ========================================================
+# 3. LOTE COMPLETO EN UN ZIP
+# ========================================================
+def generar_zip(registros, por, destinatario_nombre, destinatario_cargo, destino, procesos=None, progreso=_sin_progreso):
+    """
+    Escribe en 'destino' (archivo o buffer) un ZIP con un PDF por unidad y un tiempos.csv.
+    Devuelve el resumen: tiempo de cada unidad, tiempo total y aceleración frente a generarlas
+    una por una (estimada como la suma de los tiempos de cada unidad).
+    """
+    lista = unidades(registros, por)
+    procesos = max(1, min(procesos or procesos_por_defecto(), len(lista) or 1))
+    if not puede_usar_procesos(): procesos = 1
+    nombres = {etiqueta: f"{n:02d}_{slugify(etiqueta) or 'unidad'}.pdf" for n, (etiqueta, _) in enumerate(lista, 1)}
+    tiempos = {}
+    inicio = time.perf_counter()
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as archivo_zip:
+        def agregar(etiqueta, contenido, segundos):
+            archivo_zip.writestr(nombres[etiqueta], contenido); tiempos[etiqueta] = segundos
+            progreso(5 + int(90 * len(tiempos) / len(lista)))
+
+        if procesos == 1:
+            for etiqueta, ids in lista: agregar(*_renderizar(etiqueta, ids, destinatario_nombre, destinatario_cargo))
+        else:
+            with pool(procesos) as ejecutor:
+                futuros = [ejecutor.submit(_renderizar, etiqueta, ids, destinatario_nombre, destinatario_cargo) for etiqueta, ids in lista]
+                for futuro in as_completed(futuros): agregar(*futuro.result())
+        total = time.perf_counter() - inicio
+
+        serial = sum(tiempos.values())
+        resumen = {
+            'por': por, 'procesos': procesos, 'segundos_total': round(total, 3), 'segundos_serial_estimado': round(serial, 3),
+            'aceleracion': round(serial / total, 2) if total else 0,
+            'unidades': [{'unidad': etiqueta, 'archivo': nombres[etiqueta], 'registros': len(ids), 'segundos': round(tiempos[etiqueta], 3)} for etiqueta, ids in lista],
+        }
+        texto = io.StringIO(); escritor = csv.writer(texto, delimiter=';')
+        escritor.writerow(['UNIDAD', 'ARCHIVO', 'REGISTROS', 'SEGUNDOS'])
+        escritor.writerows([u['unidad'], u['archivo'], u['registros'], u['segundos']] for u in resumen['unidades'])
+        escritor.writerow([]); escritor.writerow(['PROCESOS', procesos]); escritor.writerow(['TOTAL', resumen['segundos_total']])
+        escritor.writerow(['SUMA DE UNIDADES', resumen['segundos_serial_estimado']]); escritor.writerow(['ACELERACION', resumen['aceleracion']])
+        archivo_zip.writestr('tiempos.csv', texto.getvalue())
+    return resumen
@@ -0,0 +1,122 @@
+# Archivo: tareas/management/commands/benchmark_admin.py
+# Mide las acciones del admin (reportes, listado, importaciones) con el mismo camino que usa
+# una persona desde el navegador, y guarda tiempo, consultas y memoria pico en un JSON.
+# Con --comparar se enfrentan dos JSON para ver si algo empeoró.
+import json
+import shutil
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import tablib
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tareas import benchmarks
+from tareas.admin import EmpleadoResource, RegistroHoraMasivoResource, RegistroHoraResource
+from tareas.models import Empleado, Periodo, RegistroHora
+
+METRICAS = ('segundos', 'consultas', 'memoria_pico_mb')
+
+class Command(BaseCommand):
+    help = 'Mide las acciones del admin (PDF, estadísticas, auditoría, listado, importaciones) y guarda los resultados en JSON; --comparar enfrenta dos resultados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usar-base-actual', action='store_true', help='Mide sobre la base configurada (por ejemplo, una sembrada con sembrar_datos) en vez de una temporal.')
+        parser.add_argument('--empleados', type=int, default=300)
+        parser.add_argument('--periodos', type=int, default=6)
+        parser.add_argument('--registros', type=int, default=800, help='Registros de horas por período.')
+        parser.add_argument('--filas-importacion', type=int, default=1000)
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument('--solo', nargs='+', help='Escenarios a medir (por defecto, todos).')
+        parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto benchmark_admin_<fecha>.json).')
+        parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DESPUES'), help='Compara dos archivos de resultados y termina.')
+        parser.add_argument('--tolerancia', type=float, default=0.10, help='Empeoramiento relativo que se acepta al comparar (0.10 = 10%%).')
+
+    # ========================================================
+    # 1. ESCENARIOS
+    # ========================================================
+    def escenarios(self, filas_importacion):
+        periodo = Periodo.objects.get(vigente=True)
+        seleccion = [str(pk) for pk in RegistroHora.objects.filter(periodo=periodo).values_list('pk', flat=True)]
+        cliente = Client()
+        cliente.force_login(User.objects.filter(is_superuser=True).first() or User.objects.create_superuser('benchmark', 'benchmark@muni.gob.ar', 'benchmark'))
+        listado = reverse('admin:tareas_registrohora_changelist')
+
+        def accion(nombre):
+            def correr():
+                respuesta = cliente.post(listado, {'action': nombre, '_selected_action': seleccion})
+                if respuesta.status_code not in (200, 302): raise CommandError(f'⛔ {nombre} respondió {respuesta.status_code}')
+                if getattr(respuesta, 'streaming', False): b''.join(respuesta.streaming_content)
+            return correr
+
+        dnis = list(Empleado.objects.values_list('dni', flat=True))
+        horas = tablib.Dataset(*[(periodo.nombre, dnis[i % len(dnis)], 1.5) for i in range(filas_importacion)], headers=['PERIODO', 'DNI', 'HORAS'])
+        # Mitad de DNI ya cargados (se saltean) y mitad nuevos
+        empleados = tablib.Dataset(*[(dnis[i // 2] if i % 2 else str(90000000 + i), 'Importado', str(i), '') for i in range(min(filas_importacion, 2 * len(dnis)))],
+                                   headers=['dni', 'apellido', 'nombre', 'Departamento'])
+        return {
+            'generar_pdf_base': accion('reporte_andrea'),
+            'generar_estadisticas': accion('generar_estadisticas'),
+            'descargar_auditoria_pdf': accion('descargar_auditoria_pdf'),
+            'exportar_sueldos_csv': accion('exportar_sueldos_csv'),
+            'changelist': lambda: cliente.get(listado, {'periodo__id__exact': periodo.pk}),
+            'importar_horas': lambda: RegistroHoraResource().import_data(horas),
+            'importar_horas_masivo': lambda: RegistroHoraMasivoResource().import_data(horas),
+            'importar_empleados': lambda: EmpleadoResource().import_data(empleados),
+        }
+
+    def correr_sin_cambios(self, funcion):
+        """Corre el escenario dentro de una transacción que se descarta, con la caché de PDF vacía."""
+        shutil.rmtree(settings.REPORTES_CACHE_DIR, ignore_errors=True)
+        with transaction.atomic():
+            funcion()
+            transaction.set_rollback(True)
+
+    def medir(self, funcion, repeticiones):
+        segundos = benchmarks.medir(lambda: self.correr_sin_cambios(funcion), repeticiones)
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as consultas:
+            self.correr_sin_cambios(funcion)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {'segundos': round(segundos, 4), 'consultas': len(consultas), 'memoria_pico_mb': round(pico / (1024 * 1024), 2)}
+
+    def medir_todo(self, options):
+        resultados = {}
+        escenarios = self.escenarios(options['filas_importacion'])
+        for nombre, funcion in escenarios.items():
+            if options['solo'] and nombre not in options['solo']: continue
+            resultados[nombre] = self.medir(funcion, options['repeticiones'])
+            r = resultados[nombre]
+            self.stdout.write(f"⏱️ {nombre:<26} {r['segundos'] * 1000:>10.1f} ms {r['consultas']:>7} consultas {r['memoria_pico_mb']:>8.1f} MB pico")
+        return resultados
+
+    def handle(self, *args, **options):
+        if options['comparar']:
+            benchmarks.comparar_resultados(self, *options['comparar'], METRICAS, options['tolerancia']); return
+
+        carpeta = tempfile.mkdtemp(prefix='benchmark_reportes_')
+        ajustes = override_settings(ALLOWED_HOSTS=['testserver'], REPORTES_EN_SEGUNDO_PLANO=False, REPORTES_DIR=carpeta, REPORTES_CACHE_DIR=f'{carpeta}/cache')
+        try:
+            with ajustes:
+                if options['usar_base_actual']:
+                    resultados = self.medir_todo(options)
+                else:
+                    with benchmarks.base_temporal():
+                        self.stdout.write(f"🌱 Sembrando {options['periodos']} períodos x {options['registros']} registros, {options['empleados']} empleados...")
+                        benchmarks.sembrar(empleados=options['empleados'], periodos=options['periodos'], registros_por_periodo=options['registros'])
+                        resultados = self.medir_todo(options)
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+        salida = options['salida'] or f"benchmark_admin_{datetime.now():%Y-%m-%d_%H-%M-%S}.json"
+        parametros = {k: options[k] for k in ('usar_base_actual', 'empleados', 'periodos', 'registros', 'filas_importacion', 'repeticiones')}
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump({'fecha': datetime.now().isoformat(), 'parametros': parametros, 'escenarios': resultados}, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f'✅ Resultados guardados en {salida}'))
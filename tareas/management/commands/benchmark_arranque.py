@@ -0,0 +1,113 @@
+# Archivo: tareas/management/commands/benchmark_arranque.py
+# Mide cuánto tarda en arrancar un proceso nuevo: "manage.py check" (lo mismo que paga cada comando,
+# incluido el crear_backup programado) y la carga de la aplicación WSGI más su primer pedido.
+# Cada medición corre en un intérprete aparte con "-X importtime", así se ve qué módulos se cargaron.
+# Con --comparar se enfrentan dos JSON (por ejemplo, antes y después de un cambio en los imports).
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tareas import benchmarks
+
+METRICAS = ('segundos', 'importacion_segundos', 'modulos_pesados')
+PESADOS = ('matplotlib', 'xhtml2pdf', 'reportlab', 'pypdf')  # Solo deberían cargarse al generar un reporte
+
+# Se corre con "python -c" en el directorio del proyecto: carga core.wsgi y le hace un pedido sin servidor
+SCRIPT_WSGI = '''
+import json, sys, time
+inicio = time.perf_counter()
+from core.wsgi import application
+cargado = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+entorno = {'PATH_INFO': sys.argv[1]}
+setup_testing_defaults(entorno)
+estado = []
+respuesta = application(entorno, lambda status, headers, exc_info=None: estado.append(status))
+b''.join(respuesta); respuesta.close()
+fin = time.perf_counter()
+print(json.dumps({'estado': estado[0], 'carga': cargado - inicio, 'pedido': fin - cargado, 'modulos': sorted(sys.modules)}))
+'''
+
+class Command(BaseCommand):
+    help = 'Mide el arranque de un proceso nuevo (manage.py check y primer pedido WSGI) con -X importtime y guarda los resultados en JSON; --comparar enfrenta dos resultados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--url', default='/admin/login/', help='Dirección del primer pedido WSGI.')
+        parser.add_argument('--top', type=int, default=10, help='Cantidad de paquetes más lentos de importar que se muestran.')
+        parser.add_argument('--salida', help='Archivo JSON de resultados (por defecto benchmark_arranque_<fecha>.json).')
+        parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DESPUES'), help='Compara dos archivos de resultados y termina.')
+        parser.add_argument('--tolerancia', type=float, default=0.10, help='Empeoramiento relativo que se acepta al comparar (0.10 = 10%%).')
+
+    # ========================================================
+    # 1. MEDICIÓN
+    # ========================================================
+    def correr(self, argumentos):
+        """Corre un intérprete nuevo con -X importtime. Devuelve (segundos, stdout, stderr)."""
+        inicio = time.perf_counter()
+        proceso = subprocess.run([sys.executable, '-X', 'importtime', *argumentos], cwd=settings.BASE_DIR, capture_output=True, text=True)
+        transcurrido = time.perf_counter() - inicio
+        if proceso.returncode: raise CommandError(f"⛔ {' '.join(argumentos[:2])} terminó con código {proceso.returncode}:\n{proceso.stderr[-2000:]}")
+        return transcurrido, proceso.stdout, proceso.stderr
+
+    def importaciones(self, stderr):
+        """{paquete: segundos} según la salida de -X importtime ("self | cumulative | nombre", en microsegundos).
+        Se suma el tiempo propio de cada módulo a su paquete de primer nivel: así openpyxl cuenta como
+        openpyxl aunque lo haya importado import_export."""
+        paquetes = {}
+        for linea in stderr.splitlines():
+            m = re.match(r'import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)$', linea)
+            if m: paquetes[m[2].split('.')[0]] = paquetes.get(m[2].split('.')[0], 0) + int(m[1]) / 1e6
+        return paquetes
+
+    def resultado(self, mejor, paquetes, modulos, top, **extra):
+        pesados = sorted({m.split('.')[0] for m in modulos} & set(PESADOS))
+        return {
+            'segundos': round(mejor, 4), 'importacion_segundos': round(sum(paquetes.values()), 4), 'modulos_pesados': len(pesados),
+            'pesados': pesados, 'paquetes_mas_lentos': {k: round(v, 4) for k, v in sorted(paquetes.items(), key=lambda p: -p[1])[:top]},
+            **extra,
+        }
+
+    def medir_check(self, repeticiones, top):
+        mejor, stderr = None, ''
+        for _ in range(repeticiones):
+            segundos, _, stderr = self.correr([os.path.join(settings.BASE_DIR, 'manage.py'), 'check'])
+            mejor = segundos if mejor is None else min(mejor, segundos)
+        paquetes = self.importaciones(stderr)
+        return self.resultado(mejor, paquetes, paquetes, top)
+
+    def medir_wsgi(self, repeticiones, url, top):
+        mejor, stderr_mejor = None, ''
+        for _ in range(repeticiones):
+            _, stdout, stderr = self.correr(['-c', SCRIPT_WSGI, url])
+            datos = json.loads(stdout.strip().splitlines()[-1])
+            if not datos['estado'].startswith(('2', '3')): raise CommandError(f"⛔ {url} respondió {datos['estado']}")
+            # Solo lo que paga el primer pedido: carga de Django, la app y el pedido (sin el arranque del intérprete)
+            if mejor is None or datos['carga'] + datos['pedido'] < mejor['carga'] + mejor['pedido']: mejor, stderr_mejor = datos, stderr
+        return self.resultado(mejor['carga'] + mejor['pedido'], self.importaciones(stderr_mejor), mejor['modulos'], top,
+                              carga_wsgi_segundos=round(mejor['carga'], 4), primer_pedido_segundos=round(mejor['pedido'], 4))
+
+    def handle(self, *args, **options):
+        if options['comparar']:
+            benchmarks.comparar_resultados(self, *options['comparar'], METRICAS, options['tolerancia']); return
+
+        resultados = {
+            'manage_check': self.medir_check(options['repeticiones'], options['top']),
+            'wsgi_primer_pedido': self.medir_wsgi(options['repeticiones'], options['url'], options['top']),
+        }
+        for nombre, r in resultados.items():
+            self.stdout.write(f"⏱️ {nombre:<20} {r['segundos'] * 1000:>8.1f} ms  importando {r['importacion_segundos'] * 1000:>8.1f} ms  pesados: {', '.join(r['pesados']) or '-'}")
+            for paquete, segundos in r['paquetes_mas_lentos'].items(): self.stdout.write(f"      {paquete:<24} {segundos * 1000:>8.1f} ms")
+
+        salida = options['salida'] or f"benchmark_arranque_{datetime.now():%Y-%m-%d_%H-%M-%S}.json"
+        parametros = {k: options[k] for k in ('repeticiones', 'url')}
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump({'fecha': datetime.now().isoformat(), 'parametros': parametros, 'escenarios': resultados}, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f'✅ Resultados guardados en {salida}'))
@@ -0,0 +1,72 @@
+# Archivo: tareas/management/commands/benchmark_indices.py
+# Mide las consultas de los reportes y de la auditoría sobre una base temporal grande,
+# sin y con los índices de la migración 0015, mostrando el EXPLAIN QUERY PLAN de cada una.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+
+from tareas import benchmarks, resumenes
+from tareas.admin import RegistroHoraAdmin
+from tareas.models import Periodo, RegistroHora
+from tareas.reportes import agrupar_datos_reporte, armar_log_auditoria, totales_por_empleado
+
+INDICES = {
+    'registro_periodo_empleado_idx': 'CREATE INDEX registro_periodo_empleado_idx ON tareas_registrohora (periodo_id, empleado_id)',
+    'historial_registro_id_fecha_idx': 'CREATE INDEX historial_registro_id_fecha_idx ON tareas_historicalregistrohora (id, history_date DESC, history_id DESC)',
+    'historial_registro_bajas_idx': 'CREATE INDEX historial_registro_bajas_idx ON tareas_historicalregistrohora (history_type, periodo_id, history_date)',
+}
+
+class Command(BaseCommand):
+    help = 'Compara las consultas de reportes y auditoría sin y con los índices compuestos (base temporal con datos inventados).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empleados', type=int, default=2000)
+        parser.add_argument('--periodos', type=int, default=12)
+        parser.add_argument('--registros', type=int, default=4000, help='Registros de horas por período.')
+        parser.add_argument('--sin-plan', action='store_true', help='No muestra el EXPLAIN QUERY PLAN.')
+
+    def consultas(self):
+        periodo = Periodo.objects.get(vigente=True)
+        del_periodo = RegistroHora.objects.filter(periodo=periodo)
+        Historico = RegistroHora.history.model
+        request = RequestFactory().get('/admin/tareas/registrohora/'); request.user = User(is_superuser=True, is_staff=True)
+        listado = RegistroHoraAdmin(RegistroHora, admin.site).get_queryset(request).filter(periodo=periodo).order_by('-pk')
+        # nombre -> (queryset para el EXPLAIN, función que hace lo mismo que la acción del admin)
+        return {
+            'Reporte de sueldos': (totales_por_empleado(del_periodo), lambda: agrupar_datos_reporte(del_periodo)),
+            'Auditoría (historial)': (Historico.objects.filter(id__in=del_periodo.values('pk')).order_by('id', '-history_date', '-history_id'), lambda: armar_log_auditoria(del_periodo)),
+            'Auditoría (bajas)': (Historico.objects.filter(history_type='-', periodo_id__in=[periodo.pk]).order_by('-history_date'),
+                                  lambda: list(Historico.objects.filter(history_type='-', periodo_id__in=[periodo.pk]).order_by('-history_date'))),
+            'Listado admin (100 filas)': (listado[:100], lambda: list(listado[:100])),
+            'Recalcular resúmenes': (del_periodo.values('empleado_id').order_by(), lambda: resumenes.recalcular_periodos([periodo.pk])),
+        }
+
+    def cambiar_indices(self, crear):
+        with connection.cursor() as cursor:
+            for nombre, sql in INDICES.items():
+                cursor.execute(f'DROP INDEX IF EXISTS {nombre}')
+                if crear: cursor.execute(sql)
+            cursor.execute('ANALYZE')
+
+    def handle(self, *args, **options):
+        with benchmarks.base_temporal():
+            self.stdout.write(f"🌱 Sembrando {options['periodos']} períodos x {options['registros']} registros, {options['empleados']} empleados...")
+            benchmarks.sembrar(empleados=options['empleados'], periodos=options['periodos'], registros_por_periodo=options['registros'])
+            consultas = self.consultas()
+            tiempos = {}
+            for etapa, crear in (('sin índices', False), ('con índices', True)):
+                self.cambiar_indices(crear)
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n=== {etapa.upper()} ==='))
+                for nombre, (queryset, funcion) in consultas.items():
+                    tiempos[(nombre, etapa)] = benchmarks.medir(funcion)
+                    self.stdout.write(f'⏱️ {nombre}: {tiempos[(nombre, etapa)] * 1000:.1f} ms')
+                    if not options['sin_plan']:
+                        for linea in queryset.explain().splitlines(): self.stdout.write(f'      {linea}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\n=== RESUMEN ==='))
+        for nombre in consultas:
+            antes, despues = tiempos[(nombre, 'sin índices')], tiempos[(nombre, 'con índices')]
+            estilo = self.style.SUCCESS if despues < antes else self.style.WARNING
+            self.stdout.write(estilo(f'{nombre:<28} {antes * 1000:>9.1f} ms -> {despues * 1000:>9.1f} ms  ({antes / despues:.1f}x)'))
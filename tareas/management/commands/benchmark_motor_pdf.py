@@ -0,0 +1,53 @@
+# Archivo: tareas/management/commands/benchmark_motor_pdf.py
+import datetime
+import time
+import tracemalloc
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from tareas.documentos import renderizar_pdf
+from tareas.pdf_reportlab import renderizar_sueldos
+
+class Command(BaseCommand):
+    help = 'Compara tiempo y memoria pico de los motores del reporte de sueldos (xhtml2pdf vs ReportLab).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, nargs='+', default=[1000, 5000, 20000], help='Cantidades de empleados a probar.')
+        parser.add_argument('--motores', nargs='+', default=['xhtml2pdf', 'reportlab'], choices=['xhtml2pdf', 'reportlab'])
+
+    def contexto_sintetico(self, filas):
+        # Datos inventados con la misma forma que devuelve agrupar_datos_reporte(): no toca la base
+        periodo = SimpleNamespace(nombre='Diciembre 2025', fecha_inicio=datetime.date(2025, 12, 1), fecha_fin=datetime.date(2025, 12, 31))
+        datos = [{
+            'nombre_completo': f"Apellido{i:05d}, Nombre{i % 97}",
+            'dni': str(20000000 + i),
+            'imputacion': f"{i % 9:02d}.{i % 23:02d} - Departamento {i % 23}",
+            'total_horas': Decimal(i % 180) + Decimal('0.50'),
+        } for i in range(filas)]
+        return {'periodo': periodo, 'fecha_hoy': datetime.date.today(), 'datos': datos, 'total_general': sum(d['total_horas'] for d in datos),
+                'destinatario_nombre': "SRA. BALTIERI ANDREA SOLEDAD", 'destinatario_cargo': "A/C del Área Sueldos"}
+
+    def medir(self, motor, contexto):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        if motor == 'reportlab': pdf = renderizar_sueldos(contexto)
+        else: pdf = renderizar_pdf('admin/tareas/registrohora/reporte_pdf.html', contexto)
+        segundos = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return segundos, pico / (1024 * 1024), len(pdf) / 1024
+
+    def handle(self, *args, **options):
+        self.stdout.write('⏱️ Tiempos medidos con tracemalloc activo (sirven para comparar motores entre sí).')
+        self.stdout.write(f"{'FILAS':>8} {'MOTOR':>10} {'SEGUNDOS':>10} {'PICO MB':>10} {'PDF KB':>10}")
+        for filas in options['filas']:
+            contexto = self.contexto_sintetico(filas)
+            resultados = {}
+            for motor in options['motores']:
+                segundos, pico, tamano = self.medir(motor, contexto)
+                resultados[motor] = segundos
+                self.stdout.write(f"{filas:>8} {motor:>10} {segundos:>10.2f} {pico:>10.1f} {tamano:>10.0f}")
+            if len(resultados) == 2:
+                self.stdout.write(self.style.SUCCESS(f"{'':>8} ReportLab es {resultados['xhtml2pdf'] / resultados['reportlab']:.1f}x más rápido con {filas} filas"))
@@ -1,44 +1,100 @@
 # Archivo: tareas/management/commands/crear_backup.py
+import json
 import os
-import shutil
 import time
 from datetime import datetime
-from django.core.management.base import BaseCommand
-from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tareas import backups
 
 class Command(BaseCommand):
-    help = 'Genera una copia de seguridad de la base de datos SQLite y limpia las viejas.'
+    help = 'Genera una copia de seguridad consistente y comprimida de la base SQLite (sin frenar a los que cargan) y limpia las viejas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paginas', type=int, default=backups.PAGINAS_POR_PASO, help='Páginas copiadas por tanda (entre tandas la base queda libre).')
+        parser.add_argument('--incremental', action='store_true', help='Guarda solo las páginas que cambiaron desde el último backup (pensado para correr cada hora).')
 
     def handle(self, *args, **options):
         # 1. Configuración
-        db_path = settings.DATABASES['default']['NAME']
-        backup_dir = os.path.join(settings.BASE_DIR, 'backups')
-        
-        # 2. Crear carpeta de backups si no existe
-        if not os.path.exists(backup_dir):
-            os.makedirs(backup_dir)
-            self.stdout.write(self.style.SUCCESS(f'Carpeta creada: {backup_dir}'))
-
-        # 3. Generar nombre del archivo con fecha y hora
+        db_path = backups.ruta_base()
+        backup_dir = backups.carpeta_backups()
+        # Los errores salen con CommandError: código de salida distinto de 0 para la tarea programada (auto_backup.bat)
+        if not os.path.exists(db_path):
+            raise CommandError(f'⛔ No se encontró la base de datos en: {db_path}')
+
+        # 2. Generar nombre del archivo con fecha y hora
         fecha_str = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        backup_filename = f"db_backup_{fecha_str}.sqlite3"
+        if options['incremental']:
+            self.backup_incremental(db_path, fecha_str, options['paginas'])
+            return
+        backup_filename = f"db_backup_{fecha_str}.sqlite3.gz"
         backup_path = os.path.join(backup_dir, backup_filename)
+        temporal = os.path.join(backup_dir, f".db_backup_{fecha_str}.tmp")
 
-        # 4. Copiar la base de datos
+        # 3. Foto en línea -> integridad -> compresión -> manifiesto
+        cronometro = backups.Cronometro()
         try:
-            if os.path.exists(db_path):
-                shutil.copy2(db_path, backup_path)
-                self.stdout.write(self.style.SUCCESS(f'✅ Backup creado exitosamente: {backup_filename}'))
-            else:
-                self.stdout.write(self.style.ERROR(f'⛔ No se encontró la base de datos en: {db_path}'))
-                return
+            with cronometro('copia en línea'):
+                paginas = backups.copiar_en_linea(db_path, temporal, paginas=options['paginas'])
+            with cronometro('integridad'):
+                backups.verificar_integridad(temporal)
+            with cronometro('compresión'):
+                sha256_base = backups.comprimir(temporal, backup_path)
+            with cronometro('checksum'):
+                sha256_comprimido = backups.sha256_archivo(backup_path)
+            backups.guardar_manifiesto(backup_path, {
+                'archivo': backup_filename, 'creado': timezone.now().isoformat(), 'paginas': paginas,
+                'tamano_base': os.path.getsize(temporal), 'tamano_comprimido': os.path.getsize(backup_path),
+                'sha256_base': sha256_base, 'sha256_comprimido': sha256_comprimido, 'tiempos': cronometro.tiempos,
+            })
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f'⛔ Error al copiar: {str(e)}'))
-            return
+            if os.path.exists(backup_path): os.remove(backup_path)
+            raise CommandError(f'⛔ Error al generar el backup: {str(e)}') from e
+        finally:
+            if os.path.exists(temporal): os.remove(temporal)
+
+        for fase, segundos in cronometro.tiempos.items(): self.stdout.write(f'   ⏱️ {fase}: {segundos:.2f}s')
+        self.stdout.write(self.style.SUCCESS(f'✅ Backup creado exitosamente: {backup_filename} ({os.path.getsize(backup_path) / 1024:.0f} KB, integridad OK)'))
 
-        # 5. Limpieza automática (Borrar backups de más de 30 días)
+        # 4. Limpieza automática (Borrar backups de más de 30 días)
         self.limpiar_backups_antiguos(backup_dir)
 
+    def backup_incremental(self, db_path, fecha_str, paginas_por_paso):
+        nombre = f"db_inc_{fecha_str}.json"
+        temporal = os.path.join(backups.carpeta_backups(), f".db_inc_{fecha_str}.tmp")
+        cronometro = backups.Cronometro()
+        try:
+            with cronometro('copia en línea'):
+                backups.copiar_en_linea(db_path, temporal, paginas=paginas_por_paso)
+            with cronometro('integridad'):
+                backups.verificar_integridad(temporal)
+            with cronometro('páginas'):
+                hashes, nuevas, escritos = backups.guardar_paginas(temporal)
+            with cronometro('checksum'):
+                sha256_base = backups.sha256_archivo(temporal)
+            datos = {
+                'archivo': nombre, 'tipo': 'incremental', 'creado': timezone.now().isoformat(), 'tamano_pagina': backups.TAMANO_PAGINA,
+                'tamano_base': os.path.getsize(temporal), 'sha256_base': sha256_base, 'paginas_nuevas': nuevas, 'bytes_nuevos': escritos,
+                'tiempos': cronometro.tiempos, 'paginas': hashes,
+            }
+            # El manifiesto se escribe al final y de una vez: si algo falla antes, el backup no existe
+            ruta = os.path.join(backups.carpeta_incrementales(), nombre)
+            with open(ruta + '.tmp', 'w', encoding='utf-8') as f: json.dump(datos, f, ensure_ascii=False)
+            os.replace(ruta + '.tmp', ruta)
+        except Exception as e:
+            raise CommandError(f'⛔ Error al generar el backup incremental: {str(e)}') from e
+        finally:
+            if os.path.exists(temporal): os.remove(temporal)
+
+        for fase, segundos in cronometro.tiempos.items(): self.stdout.write(f'   ⏱️ {fase}: {segundos:.2f}s')
+        self.stdout.write(self.style.SUCCESS(f'✅ Backup incremental creado: {nombre} ({nuevas} de {len(hashes)} páginas nuevas, {escritos / 1024:.0f} KB escritos)'))
+
+        # Limpieza: manifiestos de más de 30 días y después las páginas que ya nadie usa
+        self.limpiar_backups_antiguos(backups.carpeta_incrementales())
+        borradas, liberados = backups.recolectar_paginas()
+        if borradas: self.stdout.write(self.style.SUCCESS(f'🧹 {borradas} páginas sin uso borradas ({liberados / 1024:.0f} KB liberados).'))
+
     def limpiar_backups_antiguos(self, directorio):
         dias_a_mantener = 30
         ahora = time.time()
@@ -46,12 +102,12 @@ class Command(BaseCommand):
 
         for archivo in os.listdir(directorio):
             ruta_completa = os.path.join(directorio, archivo)
-            
-            # Solo procesamos archivos .sqlite3
-            if os.path.isfile(ruta_completa) and archivo.endswith('.sqlite3'):
+
+            # Backups (.sqlite3.gz, y los .sqlite3 sin comprimir de antes) con sus manifiestos
+            if os.path.isfile(ruta_completa) and archivo.startswith(('db_backup_', 'db_inc_')) and archivo.endswith(('.sqlite3', '.sqlite3.gz', '.json')):
                 # Obtenemos la fecha de creación del archivo
                 fecha_archivo = os.path.getmtime(ruta_completa)
-                
+
                 # Si es más viejo que 30 días (30 * 86400 segundos)
                 if ahora - fecha_archivo > (dias_a_mantener * 86400):
                     try:
@@ -60,6 +116,6 @@ class Command(BaseCommand):
                         self.stdout.write(f'🗑️ Backup antiguo eliminado: {archivo}')
                     except Exception as e:
                         self.stdout.write(self.style.WARNING(f'No se pudo borrar {archivo}: {e}'))
-        
+
         if eliminados > 0:
-            self.stdout.write(self.style.SUCCESS(f'🧹 Limpieza completada: {eliminados} archivos antiguos borrados.'))
\ No newline at end of file
+            self.stdout.write(self.style.SUCCESS(f'🧹 Limpieza completada: {eliminados} archivos antiguos borrados.'))
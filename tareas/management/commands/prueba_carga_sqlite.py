@@ -0,0 +1,87 @@
+# Archivo: tareas/management/commands/prueba_carga_sqlite.py
+# Simula varias personas cargando horas a la vez (cierre de período) sobre una base
+# SQLite temporal, una vez por cada perfil de conexión de SQLITE_PERFILES.
+# Cada sesión es un proceso aparte que guarda RegistroHora con el ORM (historial y resúmenes incluidos).
+# Los procesos se crean con "spawn" (en Windows no hay fork): cada uno levanta Django por su cuenta.
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+from tareas.benchmarks import usar_base
+
+def _sesion(ruta, perfil, numero, guardados, barrera, resultados):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    from tareas.models import Empleado, Periodo, RegistroHora
+    usar_base(ruta, perfil)
+    periodo = Periodo.objects.get(vigente=True)
+    empleados = list(Empleado.objects.filter(dni__startswith=f'{numero}-'))
+    tiempos, bloqueos = [], 0
+    barrera.wait()
+    for i in range(guardados):
+        inicio = time.perf_counter()
+        try:
+            # Igual que el admin: changeform_view valida el formulario (lecturas) y guarda en una misma transacción
+            with transaction.atomic():
+                empleado = Empleado.objects.get(pk=empleados[i % len(empleados)].pk)
+                RegistroHora(empleado=empleado, periodo=periodo, cantidad_horas=Decimal('1.50')).save()
+            tiempos.append(time.perf_counter() - inicio)
+        except OperationalError:  # "database is locked"
+            bloqueos += 1
+    connections['default'].close()
+    resultados.put((tiempos, bloqueos))
+
+class Command(BaseCommand):
+    help = 'Prueba de carga: N sesiones guardando horas a la vez, comparando los perfiles SQLite de core/settings.py.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sesiones', type=int, default=8, help='Procesos cargando horas en paralelo.')
+        parser.add_argument('--guardados', type=int, default=100, help='Registros que guarda cada sesión.')
+        parser.add_argument('--perfiles', nargs='+', default=list(settings.SQLITE_PERFILES), choices=list(settings.SQLITE_PERFILES))
+
+    def preparar_base(self, ruta, perfil, sesiones):
+        from tareas.models import Departamento, Empleado, Periodo, Secretaria
+        usar_base(ruta, perfil)
+        call_command('migrate', verbosity=0)
+        secretaria = Secretaria.objects.create(nombre='Prueba', imputacion='99.00')
+        departamento = Departamento.objects.create(secretaria=secretaria, nombre='Prueba', imputacion='99')
+        Periodo.objects.create(nombre='Prueba', fecha_inicio='2025-01-01', fecha_fin='2025-01-31', vigente=True)
+        Empleado.objects.bulk_create([Empleado(dni=f'{s}-{e}', apellido='Carga', nombre=f'{s}-{e}', departamento=departamento) for s in range(sesiones) for e in range(5)])
+        connections['default'].close()
+
+    def correr(self, perfil, sesiones, guardados):
+        with tempfile.TemporaryDirectory(prefix='carga_sqlite_') as carpeta:
+            ruta = os.path.join(carpeta, 'carga.sqlite3')
+            self.preparar_base(ruta, perfil, sesiones)
+            contexto = multiprocessing.get_context('spawn')  # Igual en Linux y en Windows
+            barrera = contexto.Barrier(sesiones + 1); resultados = contexto.Queue()
+            procesos = [contexto.Process(target=_sesion, args=(ruta, perfil, n, guardados, barrera, resultados)) for n in range(sesiones)]
+            for p in procesos: p.start()
+            barrera.wait(); inicio = time.perf_counter()
+            datos = [resultados.get() for _ in procesos]
+            total = time.perf_counter() - inicio
+            for p in procesos: p.join()
+        tiempos = sorted(t for lista, _ in datos for t in lista)
+        bloqueos = sum(b for _, b in datos)
+        return tiempos, bloqueos, total
+
+    def handle(self, *args, **options):
+        sesiones, guardados = options['sesiones'], options['guardados']
+        self.stdout.write(f'⏱️ {sesiones} sesiones x {guardados} guardados. La latencia incluye la espera por el candado de escritura.')
+        self.stdout.write(f"{'PERFIL':>12} {'GUARD/S':>9} {'BLOQUEOS':>9} {'P50 ms':>8} {'P95 ms':>8} {'P99 ms':>8} {'MÁX ms':>8}")
+        for perfil in options['perfiles']:
+            tiempos, bloqueos, total = self.correr(perfil, sesiones, guardados)
+            if len(tiempos) >= 2: p50, p95, p99 = (statistics.quantiles(tiempos, n=100, method='inclusive')[i] * 1000 for i in (49, 94, 98))
+            else: p50 = p95 = p99 = 0
+            maximo = tiempos[-1] * 1000 if tiempos else 0
+            estilo = self.style.SUCCESS if not bloqueos else self.style.WARNING
+            self.stdout.write(estilo(f"{perfil:>12} {len(tiempos) / total:>9.1f} {bloqueos:>9} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {maximo:>8.1f}"))
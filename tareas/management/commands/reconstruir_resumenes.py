@@ -0,0 +1,24 @@
+# Archivo: tareas/management/commands/reconstruir_resumenes.py
+import time
+from django.core.management.base import BaseCommand
+from tareas.resumenes import recalcular_periodos, verificar_resumenes
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero los resúmenes de horas (período, secretaría, departamento) y los verifica.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo-verificar', action='store_true', help='No reconstruye: solo compara los resúmenes contra los totales en vivo.')
+
+    def handle(self, *args, **options):
+        if not options['solo_verificar']:
+            inicio = time.perf_counter()
+            recalcular_periodos()
+            self.stdout.write(self.style.SUCCESS(f'✅ Resúmenes reconstruidos en {time.perf_counter() - inicio:.2f}s'))
+
+        diferencias = verificar_resumenes()
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('✅ Verificación OK: los resúmenes coinciden con los totales en vivo.'))
+            return
+        for nivel, clave, esperado, actual in diferencias:
+            self.stdout.write(self.style.ERROR(f'⛔ Diferencia en {nivel} {clave}: en vivo={esperado} resumen={actual}'))
+        self.stdout.write(self.style.ERROR(f'⛔ {len(diferencias)} diferencias encontradas. Ejecute el comando sin --solo-verificar para corregirlas.'))
@@ -0,0 +1,45 @@
+# Archivo: tareas/management/commands/reporte_lote.py
+import io
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tareas import lotes, referencias
+from tareas.models import Destinatario, Periodo, RegistroHora
+
+class Command(BaseCommand):
+    help = 'Genera el reporte de sueldos de un período en lote (un PDF por secretaría o por departamento, en un pool de procesos) y lo guarda en un ZIP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', help='Nombre del período (por defecto, el vigente).')
+        parser.add_argument('--por', choices=list(lotes.CAMPOS), default=lotes.POR_SECRETARIA)
+        parser.add_argument('--destinatario', help='Alias del destinatario (por defecto, el primero activo).')
+        parser.add_argument('--procesos', type=int, help='Procesos del pool (por defecto, LOTES_PROCESOS o la cantidad de núcleos).')
+        parser.add_argument('--comparar-serial', action='store_true', help='Genera el lote de nuevo con un solo proceso y muestra la aceleración medida.')
+        parser.add_argument('--salida', help='Archivo ZIP (por defecto sueldos_por_<unidad>_<fecha>.zip).')
+
+    def handle(self, *args, **options):
+        periodo = Periodo.objects.filter(nombre=options['periodo']).first() if options['periodo'] else referencias.periodo_vigente()
+        if periodo is None: raise CommandError('⛔ No se encontró el período (ni hay uno vigente).')
+        registros = RegistroHora.objects.filter(periodo=periodo)
+        if options['destinatario']: destinatario = Destinatario.objects.filter(alias__iexact=options['destinatario']).first()
+        else: destinatario = next(iter(referencias.destinatarios()), None)
+        if destinatario is None: raise CommandError('⛔ No se encontró el destinatario (ni hay uno activo).')
+        nombre, cargo = destinatario.nombre, destinatario.cargo
+        salida = options['salida'] or f"sueldos_por_{options['por']}_{datetime.now():%Y-%m-%d_%H-%M-%S}.zip"
+
+        self.stdout.write(f"🗂️ {periodo.nombre}: un PDF por {options['por']} para {nombre}...")
+        with open(salida, 'wb') as destino:
+            resumen = lotes.generar_zip(registros, options['por'], nombre, cargo, destino, procesos=options['procesos'])
+        for unidad in resumen['unidades']:
+            self.stdout.write(f"⏱️ {unidad['unidad']:<40} {unidad['registros']:>7} registros {unidad['segundos'] * 1000:>9.1f} ms")
+        self.stdout.write(f"   {len(resumen['unidades'])} PDF en {resumen['segundos_total']:.2f}s con {resumen['procesos']} procesos "
+                          f"(suma de unidades {resumen['segundos_serial_estimado']:.2f}s, aceleración x{resumen['aceleracion']})")
+
+        if options['comparar_serial']:
+            inicio = time.perf_counter()
+            lotes.generar_zip(registros, options['por'], nombre, cargo, io.BytesIO(), procesos=1)
+            serial = time.perf_counter() - inicio
+            self.stdout.write(f"   Serial: {serial:.2f}s -> aceleración medida x{serial / resumen['segundos_total']:.2f}")
+        self.stdout.write(self.style.SUCCESS(f'✅ Lote guardado en {salida}'))
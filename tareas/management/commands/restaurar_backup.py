@@ -0,0 +1,47 @@
+# Archivo: tareas/management/commands/restaurar_backup.py
+import os
+import tempfile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tareas import backups
+
+class Command(BaseCommand):
+    help = 'Verifica un backup de crear_backup (checksums + integridad) y, si se pide, lo restaura sobre la base actual.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Backup .sqlite3.gz o manifiesto incremental db_inc_*.json (nombre dentro de la carpeta de backups o ruta completa).')
+        parser.add_argument('--solo-verificar', action='store_true', help='No toca la base: solo comprueba que el backup sirve.')
+        parser.add_argument('--noinput', action='store_true', help='No pide confirmación antes de restaurar.')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        if not os.path.exists(ruta): ruta = os.path.join(backups.carpeta_backups(), ruta)
+        if not os.path.exists(ruta): ruta = os.path.join(backups.carpeta_incrementales(), options['archivo'])
+        incremental = os.path.basename(ruta).startswith('db_inc_')
+        if not os.path.exists(ruta): raise CommandError(f'⛔ No se encontró el backup: {options["archivo"]}')
+
+        cronometro = backups.Cronometro()
+        with tempfile.TemporaryDirectory(prefix='restaurar_') as carpeta:
+            temporal = os.path.join(carpeta, 'restaurada.sqlite3')
+            try:
+                if incremental: manifiesto = backups.verificar_incremental(ruta, temporal, cronometro)
+                else: manifiesto = backups.verificar_backup(ruta, temporal, cronometro)
+            except backups.ErrorBackup as e:
+                raise CommandError(f'⛔ Backup inválido: {e}')
+            for fase, segundos in cronometro.tiempos.items(): self.stdout.write(f'   ⏱️ {fase}: {segundos:.2f}s')
+            self.stdout.write(self.style.SUCCESS(f"✅ Backup verificado: {manifiesto['archivo']} del {manifiesto['creado']} (checksums e integridad OK)"))
+            if options['solo_verificar']: return
+
+            destino = backups.ruta_base()
+            if not options['noinput']:
+                respuesta = input(f'⚠️ Se va a REEMPLAZAR {destino} con este backup. Escriba "si" para continuar: ')
+                if respuesta.strip().lower() != 'si':
+                    self.stdout.write('Restauración cancelada.'); return
+
+            # La API de backup escribe la base en su lugar (con su propio bloqueo): respeta el WAL y los demás procesos ven el cambio entero
+            connections.close_all()
+            with cronometro('restauración'):
+                backups.copiar_en_linea(temporal, destino, pausa=0)
+            self.stdout.write(f"   ⏱️ restauración: {cronometro.tiempos['restauración']:.2f}s")
+        self.stdout.write(self.style.SUCCESS(f'✅ Base restaurada desde {os.path.basename(ruta)}'))
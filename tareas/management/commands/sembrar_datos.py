@@ -0,0 +1,32 @@
+# Archivo: tareas/management/commands/sembrar_datos.py
+import time
+from django.core.management.base import BaseCommand, CommandError
+
+from tareas import benchmarks
+from tareas.models import Empleado, RegistroHora, Secretaria
+
+class Command(BaseCommand):
+    help = 'Carga un municipio inventado (secretarías, áreas, empleados, períodos, horas con préstamos e historial) para medir a escala real.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--secretarias', type=int, default=6)
+        parser.add_argument('--departamentos', type=int, default=40)
+        parser.add_argument('--empleados', type=int, default=2000)
+        parser.add_argument('--periodos', type=int, default=12, help='El último queda vigente y los anteriores cerrados.')
+        parser.add_argument('--registros', type=int, default=4000, help='Registros de horas por período.')
+        parser.add_argument('--prestamos', type=float, default=0.2, help='Fracción de registros imputados a otra área.')
+        parser.add_argument('--ediciones', type=float, default=0.05, help='Fracción de registros editados (historial).')
+        parser.add_argument('--bajas', type=float, default=0.01, help='Fracción de registros borrados (historial).')
+        parser.add_argument('--semilla', type=int, default=1, help='Misma semilla, mismos datos.')
+
+    def handle(self, *args, **options):
+        if Secretaria.objects.exists() or Empleado.objects.exists() or RegistroHora.objects.exists():
+            raise CommandError('⛔ La base ya tiene datos: este comando es solo para bases vacías (de prueba).')
+        inicio = time.perf_counter()
+        benchmarks.sembrar(
+            empleados=options['empleados'], periodos=options['periodos'], registros_por_periodo=options['registros'],
+            secretarias=options['secretarias'], departamentos=options['departamentos'], prestamos=options['prestamos'],
+            ediciones=options['ediciones'], bajas=options['bajas'], semilla=options['semilla'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Municipio sembrado en {time.perf_counter() - inicio:.1f}s: {options['empleados']} empleados, "
+            f"{RegistroHora.objects.count()} registros de horas en {options['periodos']} períodos, {RegistroHora.history.count()} filas de historial."))
@@ -0,0 +1,180 @@
+# Archivo: tareas/metricas.py
+# Métricas de operación en el formato de texto de Prometheus (se leen en /metrics, ver core/urls.py).
+# Los contadores e histogramas viven en memoria, uno por hilo: sumar u observar es tocar un
+# diccionario propio, sin candados. Al leer /metrics se juntan los de todos los hilos del proceso.
+# Lo que ya está en la base o en disco (historial, período vigente, último backup) se calcula al leer,
+# igual que los aciertos, fallos y descartes de la caché de PDF (los cuenta tareas/cache_reportes.py).
+# Los COUNT(*) recorren tablas enteras: el de horas se repite solo si cambió la versión del período,
+# y los del historial como mucho cada METRICAS_HISTORIAL_SEGUNDOS.
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from . import backups, cache_reportes, referencias
+
+# nombre -> (tipo, ayuda, límites de los buckets si es histograma)
+METRICAS = {
+    'muni_reporte_duracion_segundos': ('histogram', 'Tiempo en generar cada reporte PDF.', (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)),
+    'muni_reportes_total': ('counter', 'Reportes pedidos, por tipo y resultado (ok, error, cache).', None),
+    'muni_importacion_filas_por_segundo': ('histogram', 'Velocidad de cada importación de planillas.', (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)),
+    'muni_importacion_filas_total': ('counter', 'Filas importadas por resultado (new, update, skip, invalid, error...).', None),
+}
+
+_local = threading.local()
+_hilos = []                     # (hilo, valores) de cada hilo que registró algo
+_terminados = {}                # Valores de hilos que ya terminaron (se juntan al leer)
+_lock = threading.Lock()        # Solo para dar de alta un hilo y para leer: nunca al sumar
+
+# ========================================================
+# 1. REGISTRO (CAMINO RÁPIDO)
+# ========================================================
+def _valores():
+    valores = getattr(_local, 'valores', None)
+    if valores is None:
+        valores = _local.valores = {}
+        with _lock:
+            _juntar_terminados()
+            _hilos.append((threading.current_thread(), valores))
+    return valores
+
+def sumar(nombre, cantidad=1, **etiquetas):
+    valores = _valores(); clave = (nombre, tuple(sorted(etiquetas.items())))
+    valores[clave] = valores.get(clave, 0) + cantidad
+
+def observar(nombre, valor, **etiquetas):
+    valores = _valores(); clave = (nombre, tuple(sorted(etiquetas.items())))
+    histograma = valores.get(clave)
+    if histograma is None:
+        # [cantidad por bucket..., cantidad por encima del último, suma]
+        histograma = valores[clave] = [0] * (len(METRICAS[nombre][2]) + 1) + [0.0]
+    limites = METRICAS[nombre][2]
+    indice = next((i for i, limite in enumerate(limites) if valor <= limite), len(limites))
+    histograma[indice] += 1; histograma[-1] += valor
+
+def registrar_importacion(recurso, filas, segundos, totales, dry_run):
+    etapa = 'vista_previa' if dry_run else 'confirmada'
+    if filas and segundos > 0: observar('muni_importacion_filas_por_segundo', filas / segundos, recurso=recurso, etapa=etapa)
+    for resultado, cantidad in totales.items():
+        if cantidad: sumar('muni_importacion_filas_total', cantidad, recurso=recurso, etapa=etapa, resultado=resultado)
+
+# ========================================================
+# 2. LECTURA (AL PEDIR /metrics)
+# ========================================================
+def _sumar_en(destino, origen):
+    for clave, valor in origen.items():
+        if isinstance(valor, list):
+            actual = destino.setdefault(clave, [0] * len(valor))
+            for i, v in enumerate(valor): actual[i] += v
+        else: destino[clave] = destino.get(clave, 0) + valor
+
+def _juntar_terminados():
+    # Llamar con _lock tomado. Los hilos de cada pedido van y vienen: lo suyo se pasa a _terminados
+    for registro in [r for r in _hilos if not r[0].is_alive()]:
+        _sumar_en(_terminados, registro[1]); _hilos.remove(registro)
+
+def valores_actuales():
+    """Suma de todos los hilos del proceso: {(nombre, etiquetas): valor o histograma}."""
+    with _lock:
+        _juntar_terminados()
+        total = {}
+        _sumar_en(total, _terminados)
+        for _, valores in _hilos: _sumar_en(total, valores.copy())  # copy() es atómico: el hilo puede seguir sumando
+    return total
+
+_manifiestos = {}  # ruta -> (mtime, datos): los incrementales son grandes (lista de páginas) y no se releen
+
+def _ultimo_manifiesto(patron):
+    """(mtime, datos) del manifiesto más nuevo que coincide con el patrón (los nombres llevan la fecha), o None."""
+    rutas = sorted(glob.glob(patron))
+    if not rutas: return None
+    ruta = rutas[-1]; mtime = os.path.getmtime(ruta)
+    if _manifiestos.get(ruta, (None,))[0] != mtime:
+        try:
+            with open(ruta, encoding='utf-8') as f: datos = json.load(f)
+        except (OSError, ValueError): return None
+        datos.pop('paginas', None)
+        _manifiestos[ruta] = (mtime, datos)
+    return _manifiestos[ruta]
+
+_conteos = {}  # nombre -> (marca, valor)
+
+def _contado(nombre, marca, contar):
+    """contar() se vuelve a ejecutar solo cuando cambia la marca (una versión de datos o un tramo de tiempo)."""
+    guardado = _conteos.get(nombre)
+    if guardado is None or guardado[0] != marca:
+        guardado = _conteos[nombre] = (marca, contar())
+    return guardado[1]
+
+def valores_de_la_base():
+    """Métricas que se leen de la base y de la carpeta de backups: (nombre, tipo, ayuda, [(etiquetas, valor)])."""
+    from simple_history.models import registered_models
+    from .models import RegistroHora, VersionDatos
+    tramo = int(time.time() // getattr(settings, 'METRICAS_HISTORIAL_SEGUNDOS', 300))
+    historial = _contado('historial', tramo, lambda: [({'tabla': modelo.history.model._meta.db_table}, modelo.history.model.objects.count()) for modelo in registered_models.values()])
+    vigente = referencias.periodo_vigente()
+    registros = []
+    if vigente:
+        # Cada alta, edición o baja de horas sube la versión del período (tareas/signals.py)
+        clave = f'periodo:{vigente.pk}'
+        registros = [({'periodo': vigente.nombre}, _contado('registros', (clave, VersionDatos.actuales([clave])[clave]), RegistroHora.objects.filter(periodo=vigente).count))]
+    resultado = [
+        ('muni_historial_filas', 'gauge', 'Filas en cada tabla de historial (auditoría).', historial),
+        ('muni_registros_periodo_vigente', 'gauge', 'Registros de horas cargados en el período vigente.', registros),
+    ]
+    duracion, tamano, fecha = [], [], []
+    for tipo, patron in (('completo', os.path.join(backups.carpeta_backups(), 'db_backup_*.json')), ('incremental', os.path.join(backups.carpeta_incrementales(), 'db_inc_*.json'))):
+        ultimo = _ultimo_manifiesto(patron)
+        if not ultimo: continue
+        mtime, manifiesto = ultimo
+        duracion.append(({'tipo': tipo}, sum(manifiesto.get('tiempos', {}).values())))
+        tamano.append(({'tipo': tipo}, manifiesto.get('tamano_comprimido', manifiesto.get('bytes_nuevos', 0))))
+        fecha.append(({'tipo': tipo}, mtime))
+    resultado += [
+        ('muni_backup_duracion_segundos', 'gauge', 'Duración del último backup (suma de sus fases).', duracion),
+        ('muni_backup_tamano_bytes', 'gauge', 'Bytes escritos por el último backup (comprimido, o páginas nuevas si es incremental).', tamano),
+        ('muni_backup_ultimo_timestamp_segundos', 'gauge', 'Momento (epoch) del último backup.', fecha),
+    ]
+    return resultado
+
+def valores_de_la_cache():
+    """Contadores de la caché de PDF de este proceso (tareas/cache_reportes.py), en el mismo formato."""
+    contadores = cache_reportes.estadisticas()
+    return [
+        ('muni_cache_reportes_aciertos_total', 'counter', 'Reportes pedidos que salieron de la caché de PDF.', [({}, contadores['aciertos'])]),
+        ('muni_cache_reportes_fallos_total', 'counter', 'Reportes pedidos que no estaban en la caché de PDF.', [({}, contadores['fallos'])]),
+        ('muni_cache_reportes_descartes_total', 'counter', 'PDF descartados de la caché por superar REPORTES_CACHE_MAX_MB.', [({}, contadores['descartes'])]),
+    ]
+
+# ========================================================
+# 3. FORMATO DE TEXTO DE PROMETHEUS
+# ========================================================
+def _etiquetas(etiquetas):
+    if not etiquetas: return ''
+    escapar = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escapar(v)}"' for k, v in etiquetas) + '}'
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def texto():
+    lineas = []
+    valores = valores_actuales()
+    for nombre, (tipo, ayuda, limites) in METRICAS.items():
+        lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+        for (clave_nombre, etiquetas), valor in sorted(valores.items()):
+            if clave_nombre != nombre: continue
+            if tipo != 'histogram':
+                lineas.append(f'{nombre}{_etiquetas(etiquetas)} {_numero(valor)}'); continue
+            acumulado = 0
+            for limite, cantidad in zip(list(limites) + ['+Inf'], valor[:-1]):
+                acumulado += cantidad
+                lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas + (("le", limite),))} {acumulado}')
+            lineas += [f'{nombre}_sum{_etiquetas(etiquetas)} {_numero(valor[-1])}', f'{nombre}_count{_etiquetas(etiquetas)} {acumulado}']
+    for nombre, tipo, ayuda, muestras in valores_de_la_cache() + valores_de_la_base():
+        lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+        lineas += [f'{nombre}{_etiquetas(tuple(sorted(etiquetas.items())))} {_numero(valor)}' for etiquetas, valor in muestras]
+    return '\n'.join(lineas) + '\n'
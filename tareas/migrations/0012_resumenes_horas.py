@@ -0,0 +1,78 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def poblar_resumenes(apps, schema_editor):
+    # Carga inicial de los resúmenes con los datos ya existentes
+    RegistroHora = apps.get_model('tareas', 'RegistroHora')
+    ResumenPeriodo = apps.get_model('tareas', 'ResumenPeriodo')
+    ResumenSecretaria = apps.get_model('tareas', 'ResumenSecretaria')
+    ResumenDepartamento = apps.get_model('tareas', 'ResumenDepartamento')
+    por_periodo = {}; por_secretaria = {}; por_departamento = {}
+    filas = (RegistroHora.objects.order_by()
+             .values('periodo_id', 'empleado__departamento_id', 'empleado__departamento__secretaria_id')
+             .annotate(total=Sum('cantidad_horas')))
+    for fila in filas:
+        p = fila['periodo_id']; total = fila['total'] or 0
+        clave_sec = (p, fila['empleado__departamento__secretaria_id'])
+        clave_dep = (p, fila['empleado__departamento_id'])
+        por_periodo[p] = por_periodo.get(p, 0) + total
+        por_secretaria[clave_sec] = por_secretaria.get(clave_sec, 0) + total
+        por_departamento[clave_dep] = por_departamento.get(clave_dep, 0) + total
+    ResumenPeriodo.objects.bulk_create([ResumenPeriodo(periodo_id=p, total_horas=t) for p, t in por_periodo.items()])
+    ResumenSecretaria.objects.bulk_create([ResumenSecretaria(periodo_id=p, secretaria_id=s, total_horas=t) for (p, s), t in por_secretaria.items()])
+    ResumenDepartamento.objects.bulk_create([ResumenDepartamento(periodo_id=p, departamento_id=d, total_horas=t) for (p, d), t in por_departamento.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0011_historicalempleado_historicalregistrohora'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenPeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_horas', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total de Horas')),
+                ('periodo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumen', to='tareas.periodo', verbose_name='Período')),
+            ],
+            options={
+                'verbose_name': 'Resumen por Período',
+                'verbose_name_plural': 'Resúmenes por Período',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDepartamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_horas', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total de Horas')),
+                ('departamento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tareas.departamento', verbose_name='Departamento')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_departamento', to='tareas.periodo', verbose_name='Período')),
+            ],
+            options={
+                'verbose_name': 'Resumen por Departamento',
+                'verbose_name_plural': 'Resúmenes por Departamento',
+                'unique_together': {('periodo', 'departamento')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenSecretaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_horas', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total de Horas')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_secretaria', to='tareas.periodo', verbose_name='Período')),
+                ('secretaria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tareas.secretaria', verbose_name='Secretaría')),
+            ],
+            options={
+                'verbose_name': 'Resumen por Secretaría',
+                'verbose_name_plural': 'Resúmenes por Secretaría',
+                'unique_together': {('periodo', 'secretaria')},
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
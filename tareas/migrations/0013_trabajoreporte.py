@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0012_resumenes_horas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoReporte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('sueldos', '📄 Reporte de Sueldos'), ('estadisticas', '📊 Reporte Estadístico'), ('auditoria', '🕵️ Auditoría de Cambios')], max_length=20, verbose_name='Reporte')),
+                ('estado', models.CharField(choices=[('pendiente', '⏳ En cola'), ('en_proceso', '⚙️ Generando'), ('terminado', '✅ Listo'), ('error', '⛔ Error')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('progreso', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso (%)')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('descripcion', models.CharField(blank=True, max_length=200, verbose_name='Descripción')),
+                ('archivo', models.CharField(blank=True, max_length=255, verbose_name='Archivo generado')),
+                ('nombre_archivo', models.CharField(blank=True, max_length=150, verbose_name='Nombre de descarga')),
+                ('mensaje_error', models.TextField(blank=True, verbose_name='Detalle del error')),
+                ('creado', models.DateTimeField(auto_now_add=True, verbose_name='Solicitado')),
+                ('terminado', models.DateTimeField(blank=True, null=True, verbose_name='Terminado')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Reporte Generado',
+                'verbose_name_plural': 'Reportes Generados',
+                'ordering': ['-creado'],
+            },
+        ),
+    ]
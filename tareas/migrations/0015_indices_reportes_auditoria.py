@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0014_versiondatos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrohora',
+            index=models.Index(fields=['periodo', 'empleado'], name='registro_periodo_empleado_idx'),
+        ),
+        # La tabla del historial la arma django-simple-history y no acepta Meta.indexes propios:
+        # estos índices se crean a mano y no forman parte del estado de los modelos.
+        migrations.RunSQL(
+            # Historial de cada registro, del más nuevo al más viejo: el ORDER BY de armar_log_auditoria sale del índice
+            'CREATE INDEX IF NOT EXISTS historial_registro_id_fecha_idx ON tareas_historicalregistrohora (id, history_date DESC, history_id DESC)',
+            'DROP INDEX IF EXISTS historial_registro_id_fecha_idx',
+        ),
+        migrations.RunSQL(
+            # Bajas de los períodos elegidos (history_type='-' AND periodo_id IN ...)
+            'CREATE INDEX IF NOT EXISTS historial_registro_bajas_idx ON tareas_historicalregistrohora (history_type, periodo_id, history_date)',
+            'DROP INDEX IF EXISTS historial_registro_bajas_idx',
+        ),
+    ]
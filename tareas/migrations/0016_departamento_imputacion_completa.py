@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:47
+
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Concat
+
+
+def calcular_imputaciones(apps, schema_editor):
+    # Código completo de los departamentos existentes: una actualización por secretaría
+    Secretaria = apps.get_model('tareas', 'Secretaria')
+    Departamento = apps.get_model('tareas', 'Departamento')
+    for secretaria in Secretaria.objects.all():
+        prefijo = (secretaria.imputacion or '').split('.')[0]
+        Departamento.objects.filter(secretaria=secretaria).update(imputacion_completa=Concat(Value(prefijo + '.'), 'imputacion'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0015_indices_reportes_auditoria'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='departamento',
+            options={'ordering': ['imputacion_completa'], 'verbose_name': 'Departamento', 'verbose_name_plural': 'Departamentos'},
+        ),
+        migrations.AddField(
+            model_name='departamento',
+            name='imputacion_completa',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=21, verbose_name='Imputación completa'),
+        ),
+        migrations.RunPython(calcular_imputaciones, migrations.RunPython.noop),
+    ]
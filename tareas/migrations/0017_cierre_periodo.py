@@ -0,0 +1,48 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0016_departamento_imputacion_completa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierrePeriodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(auto_now_add=True, verbose_name='Cerrado el')),
+                ('cantidad_registros', models.PositiveIntegerField(default=0, verbose_name='Registros al cierre')),
+                ('total_horas', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total de Horas')),
+                ('auditoria', models.JSONField(blank=True, default=list, verbose_name='Log de auditoría al cierre')),
+                ('periodo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cierre', to='tareas.periodo', verbose_name='Período')),
+            ],
+            options={
+                'verbose_name': 'Cierre de Período',
+                'verbose_name_plural': 'Cierres de Período',
+            },
+        ),
+        migrations.CreateModel(
+            name='TotalCierre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orden', models.PositiveIntegerField(verbose_name='Orden')),
+                ('nombre_completo', models.CharField(max_length=210, verbose_name='Apellido y Nombre')),
+                ('dni', models.CharField(max_length=20, verbose_name='DNI')),
+                ('imputacion', models.CharField(max_length=150, verbose_name='Imputación')),
+                ('total_horas', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Total de Horas')),
+                ('cierre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='filas', to='tareas.cierreperiodo', verbose_name='Cierre')),
+                ('empleado', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tareas.empleado', verbose_name='Empleado')),
+            ],
+            options={
+                'verbose_name': 'Total al Cierre',
+                'verbose_name_plural': 'Totales al Cierre',
+                'ordering': ['cierre', 'orden'],
+                'unique_together': {('cierre', 'orden')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0017_cierre_periodo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajoreporte',
+            name='tipo',
+            field=models.CharField(choices=[('sueldos', '📄 Reporte de Sueldos'), ('estadisticas', '📊 Reporte Estadístico'), ('auditoria', '🕵️ Auditoría de Cambios'), ('lote_sueldos', '🗂️ Lote de Sueldos por Área (ZIP)')], max_length=20, verbose_name='Reporte'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+def cargar_destinatarios(apps, schema_editor):
+    # Los dos destinatarios que antes estaban fijos en las acciones del admin
+    Destinatario = apps.get_model('tareas', 'Destinatario')
+    Destinatario.objects.get_or_create(alias='ANDREA', defaults={'nombre': 'SRA. BALTIERI ANDREA SOLEDAD', 'cargo': 'A/C del Área Sueldos', 'orden': 1})
+    Destinatario.objects.get_or_create(alias='EDITH', defaults={'nombre': 'SRA. SHORT EDITH MARISA', 'cargo': 'Encargada del Área Sueldos', 'orden': 2})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0018_trabajo_lote_sueldos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Destinatario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(help_text='Como aparece en el menú de acciones (ej: ANDREA).', max_length=30, unique=True, verbose_name='Nombre corto')),
+                ('nombre', models.CharField(help_text='Ej: SRA. BALTIERI ANDREA SOLEDAD', max_length=150, verbose_name='Nombre en la nota')),
+                ('cargo', models.CharField(help_text='Ej: A/C del Área Sueldos', max_length=150, verbose_name='Cargo')),
+                ('orden', models.PositiveSmallIntegerField(default=0, verbose_name='Orden')),
+                ('activo', models.BooleanField(default=True, verbose_name='¿Activo?')),
+            ],
+            options={
+                'verbose_name': 'Destinatario de Sueldos',
+                'verbose_name_plural': 'Destinatarios de Sueldos',
+                'ordering': ['orden', 'alias'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='trabajoreporte',
+            name='tipo',
+            field=models.CharField(choices=[('sueldos', '📄 Reporte de Sueldos'), ('sueldos_todos', '📄 Sueldos para todos los destinatarios (ZIP)'), ('estadisticas', '📊 Reporte Estadístico'), ('auditoria', '🕵️ Auditoría de Cambios'), ('lote_sueldos', '🗂️ Lote de Sueldos por Área (ZIP)')], max_length=20, verbose_name='Reporte'),
+        ),
+        migrations.RunPython(cargar_destinatarios, migrations.RunPython.noop),
+    ]
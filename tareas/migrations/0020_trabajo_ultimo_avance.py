@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0019_destinatarios_sueldos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajoreporte',
+            name='actualizado',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Último avance'),
+        ),
+    ]
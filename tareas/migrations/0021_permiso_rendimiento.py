@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0020_trabajo_ultimo_avance'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='trabajoreporte',
+            options={'ordering': ['-creado'], 'permissions': [('ver_rendimiento', 'Puede ver los pedidos lentos (/admin/rendimiento/)')], 'verbose_name': 'Reporte Generado', 'verbose_name_plural': 'Reportes Generados'},
+        ),
+    ]
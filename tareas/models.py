@@ -1,6 +1,9 @@
 # Archivo: tareas/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat
 from django.core.exceptions import ValidationError
+from django.utils.text import slugify
 from simple_history.models import HistoricalRecords # <--- IMPORTANTE: Librería de auditoría
 
 # ========================================================
@@ -18,6 +21,24 @@ class Secretaria(models.Model):
     def __str__(self):
         return f"{self.imputacion} - {self.nombre}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Guardamos la imputación original: si cambia, se recalculan los códigos de sus departamentos
+        instancia._imputacion_original = instancia.__dict__.get('imputacion')
+        return instancia
+
+    def prefijo_imputacion(self):
+        return (self.imputacion or '').split('.')[0]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if getattr(self, '_imputacion_original', None) != self.imputacion:
+                # Todos sus departamentos en una sola consulta (update no pasa por Departamento.save)
+                Departamento.objects.filter(secretaria=self).update(imputacion_completa=Concat(Value(self.prefijo_imputacion() + '.'), 'imputacion'))
+            self._imputacion_original = self.imputacion
+
 # ========================================================
 # 2. DEPARTAMENTOS
 # ========================================================
@@ -25,20 +46,28 @@ class Departamento(models.Model):
     secretaria = models.ForeignKey(Secretaria, on_delete=models.CASCADE, verbose_name="Secretaría")
     nombre = models.CharField(max_length=100, verbose_name="Nombre del Departamento", unique=True)
     imputacion = models.CharField(max_length=10, verbose_name="Imputación", default="00")
+    # Prefijo de la secretaría + "." + imputación (ej: "02.05"). Se guarda para filtrar, ordenar y agrupar en SQL;
+    # lo mantienen al día Departamento.save() y, si cambia la secretaría, Secretaria.save()
+    imputacion_completa = models.CharField(max_length=21, default="", editable=False, db_index=True, verbose_name="Imputación completa")
 
     class Meta:
         verbose_name = "Departamento"
         verbose_name_plural = "Departamentos"
-        ordering = ['secretaria', 'imputacion']
+        ordering = ['imputacion_completa']  # Mismo orden que secretaría + imputación, sin unir tablas
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Guardamos la secretaría original para detectar cambios (ver tareas/signals.py)
+        instancia._secretaria_original = instancia.__dict__.get('secretaria_id')
+        return instancia
+
+    def save(self, *args, **kwargs):
+        self.imputacion_completa = f"{self.secretaria.prefijo_imputacion()}.{self.imputacion}"
+        super().save(*args, **kwargs)
 
     def __str__(self):
-        try:
-            prefijo_sec = self.secretaria.imputacion.split('.')[0]
-            codigo_final = f"{prefijo_sec}.{self.imputacion}"
-        except:
-            codigo_final = self.imputacion
-        
-        return f"{codigo_final} - {self.nombre}"
+        return f"{self.imputacion_completa or self.imputacion} - {self.nombre}"
 
 # ========================================================
 # 3. EMPLEADOS
@@ -57,6 +86,13 @@ class Empleado(models.Model):
         verbose_name = "Empleado"
         verbose_name_plural = "Empleados"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Guardamos el departamento original para detectar traslados (ver tareas/signals.py)
+        instancia._departamento_original = instancia.__dict__.get('departamento_id')
+        return instancia
+
     def __str__(self):
         # Si tiene departamento, lo mostramos entre corchetes. Si no, mostramos solo el nombre.
         dpto = self.departamento.nombre if self.departamento else "Sin Dpto"
@@ -83,6 +119,13 @@ class Periodo(models.Model):
         estado_vigente = "⭐ VIGENTE" if self.vigente else ""
         return f"{self.nombre} {estado_cerrado} {estado_vigente}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Estado de cierre leído: al pasar a cerrado se congela el período (ver tareas/cierres.py)
+        instancia._cerrado_original = instancia.__dict__.get('cerrado')
+        return instancia
+
     def save(self, *args, **kwargs):
         if self.vigente:
             Periodo.objects.filter(vigente=True).exclude(pk=self.pk).update(vigente=False)
@@ -119,6 +162,19 @@ class RegistroHora(models.Model):
     class Meta:
         verbose_name = "Hora de Contratado"
         verbose_name_plural = "Horas de Contratados"
+        # Reportes y resúmenes filtran por período y agrupan por empleado (ver benchmark_indices)
+        indexes = [models.Index(fields=['periodo', 'empleado'], name='registro_periodo_empleado_idx')]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Foto de los valores leídos: los resúmenes descuentan esto al editar
+        instancia._resumen_original = (
+            instancia.__dict__.get('periodo_id'),
+            instancia.__dict__.get('empleado_id'),
+            instancia.__dict__.get('cantidad_horas'),
+        )
+        return instancia
 
     def __str__(self):
         return f"{self.empleado} - {self.cantidad_horas}hs ({self.periodo})"
@@ -146,4 +202,185 @@ class RegistroHora(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        # Los resúmenes se actualizan en post_save: todo queda en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+# ========================================================
+# 6. RESÚMENES PRECALCULADOS (ROLLUPS)
+# ========================================================
+# Se mantienen solos desde tareas/signals.py. La secretaría y el departamento
+# son los del legajo del empleado (igual que el gráfico de torta).
+class ResumenPeriodo(models.Model):
+    periodo = models.OneToOneField(Periodo, on_delete=models.CASCADE, related_name='resumen', verbose_name="Período")
+    total_horas = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total de Horas")
+
+    class Meta:
+        verbose_name = "Resumen por Período"
+        verbose_name_plural = "Resúmenes por Período"
+
+    def __str__(self):
+        return f"{self.periodo.nombre}: {self.total_horas}hs"
+
+class ResumenSecretaria(models.Model):
+    periodo = models.ForeignKey(Periodo, on_delete=models.CASCADE, related_name='resumenes_secretaria', verbose_name="Período")
+    secretaria = models.ForeignKey(Secretaria, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Secretaría")
+    total_horas = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total de Horas")
+
+    class Meta:
+        verbose_name = "Resumen por Secretaría"
+        verbose_name_plural = "Resúmenes por Secretaría"
+        unique_together = ('periodo', 'secretaria')
+
+    def __str__(self):
+        return f"{self.periodo.nombre} / {self.secretaria or 'Sin Secretaría'}: {self.total_horas}hs"
+
+class ResumenDepartamento(models.Model):
+    periodo = models.ForeignKey(Periodo, on_delete=models.CASCADE, related_name='resumenes_departamento', verbose_name="Período")
+    departamento = models.ForeignKey(Departamento, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Departamento")
+    total_horas = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total de Horas")
+
+    class Meta:
+        verbose_name = "Resumen por Departamento"
+        verbose_name_plural = "Resúmenes por Departamento"
+        unique_together = ('periodo', 'departamento')
+
+    def __str__(self):
+        return f"{self.periodo.nombre} / {self.departamento_id or 'Sin Dpto'}: {self.total_horas}hs"
+
+# ========================================================
+# 7. TRABAJOS DE REPORTES EN SEGUNDO PLANO
+# ========================================================
+class TrabajoReporte(models.Model):
+    TIPO_SUELDOS = 'sueldos'; TIPO_ESTADISTICAS = 'estadisticas'; TIPO_AUDITORIA = 'auditoria'; TIPO_LOTE_SUELDOS = 'lote_sueldos'
+    TIPO_SUELDOS_DESTINATARIOS = 'sueldos_todos'
+    TIPOS = [
+        (TIPO_SUELDOS, "📄 Reporte de Sueldos"),
+        (TIPO_SUELDOS_DESTINATARIOS, "📄 Sueldos para todos los destinatarios (ZIP)"),
+        (TIPO_ESTADISTICAS, "📊 Reporte Estadístico"),
+        (TIPO_AUDITORIA, "🕵️ Auditoría de Cambios"),
+        (TIPO_LOTE_SUELDOS, "🗂️ Lote de Sueldos por Área (ZIP)"),
+    ]
+    PENDIENTE = 'pendiente'; EN_PROCESO = 'en_proceso'; TERMINADO = 'terminado'; ERROR = 'error'
+    ESTADOS = [
+        (PENDIENTE, "⏳ En cola"),
+        (EN_PROCESO, "⚙️ Generando"),
+        (TERMINADO, "✅ Listo"),
+        (ERROR, "⛔ Error"),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS, verbose_name="Reporte")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE, verbose_name="Estado")
+    progreso = models.PositiveSmallIntegerField(default=0, verbose_name="Progreso (%)")
+    parametros = models.JSONField(default=dict, blank=True, verbose_name="Parámetros")
+    descripcion = models.CharField(max_length=200, blank=True, verbose_name="Descripción")
+    usuario = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Solicitado por")
+    archivo = models.CharField(max_length=255, blank=True, verbose_name="Archivo generado")
+    nombre_archivo = models.CharField(max_length=150, blank=True, verbose_name="Nombre de descarga")
+    mensaje_error = models.TextField(blank=True, verbose_name="Detalle del error")
+    creado = models.DateTimeField(auto_now_add=True, verbose_name="Solicitado")
+    terminado = models.DateTimeField(null=True, blank=True, verbose_name="Terminado")
+    actualizado = models.DateTimeField(null=True, blank=True, verbose_name="Último avance")  # Sin avances: el proceso se cortó
+
+    class Meta:
+        verbose_name = "Reporte Generado"
+        verbose_name_plural = "Reportes Generados"
+        ordering = ['-creado']
+        permissions = [('ver_rendimiento', "Puede ver los pedidos lentos (/admin/rendimiento/)")]  # Los superusuarios lo tienen siempre
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} ({self.get_estado_display()})"
+
+
+# ========================================================
+# 8. VERSIÓN DE LOS DATOS (PARA INVALIDAR CACHÉS)
+# ========================================================
+# Claves: 'global' (empleados, áreas, secretarías y períodos) y 'periodo:<id>' (horas de ese período).
+# Se incrementan desde tareas/signals.py dentro de la misma transacción del cambio.
+class VersionDatos(models.Model):
+    clave = models.CharField(max_length=50, unique=True, verbose_name="Clave")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Versión")
+
+    class Meta:
+        verbose_name = "Versión de Datos"
+        verbose_name_plural = "Versiones de Datos"
+
+    def __str__(self):
+        return f"{self.clave} v{self.version}"
+
+    @classmethod
+    def incrementar(cls, clave):
+        if not cls.objects.filter(clave=clave).update(version=models.F('version') + 1):
+            cls.objects.create(clave=clave, version=1)
+
+    @classmethod
+    def actuales(cls, claves):
+        encontradas = dict(cls.objects.filter(clave__in=claves).values_list('clave', 'version'))
+        return {clave: encontradas.get(clave, 0) for clave in claves}
+
+# ========================================================
+# 9. CIERRE DE PERÍODO (FOTO INMUTABLE)
+# ========================================================
+# Se arma en tareas/cierres.py al marcar el período como cerrado y se borra si se reabre.
+# Los reportes de sueldos y auditoría del período completo salen de acá, no de las horas.
+class CierrePeriodo(models.Model):
+    periodo = models.OneToOneField(Periodo, on_delete=models.CASCADE, related_name='cierre', verbose_name="Período")
+    creado = models.DateTimeField(auto_now_add=True, verbose_name="Cerrado el")
+    cantidad_registros = models.PositiveIntegerField(default=0, verbose_name="Registros al cierre")
+    total_horas = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total de Horas")
+    auditoria = models.JSONField(default=list, blank=True, verbose_name="Log de auditoría al cierre")
+
+    class Meta:
+        verbose_name = "Cierre de Período"
+        verbose_name_plural = "Cierres de Período"
+
+    def __str__(self):
+        return f"Cierre {self.periodo.nombre}: {self.total_horas}hs"
+
+class TotalCierre(models.Model):
+    cierre = models.ForeignKey(CierrePeriodo, on_delete=models.CASCADE, related_name='filas', verbose_name="Cierre")
+    orden = models.PositiveIntegerField(verbose_name="Orden")
+    empleado = models.ForeignKey(Empleado, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Empleado")
+    nombre_completo = models.CharField(max_length=210, verbose_name="Apellido y Nombre")
+    dni = models.CharField(max_length=20, verbose_name="DNI")
+    imputacion = models.CharField(max_length=150, verbose_name="Imputación")
+    total_horas = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Total de Horas")
+
+    class Meta:
+        verbose_name = "Total al Cierre"
+        verbose_name_plural = "Totales al Cierre"
+        ordering = ['cierre', 'orden']
+        unique_together = ('cierre', 'orden')
+
+    def __str__(self):
+        return f"{self.nombre_completo}: {self.total_horas}hs ({self.imputacion})"
+
+    def save(self, *args, **kwargs):
+        # Las filas de un cierre no se editan: para corregir hay que reabrir el período
+        if not self._state.adding: raise ValidationError("⛔ ERROR: Los totales de un período cerrado no se modifican.")
+        super().save(*args, **kwargs)
+
+# ========================================================
+# 10. DESTINATARIOS DEL REPORTE DE SUELDOS
+# ========================================================
+# Cada destinatario activo es una acción del listado de horas ("Reporte para <alias>").
+# Solo cambia la nota de la hoja 1: la tabla se genera una vez para todos (tareas/documentos.py).
+class Destinatario(models.Model):
+    alias = models.CharField(max_length=30, unique=True, verbose_name="Nombre corto", help_text="Como aparece en el menú de acciones (ej: ANDREA).")
+    nombre = models.CharField(max_length=150, verbose_name="Nombre en la nota", help_text="Ej: SRA. BALTIERI ANDREA SOLEDAD")
+    cargo = models.CharField(max_length=150, verbose_name="Cargo", help_text="Ej: A/C del Área Sueldos")
+    orden = models.PositiveSmallIntegerField(default=0, verbose_name="Orden")
+    activo = models.BooleanField(default=True, verbose_name="¿Activo?")
+
+    class Meta:
+        verbose_name = "Destinatario de Sueldos"
+        verbose_name_plural = "Destinatarios de Sueldos"
+        ordering = ['orden', 'alias']
+
+    def __str__(self):
+        return f"{self.alias} - {self.nombre}"
+
+    @property
+    def nombre_accion(self):
+        """Nombre de la acción del admin: 'reporte_andrea' para el alias ANDREA."""
+        return 'reporte_' + slugify(self.alias).replace('-', '_')
@@ -0,0 +1,146 @@
+# Archivo: tareas/pdf_reportlab.py
+# Motor alternativo para el reporte de sueldos: arma el PDF directamente con los
+# "flowables" de ReportLab (platypus), sin pasar por el parser HTML/CSS de xhtml2pdf.
+# Respeta el diseño de reporte_pdf.html: nota formal en la hoja 1 y, desde la hoja 2,
+# encabezado con logo y datos del período, tabla de empleados y total general.
+# Se elige con REPORTE_SUELDOS_MOTOR = 'reportlab' en core/settings.py.
+import io
+from xml.sax.saxutils import escape
+
+from django.contrib.staticfiles import finders
+from django.utils.dateformat import format as formato_fecha
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import (BaseDocTemplate, Frame, NextPageTemplate, PageBreak,
+                                PageTemplate, Paragraph, Spacer, Table, TableStyle)
+
+ANCHO, ALTO = A4
+FECHA_LARGA = r'd \d\e F \d\e Y'
+
+# ========================================================
+# 1. ESTILOS (equivalentes a los del template HTML)
+# ========================================================
+def _estilo(nombre, **kwargs):
+    base = {'fontName': 'Helvetica', 'fontSize': 11, 'leading': 15.4}
+    base.update(kwargs)
+    return ParagraphStyle(nombre, **base)
+
+ESTILOS = {
+    'ref': _estilo('ref', fontName='Helvetica-Bold', fontSize=10, leading=14, alignment=TA_RIGHT, spaceAfter=10),
+    'fecha': _estilo('fecha', alignment=TA_RIGHT, spaceAfter=40),
+    'destinatario': _estilo('destinatario', fontName='Helvetica-Bold', spaceAfter=40),
+    'intro': _estilo('intro', spaceAfter=15),
+    'cuerpo': _estilo('cuerpo', alignment=TA_JUSTIFY, leading=16.5, spaceAfter=20),
+    'saludo': _estilo('saludo', alignment=TA_JUSTIFY, leading=16.5, spaceBefore=40),
+    'firma': _estilo('firma', fontSize=10, leading=14, alignment=TA_CENTER, spaceBefore=60),
+    'th': _estilo('th', fontName='Helvetica-Bold', fontSize=9, leading=11, alignment=TA_CENTER),
+    'nombre': _estilo('nombre', fontSize=9, leading=11, alignment=TA_LEFT),
+    'imputacion': _estilo('imputacion', fontSize=8, leading=10, alignment=TA_CENTER),
+    'horas': _estilo('horas', fontName='Helvetica-Bold', fontSize=9, leading=11, alignment=TA_CENTER),
+    'total': _estilo('total', fontName='Helvetica-Bold', fontSize=12, leading=15, alignment=TA_RIGHT),
+}
+
+# ========================================================
+# 2. HOJA 1: NOTA FORMAL
+# ========================================================
+def _nota(contexto):
+    periodo = contexto['periodo']
+    fecha_hoy = contexto['fecha_hoy']
+    nombre_periodo = escape(periodo.nombre) if periodo else ''
+    inicio = formato_fecha(periodo.fecha_inicio, FECHA_LARGA) if periodo else ''
+    fin = formato_fecha(periodo.fecha_fin, FECHA_LARGA) if periodo else ''
+    return [
+        Paragraph("Ref.: Elevación de hs extras a liquidar<br/>de contratados de locación", ESTILOS['ref']),
+        Paragraph(f"Chajarí, {formato_fecha(fecha_hoy, FECHA_LARGA)}", ESTILOS['fecha']),
+        Paragraph("A LA<br/>{}<br/>{}<br/>DEL GOBIERNO DE LA CIUDAD DE CHAJARÍ<br/>S / D".format(
+            escape(contexto['destinatario_nombre'].upper()), escape(contexto['destinatario_cargo'].upper())), ESTILOS['destinatario']),
+        Paragraph("De mi mayor consideración:", ESTILOS['intro']),
+        Paragraph("Tengo el agrado de dirigirme a Ud. a los efectos de enviarle en archivo adjunto el listado de horas adicionales realizadas por los contratados de locación.", ESTILOS['cuerpo']),
+        Paragraph(f"Dichas horas fueron realizadas en el período <b>{nombre_periodo}</b>, el cual está comprendido entre el {inicio} al {fin}.", ESTILOS['cuerpo']),
+        Paragraph("Sin otro particular, y quedando a vuestra entera disposición, saludo a Ud. muy atentamente.", ESTILOS['saludo']),
+        Paragraph("<br/><br/>______________________________________<br/>Recursos Humanos<br/>Gobierno de la Ciudad de Chajarí", ESTILOS['firma']),
+    ]
+
+# ========================================================
+# 3. HOJA 2+: ENCABEZADO, TABLA Y TOTAL
+# ========================================================
+def _dibujar_encabezado(contexto, logo):
+    periodo = contexto['periodo']
+
+    def dibujar(canvas, doc):
+        canvas.saveState()
+        arriba = ALTO - 1 * cm
+        if logo: canvas.drawImage(logo, 1 * cm, arriba - 2.6 * cm, width=3.7 * cm, height=2.6 * cm, preserveAspectRatio=True, anchor='nw', mask='auto')
+        centro = 1 * cm + 19 * cm * 0.25 + (19 * cm * 0.75) / 2
+        canvas.setFont('Helvetica-Bold', 15); canvas.drawCentredString(centro, arriba - 1.2 * cm, "REPORTE DE HS ADICIONALES")
+        canvas.setFont('Helvetica-Bold', 11); canvas.drawCentredString(centro, arriba - 1.8 * cm, "CONTRATADOS DE LOCACIÓN")
+
+        caja_arriba = arriba - 2.9 * cm; caja_abajo = caja_arriba - 1.35 * cm
+        canvas.setLineWidth(2); canvas.line(1 * cm, caja_arriba, 20 * cm, caja_arriba)
+        canvas.setLineWidth(1); canvas.line(1 * cm, caja_abajo, 20 * cm, caja_abajo)
+        linea1 = caja_arriba - 0.5 * cm; linea2 = linea1 - 0.5 * cm
+
+        def etiqueta(x, y, rotulo, texto, derecha=False, tamano=9):
+            ancho_rotulo = canvas.stringWidth(rotulo, 'Helvetica-Bold', tamano)
+            ancho_texto = canvas.stringWidth(texto, 'Helvetica', 9)
+            if derecha: x -= ancho_rotulo + ancho_texto
+            canvas.setFont('Helvetica-Bold', tamano); canvas.drawString(x, y, rotulo)
+            canvas.setFont('Helvetica', 9); canvas.drawString(x + ancho_rotulo, y, texto)
+
+        if periodo:
+            etiqueta(1 * cm, linea1, "PERÍODO: ", periodo.nombre)
+            etiqueta(1 * cm, linea2, "FECHAS: ", f"Del {periodo.fecha_inicio:%d/%m/%Y} al {periodo.fecha_fin:%d/%m/%Y}")
+        etiqueta(20 * cm, linea1, "FECHA REPORTE: ", f"{contexto['fecha_hoy']:%d/%m/%Y}", derecha=True)
+        etiqueta(20 * cm, linea2, f"Hoja {doc.page + contexto.get('hojas_nota', 0)}", "", derecha=True, tamano=11)
+        canvas.restoreState()
+    return dibujar
+
+def _tabla(datos):
+    filas = [[Paragraph("APELLIDO, NOMBRE Y DNI", ESTILOS['th']), Paragraph("IMPUTACIÓN", ESTILOS['th']), Paragraph("CANTIDAD HS", ESTILOS['th'])]]
+    for fila in datos:
+        filas.append([
+            Paragraph(f"<b>{escape(fila['nombre_completo'])}</b><br/><font size=8 color='#333333'>&nbsp;D.N.I.: {escape(str(fila['dni']))}</font>", ESTILOS['nombre']),
+            Paragraph(escape(str(fila['imputacion'])), ESTILOS['imputacion']),
+            Paragraph(str(fila['total_horas']), ESTILOS['horas']),
+        ])
+    tabla = Table(filas, colWidths=[19 * cm * 0.50, 19 * cm * 0.35, 19 * cm * 0.15], repeatRows=1)
+    tabla.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f0f0f0')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 4), ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ('TOPPADDING', (0, 0), (-1, 0), 5), ('BOTTOMPADDING', (0, 0), (-1, 0), 5),
+    ]))
+    return tabla
+
+def _total(total_general):
+    total = Table([[Paragraph(f"TOTAL GENERAL: {total_general}", ESTILOS['total'])]], colWidths=[19 * cm])
+    total.setStyle(TableStyle([('LINEABOVE', (0, 0), (-1, 0), 2, colors.black), ('LEFTPADDING', (0, 0), (-1, -1), 0), ('RIGHTPADDING', (0, 0), (-1, -1), 0)]))
+    return total
+
+# ========================================================
+# 4. ARMADO DEL DOCUMENTO
+# ========================================================
+def renderizar_sueldos(contexto):
+    """Recibe el mismo contexto que reporte_pdf.html y devuelve el PDF en bytes."""
+    destino = io.BytesIO()
+    doc = BaseDocTemplate(destino, pagesize=A4, title="Reporte de Horas Adicionales")
+    nota = Frame(3 * cm, 3 * cm, ANCHO - 6 * cm, ALTO - 6 * cm, id='nota', leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+    reporte = Frame(1 * cm, 2 * cm, ANCHO - 2 * cm, ALTO - 7.5 * cm, id='reporte', leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+    plantillas = [
+        PageTemplate(id='nota_page', frames=[nota]),
+        PageTemplate(id='reporte_page', frames=[reporte], onPage=_dibujar_encabezado(contexto, finders.find('img/logo_chico.png'))),
+    ]
+    if contexto.get('solo_tabla'):
+        # Sin la nota (se le pega después): la tabla arranca en la primera hoja y "Hoja N" sigue a las hojas_nota
+        doc.addPageTemplates(plantillas[::-1]); historia = []
+    else:
+        doc.addPageTemplates(plantillas); historia = _nota(contexto)
+        if not contexto.get('solo_nota'): historia += [NextPageTemplate('reporte_page'), PageBreak()]  # solo_nota: la hoja 1 sola
+    if not contexto.get('solo_nota'):
+        historia += [_tabla(contexto['datos']), Spacer(1, 10), _total(contexto['total_general'])]
+    doc.build(historia)
+    return destino.getvalue()
@@ -0,0 +1,85 @@
+# Archivo: tareas/referencias.py
+# Caché en memoria (por proceso) de los datos de referencia: período vigente, secretarías,
+# departamentos con su imputación completa y destinatarios del reporte de sueldos. Cambian unas pocas veces al año y se leen en cada pedido.
+# Al guardar o borrar uno de ellos, tareas/signals.py sube la versión 'referencias' (VersionDatos)
+# y vacía la caché de este proceso; los demás procesos ven la versión nueva en su próxima verificación:
+# una consulta de una fila por pedido (o en cada uso, fuera de un pedido: comandos, hilos de reportes).
+# Ojo: queryset.update() no dispara señales; después de uno hay que llamar a VersionDatos.incrementar('referencias').
+import threading
+
+from django.core.signals import request_finished, request_started
+from django.dispatch import receiver
+
+CLAVE_VERSION = 'referencias'
+
+_estado = (None, None)          # (versión, datos): se reemplaza entero, así cada hilo lee un par consistente
+_local = threading.local()      # pendiente: True = pedido sin verificar, False = ya verificado, None = fuera de un pedido
+
+# ========================================================
+# 1. CARGA Y VERIFICACIÓN
+# ========================================================
+def _cargar():
+    from .models import Departamento, Destinatario, Periodo, Secretaria
+    secretarias = {s.pk: s for s in Secretaria.objects.all()}
+    departamentos = {}
+    for d in Departamento.objects.all():
+        if d.secretaria_id in secretarias: d.secretaria = secretarias[d.secretaria_id]
+        departamentos[d.pk] = d
+    return {
+        'periodo_vigente': Periodo.objects.filter(vigente=True).first(),
+        'secretarias': secretarias,
+        'departamentos': departamentos,
+        'etiquetas': {pk: str(d) for pk, d in departamentos.items()},
+        'imputaciones': {pk: d.imputacion_completa for pk, d in departamentos.items()},
+        'destinatarios': list(Destinatario.objects.filter(activo=True)),
+    }
+
+def _datos():
+    global _estado
+    version, datos = _estado
+    pendiente = getattr(_local, 'pendiente', None)
+    if datos is not None and pendiente is False: return datos
+    from .models import VersionDatos
+    actual = VersionDatos.actuales([CLAVE_VERSION])[CLAVE_VERSION]
+    if pendiente: _local.pendiente = False
+    # Se compara por igualdad: si la versión que se cargó era de una transacción que se deshizo, también se recarga
+    if datos is None or actual != version:
+        datos = _cargar()
+        _estado = (actual, datos)
+    return datos
+
+def invalidar():
+    global _estado
+    _estado = (None, None)
+
+@receiver(request_started)
+def _pedido_iniciado(sender, **kwargs): _local.pendiente = True
+
+@receiver(request_finished)
+def _pedido_terminado(sender, **kwargs): _local.pendiente = None
+
+# ========================================================
+# 2. CONSULTAS (LOS OBJETOS SON COMPARTIDOS: SOLO LECTURA)
+# ========================================================
+def periodo_vigente():
+    return _datos()['periodo_vigente']
+
+def secretarias():
+    """{id: Secretaria}"""
+    return _datos()['secretarias']
+
+def departamentos():
+    """{id: Departamento} con su secretaría ya cargada."""
+    return _datos()['departamentos']
+
+def etiquetas_departamentos():
+    """{id: "01.02 - Nombre"}: lo mismo que str(departamento)."""
+    return _datos()['etiquetas']
+
+def imputaciones():
+    """{id: "01.02"}: código de imputación completo (secretaría + departamento)."""
+    return _datos()['imputaciones']
+
+def destinatarios():
+    """[Destinatario] activos, en orden: uno por acción "Reporte para ..." del listado de horas."""
+    return _datos()['destinatarios']
@@ -0,0 +1,111 @@
+# Archivo: tareas/reportes.py
+# Armado de datos para los reportes PDF. Todo se resuelve con consultas agrupadas
+# en la base: las acciones del admin solo renderizan lo que devuelve este módulo.
+from django.db.models import Count, Max, Q, Sum, Value
+from django.db.models.functions import Concat
+
+from .models import RegistroHora
+from . import referencias
+
+# ========================================================
+# 1. REPORTE DE SUELDOS (generar_pdf_base)
+# ========================================================
+def etiquetas_departamentos():
+    """Mapa {id: "01.02 - Nombre"} de todos los departamentos (caché de referencias, tareas/referencias.py)."""
+    return referencias.etiquetas_departamentos()
+
+def totales_por_empleado(queryset):
+    """
+    Una fila por empleado con su total de horas y los datos para decidir la imputación:
+    - lugares_prestados: cantidad de áreas distintas en 'otro_departamento'.
+    - registros_propios: registros cargados sin préstamo (cuentan como un lugar más).
+    - otro_departamento_id: el área prestada (solo tiene sentido si hay una sola).
+    """
+    return (queryset.order_by()
+            .values('empleado_id', 'empleado__apellido', 'empleado__nombre', 'empleado__dni', 'empleado__departamento_id')
+            .annotate(
+                total_horas=Sum('cantidad_horas'),
+                lugares_prestados=Count('otro_departamento', distinct=True),
+                registros_propios=Count('pk', filter=Q(otro_departamento__isnull=True)),
+                otro_departamento_id=Max('otro_departamento_id'),
+            )
+            .order_by(Concat('empleado__apellido', Value(', '), 'empleado__nombre'), 'empleado_id'))
+
+def fila_reporte(fila, etiquetas):
+    """Convierte una fila de totales_por_empleado() en la fila lista para el PDF."""
+    base = etiquetas.get(fila['empleado__departamento_id'])
+    lugares = fila['lugares_prestados'] + (1 if fila['registros_propios'] else 0)
+
+    # LÓGICA DE IMPUTACIÓN:
+    if lugares == 1 and fila['registros_propios']:
+        imputacion = str(base)  # Trabajó solo en su área (sin área queda "None", como siempre)
+    elif lugares == 1:
+        imputacion = etiquetas[fila['otro_departamento_id']]  # Trabajó solo en el área prestada
+    else:
+        imputacion = base or "-"  # Trabajó en VARIOS lugares: va a su departamento de origen
+
+    return {
+        'nombre_completo': f"{fila['empleado__apellido']}, {fila['empleado__nombre']}",
+        'dni': fila['empleado__dni'],
+        'imputacion': imputacion,
+        'total_horas': fila['total_horas'],
+    }
+
+def agrupar_datos_reporte(queryset):
+    """Devuelve (filas ordenadas por apellido y nombre, total general) para el reporte de sueldos."""
+    etiquetas = etiquetas_departamentos()
+    lista_final = [fila_reporte(fila, etiquetas) for fila in totales_por_empleado(queryset)]
+    total_general = 0
+    for fila in lista_final: total_general += fila['total_horas']
+    return lista_final, total_general
+
+# ========================================================
+# 2. AUDITORÍA DE CAMBIOS (descargar_auditoria_pdf)
+# ========================================================
+def _entrada_auditoria(record):
+    empleado = record.empleado
+    return {
+        'fecha': record.history_date.strftime("%d/%m/%Y"),
+        'hora': record.history_date.strftime("%H:%M"),
+        'usuario': record.history_user.username if record.history_user else "Sistema",
+        'empleado': f"{empleado.apellido}, {empleado.nombre}" if empleado else "Empleado Desconocido",
+        'sort_key': record.history_date,
+    }
+
+def armar_log_auditoria(queryset):
+    """
+    Log de altas, ediciones y bajas de los registros seleccionados, del más nuevo al más viejo.
+    Trae todo el historial en una sola consulta ordenada (con empleado y usuario)
+    y compara cada versión con la anterior en una sola pasada.
+    """
+    Historico = RegistroHora.history.model
+    historial_por_registro = {}
+    versiones = (Historico.objects.filter(id__in=queryset.values('pk'))
+                 .select_related('empleado', 'history_user')
+                 .order_by('id', '-history_date', '-history_id'))
+    for record in versiones:
+        historial_por_registro.setdefault(record.id, []).append(record)
+
+    lista_auditoria = []
+    for registro_id in queryset.values_list('pk', flat=True):
+        historial = historial_por_registro.get(registro_id, [])
+        if len(historial) <= 1: continue  # Nunca se editó
+        for record, previo in zip(historial, historial[1:] + [None]):
+            item = _entrada_auditoria(record)
+            if previo is None:
+                item['accion'] = "✅ CREACIÓN"; item['detalle'] = "Carga inicial"; item['valor_ant'] = "-"; item['valor_nue'] = f"{record.cantidad_horas} hs"
+                lista_auditoria.append(item)
+            elif record.cantidad_horas != previo.cantidad_horas:
+                item['accion'] = "⚠️ EDICIÓN"; item['detalle'] = "Modificación Cantidad"; item['valor_ant'] = f"{previo.cantidad_horas} hs"; item['valor_nue'] = f"{record.cantidad_horas} hs"
+                lista_auditoria.append(item)
+
+    # Los registros borrados ya no están en la selección: los buscamos por período
+    borrados = (Historico.objects.filter(history_type='-', periodo_id__in=queryset.values('periodo_id'))
+                .select_related('empleado', 'history_user').order_by('-history_date'))
+    for record in borrados:
+        item = _entrada_auditoria(record)
+        item['accion'] = "❌ ELIMINADO"; item['detalle'] = "Registro eliminado"; item['valor_ant'] = f"{record.cantidad_horas} hs"; item['valor_nue'] = "0 hs"
+        lista_auditoria.append(item)
+
+    lista_auditoria.sort(key=lambda x: x['sort_key'], reverse=True)
+    return lista_auditoria
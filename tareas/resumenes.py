@@ -0,0 +1,87 @@
+# Archivo: tareas/resumenes.py
+# Mantenimiento de los resúmenes precalculados (rollups) de horas.
+# Los reportes leen de acá en lugar de sumar RegistroHora cada vez.
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import (Empleado, RegistroHora, ResumenPeriodo,
+                     ResumenSecretaria, ResumenDepartamento)
+
+# ========================================================
+# 1. ACTUALIZACIÓN INCREMENTAL
+# ========================================================
+def ubicacion_empleado(empleado_id):
+    """Devuelve (departamento_id, secretaria_id) del legajo del empleado."""
+    fila = Empleado.objects.filter(pk=empleado_id).values_list('departamento_id', 'departamento__secretaria_id').first()
+    return fila if fila else (None, None)
+
+def _sumar(modelo, delta, **claves):
+    # Los FK nulos ("Sin Secretaría"/"Sin Dpto") se filtran con __isnull
+    filtro = {(f'{k}__isnull' if v is None else k): (True if v is None else v) for k, v in claves.items()}
+    # UPDATE atómico con F(); si la fila no existe todavía, la creamos
+    if not modelo.objects.filter(**filtro).update(total_horas=F('total_horas') + delta):
+        modelo.objects.create(total_horas=delta, **claves)
+
+def aplicar_delta(periodo_id, empleado_id, delta):
+    """Suma (o resta, si delta es negativo) horas en los tres niveles de resumen."""
+    if not delta or periodo_id is None: return
+    delta = Decimal(str(delta))  # el importador puede traer int/float desde el Excel
+    departamento_id, secretaria_id = ubicacion_empleado(empleado_id)
+    _sumar(ResumenPeriodo, delta, periodo_id=periodo_id)
+    _sumar(ResumenSecretaria, delta, periodo_id=periodo_id, secretaria_id=secretaria_id)
+    _sumar(ResumenDepartamento, delta, periodo_id=periodo_id, departamento_id=departamento_id)
+
+# ========================================================
+# 2. RECONSTRUCCIÓN DESDE CERO
+# ========================================================
+def _totales_en_vivo(registros):
+    """Totales calculados directamente desde RegistroHora: (periodos, secretarías, departamentos)."""
+    por_periodo = {}; por_secretaria = {}; por_departamento = {}
+    filas = (registros.order_by()
+             .values('periodo_id', 'empleado__departamento_id', 'empleado__departamento__secretaria_id')
+             .annotate(total=Sum('cantidad_horas')))
+    for fila in filas:
+        p = fila['periodo_id']; total = fila['total'] or Decimal('0')
+        clave_sec = (p, fila['empleado__departamento__secretaria_id'])
+        clave_dep = (p, fila['empleado__departamento_id'])
+        por_periodo[p] = por_periodo.get(p, 0) + total
+        por_secretaria[clave_sec] = por_secretaria.get(clave_sec, 0) + total
+        por_departamento[clave_dep] = por_departamento.get(clave_dep, 0) + total
+    return por_periodo, por_secretaria, por_departamento
+
+@transaction.atomic
+def recalcular_periodos(periodos_ids=None):
+    """Borra y vuelve a generar los resúmenes. Sin argumentos reconstruye todos los períodos."""
+    registros = RegistroHora.objects.all()
+    resumenes = [ResumenPeriodo.objects.all(), ResumenSecretaria.objects.all(), ResumenDepartamento.objects.all()]
+    if periodos_ids is not None:
+        periodos_ids = set(periodos_ids)
+        if not periodos_ids: return
+        registros = registros.filter(periodo_id__in=periodos_ids)
+        resumenes = [qs.filter(periodo_id__in=periodos_ids) for qs in resumenes]
+    for qs in resumenes: qs.delete()
+
+    por_periodo, por_secretaria, por_departamento = _totales_en_vivo(registros)
+    ResumenPeriodo.objects.bulk_create([ResumenPeriodo(periodo_id=p, total_horas=t) for p, t in por_periodo.items()])
+    ResumenSecretaria.objects.bulk_create([ResumenSecretaria(periodo_id=p, secretaria_id=s, total_horas=t) for (p, s), t in por_secretaria.items()])
+    ResumenDepartamento.objects.bulk_create([ResumenDepartamento(periodo_id=p, departamento_id=d, total_horas=t) for (p, d), t in por_departamento.items()])
+
+# ========================================================
+# 3. VERIFICACIÓN
+# ========================================================
+def verificar_resumenes():
+    """Compara los resúmenes guardados contra los totales en vivo. Devuelve la lista de diferencias."""
+    en_vivo = _totales_en_vivo(RegistroHora.objects.all())
+    guardados = (
+        {r.periodo_id: r.total_horas for r in ResumenPeriodo.objects.all()},
+        {(r.periodo_id, r.secretaria_id): r.total_horas for r in ResumenSecretaria.objects.all()},
+        {(r.periodo_id, r.departamento_id): r.total_horas for r in ResumenDepartamento.objects.all()},
+    )
+    diferencias = []
+    for nivel, vivo, guardado in zip(('período', 'secretaría', 'departamento'), en_vivo, guardados):
+        for clave in set(vivo) | set(guardado):
+            esperado = vivo.get(clave, 0); actual = guardado.get(clave, 0)
+            if esperado != actual: diferencias.append((nivel, clave, esperado, actual))
+    return diferencias
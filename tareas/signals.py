@@ -0,0 +1,114 @@
+# Archivo: tareas/signals.py
+# Señales que mantienen al día los resúmenes precalculados (tareas/resumenes.py)
+# y las versiones de datos que invalidan la caché de PDF (tareas/cache_reportes.py)
+# y la caché de referencias (tareas/referencias.py).
+# Además congelan (o descongelan) un período al cerrarlo o reabrirlo (tareas/cierres.py).
+# Se conectan en TareasConfig.ready().
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .models import Departamento, Destinatario, Empleado, Periodo, RegistroHora, Secretaria, VersionDatos
+from . import cierres, referencias, resumenes
+
+# ========================================================
+# 1. HORAS: ALTA, EDICIÓN Y BAJA
+# ========================================================
+def _nueva_version_periodos(*periodos_ids):
+    for periodo_id in set(periodos_ids) - {None}:
+        VersionDatos.incrementar(f'periodo:{periodo_id}')
+
+@receiver(post_save, sender=RegistroHora)
+def registro_guardado(sender, instance, created, raw=False, **kwargs):
+    if raw: return  # loaddata: se reconstruye con el comando reconstruir_resumenes
+    original = getattr(instance, '_resumen_original', None)
+    _nueva_version_periodos(instance.periodo_id, original[0] if original else None)
+    if not created and original is None:
+        # Instancia armada a mano sobre un registro existente: no sabemos qué tenía antes
+        resumenes.recalcular_periodos([instance.periodo_id])
+    else:
+        if original:
+            periodo_ant, empleado_ant, horas_ant = original
+            resumenes.aplicar_delta(periodo_ant, empleado_ant, -horas_ant)
+        resumenes.aplicar_delta(instance.periodo_id, instance.empleado_id, instance.cantidad_horas)
+    instance._resumen_original = (instance.periodo_id, instance.empleado_id, instance.cantidad_horas)
+
+@receiver(post_delete, sender=RegistroHora)
+def registro_eliminado(sender, instance, origin=None, **kwargs):
+    # Corre dentro de la transacción del borrado (también en borrados masivos del admin y en cascada)
+    if isinstance(origin, Periodo) or getattr(origin, 'model', None) is Periodo:
+        return  # Se borra el período entero: sus resúmenes se van en cascada
+    _nueva_version_periodos(instance.periodo_id)
+    resumenes.aplicar_delta(instance.periodo_id, instance.empleado_id, -instance.cantidad_horas)
+
+# ========================================================
+# 2. CAMBIOS DE ESTRUCTURA (TRASLADOS Y BAJAS DE ÁREAS)
+# ========================================================
+def _periodos_de(**filtro):
+    return set(RegistroHora.objects.filter(**filtro).values_list('periodo_id', flat=True).distinct())
+
+@receiver(post_save, sender=Empleado)
+def empleado_guardado(sender, instance, created, raw=False, **kwargs):
+    anterior = getattr(instance, '_departamento_original', None)
+    if not created and not raw and anterior != instance.departamento_id:
+        resumenes.recalcular_periodos(_periodos_de(empleado=instance))
+    instance._departamento_original = instance.departamento_id
+
+@receiver(post_save, sender=Departamento)
+def departamento_guardado(sender, instance, created, raw=False, **kwargs):
+    anterior = getattr(instance, '_secretaria_original', None)
+    if not created and not raw and anterior != instance.secretaria_id:
+        resumenes.recalcular_periodos(_periodos_de(empleado__departamento=instance))
+    instance._secretaria_original = instance.secretaria_id
+
+@receiver(pre_delete, sender=Departamento)
+def departamento_por_borrar(sender, instance, **kwargs):
+    # Los empleados quedan "Sin Dpto" (SET_NULL) sin disparar señales: anotamos qué recalcular
+    instance._periodos_afectados = _periodos_de(empleado__departamento=instance)
+
+@receiver(post_delete, sender=Departamento)
+def departamento_eliminado(sender, instance, **kwargs):
+    resumenes.recalcular_periodos(getattr(instance, '_periodos_afectados', set()))
+
+# ========================================================
+# 3. VERSIONES DE DATOS (INVALIDAN LA CACHÉ DE PDF)
+# ========================================================
+@receiver(post_save, sender=Periodo)
+@receiver(post_delete, sender=Periodo)
+@receiver(post_save, sender=Empleado)
+@receiver(post_delete, sender=Empleado)
+@receiver(post_save, sender=Departamento)
+@receiver(post_delete, sender=Departamento)
+@receiver(post_save, sender=Secretaria)
+@receiver(post_delete, sender=Secretaria)
+def version_global(sender, instance, **kwargs):
+    # Nombres, áreas y el período vigente aparecen en todos los reportes
+    VersionDatos.incrementar('global')
+
+@receiver(post_save, sender=Periodo)
+@receiver(post_delete, sender=Periodo)
+@receiver(post_save, sender=Departamento)
+@receiver(post_delete, sender=Departamento)
+@receiver(post_save, sender=Secretaria)
+@receiver(post_delete, sender=Secretaria)
+@receiver(post_save, sender=Destinatario)
+@receiver(post_delete, sender=Destinatario)
+def version_referencias(sender, instance, **kwargs):
+    # Caché de referencias (tareas/referencias.py): este proceso la vacía ya, los demás al ver la versión nueva
+    VersionDatos.incrementar(referencias.CLAVE_VERSION)
+    referencias.invalidar()
+
+# ========================================================
+# 4. CIERRE Y REAPERTURA DE PERÍODOS
+# ========================================================
+@receiver(post_save, sender=Periodo)
+def periodo_guardado(sender, instance, created, raw=False, **kwargs):
+    anterior = getattr(instance, '_cerrado_original', False)
+    if not raw and not created and instance.cerrado and not anterior:
+        # Un período que nace cerrado no tiene horas: no hay nada que congelar.
+        # La foto va en la misma transacción; los PDF se pregeneran recién cuando se confirma
+        cierres.congelar(instance)
+        transaction.on_commit(lambda: cierres.prerenderizar(instance))
+    elif not raw and anterior and not instance.cerrado:
+        cierres.reabrir(instance)
+    instance._cerrado_original = instance.cerrado
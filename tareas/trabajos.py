@@ -0,0 +1,165 @@
+# Archivo: tareas/trabajos.py
+# Cola local de reportes: las acciones del admin encolan un TrabajoReporte y vuelven enseguida.
+# Un pool de hilos del mismo proceso genera el PDF y lo deja en REPORTES_DIR.
+# No hace falta ningún broker externo (Redis, Celery, etc.).
+# Si el proceso se corta, al arrancar de nuevo (core/wsgi.py) los que seguían en cola se vuelven a
+# mandar al pool y los que estaban generándose se marcan con error.
+import io
+import os
+import threading
+import time
+import traceback
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import RegistroHora, TrabajoReporte
+from . import cache_reportes, documentos, instrumentacion, lotes, metricas
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# ========================================================
+# 1. CONFIGURACIÓN
+# ========================================================
+def carpeta_reportes():
+    carpeta = str(getattr(settings, 'REPORTES_DIR', os.path.join(settings.BASE_DIR, 'reportes_generados')))
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+def _pool_de_trabajo():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=getattr(settings, 'REPORTES_HILOS', 2), thread_name_prefix='reportes')
+        return _pool
+
+# ========================================================
+# 2. GENERADORES (tipo de trabajo -> función que devuelve (nombre, bytes))
+# ========================================================
+def _registros(parametros):
+    return RegistroHora.objects.filter(pk__in=parametros.get('registros', []))
+
+def _sueldos_destinatarios(parametros, progreso):
+    # La tabla se genera una vez; cada copia solo suma su nota (documentos.pdf_sueldos_destinatarios)
+    destinatarios = [(d['nombre'], d['cargo']) for d in parametros['destinatarios']]
+    nombre, copias = documentos.pdf_sueldos_destinatarios(_registros(parametros), destinatarios, progreso=progreso)
+    destino = io.BytesIO()
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as archivo_zip:
+        for destinatario, contenido in zip(parametros['destinatarios'], copias):
+            archivo_zip.writestr(f"{nombre}_{slugify(destinatario['alias'])}.pdf", contenido)
+    return f"{nombre}.zip", destino.getvalue()
+
+def _lote_sueldos(parametros, progreso):
+    # Un PDF por unidad, generados en un pool de procesos (tareas/lotes.py)
+    destino = io.BytesIO()
+    lotes.generar_zip(_registros(parametros), parametros['por'], parametros['destinatario_nombre'], parametros['destinatario_cargo'], destino, progreso=progreso)
+    return f"Sueldos_por_{parametros['por']}.zip", destino.getvalue()
+
+GENERADORES = {
+    TrabajoReporte.TIPO_SUELDOS: lambda p, progreso: documentos.pdf_sueldos(_registros(p), p['destinatario_nombre'], p['destinatario_cargo'], progreso=progreso),
+    TrabajoReporte.TIPO_SUELDOS_DESTINATARIOS: _sueldos_destinatarios,
+    TrabajoReporte.TIPO_ESTADISTICAS: lambda p, progreso: documentos.pdf_estadisticas(progreso=progreso),
+    TrabajoReporte.TIPO_AUDITORIA: lambda p, progreso: documentos.pdf_auditoria(_registros(p), p.get('usuario_solicitante', ''), progreso=progreso),
+    TrabajoReporte.TIPO_LOTE_SUELDOS: _lote_sueldos,
+}
+
+# ========================================================
+# 3. ENCOLAR Y EJECUTAR
+# ========================================================
+def encolar(tipo, parametros=None, usuario=None, descripcion=''):
+    """Crea el trabajo y lo manda al pool cuando se confirma la transacción. Devuelve el TrabajoReporte."""
+    limpiar_vencidos()
+    trabajo = TrabajoReporte.objects.create(tipo=tipo, parametros=parametros or {}, usuario=usuario, descripcion=descripcion[:200])
+    if getattr(settings, 'REPORTES_EN_SEGUNDO_PLANO', True):
+        transaction.on_commit(lambda: _pool_de_trabajo().submit(_ejecutar_en_hilo, trabajo.pk))
+    else:
+        ejecutar(trabajo.pk)
+        trabajo.refresh_from_db()
+    return trabajo
+
+def _ejecutar_en_hilo(trabajo_id):
+    # Cada hilo abre su propia conexión: la cerramos al terminar para no dejarla colgada
+    close_old_connections()
+    try:
+        ejecutar(trabajo_id)
+    finally:
+        connection.close()
+
+def ejecutar(trabajo_id):
+    if not TrabajoReporte.objects.filter(pk=trabajo_id, estado=TrabajoReporte.PENDIENTE).update(estado=TrabajoReporte.EN_PROCESO, progreso=5, actualizado=timezone.now()):
+        return  # Otro hilo ya lo tomó
+    trabajo = TrabajoReporte.objects.get(pk=trabajo_id)
+
+    def progreso(porcentaje):
+        TrabajoReporte.objects.filter(pk=trabajo_id).update(progreso=porcentaje, actualizado=timezone.now())
+
+    try:
+        # La clave se calcula antes de leer los datos: si cambian mientras se genera, la próxima vez no coincide
+        clave = cache_reportes.clave_reporte(trabajo.tipo, trabajo.parametros)
+        cacheado = cache_reportes.obtener(clave, contar=False)  # Ya se contó al encolar
+        if cacheado:
+            nombre, ruta = cacheado
+            with open(ruta, 'rb') as origen: contenido = origen.read()
+        else:
+            # En segundo plano no hay pedido que medir: el reporte se mide por su cuenta
+            inicio = time.perf_counter()
+            with instrumentacion.instrumentar('reporte', tipo=trabajo.tipo, trabajo=trabajo_id):
+                nombre, contenido = GENERADORES[trabajo.tipo](trabajo.parametros, progreso)
+            metricas.observar('muni_reporte_duracion_segundos', time.perf_counter() - inicio, tipo=trabajo.tipo)
+            cache_reportes.guardar(clave, nombre, contenido)
+        archivo = f"{trabajo.pk}_{nombre}"
+        with open(os.path.join(carpeta_reportes(), archivo), 'wb') as destino:
+            destino.write(contenido)
+        TrabajoReporte.objects.filter(pk=trabajo_id).update(
+            estado=TrabajoReporte.TERMINADO, progreso=100, archivo=archivo, nombre_archivo=nombre, terminado=timezone.now())
+        metricas.sumar('muni_reportes_total', tipo=trabajo.tipo, resultado='cache' if cacheado else 'ok')
+    except documentos.ErrorReporte as e:
+        TrabajoReporte.objects.filter(pk=trabajo_id).update(estado=TrabajoReporte.ERROR, mensaje_error=str(e), terminado=timezone.now())
+        metricas.sumar('muni_reportes_total', tipo=trabajo.tipo, resultado='error')
+    except Exception:
+        TrabajoReporte.objects.filter(pk=trabajo_id).update(estado=TrabajoReporte.ERROR, mensaje_error=traceback.format_exc(), terminado=timezone.now())
+        metricas.sumar('muni_reportes_total', tipo=trabajo.tipo, resultado='error')
+
+def ruta_archivo(trabajo):
+    return os.path.join(carpeta_reportes(), trabajo.archivo) if trabajo.archivo else None
+
+# ========================================================
+# 4. TRABAJOS INTERRUMPIDOS Y RETENCIÓN
+# ========================================================
+MENSAJE_INTERRUMPIDO = "Se interrumpió la generación (se reinició el servidor). Vuelva a pedir el reporte."
+
+def marcar_interrumpidos():
+    """Pasa a error los "Generando" sin avance hace más de REPORTES_SIN_AVANCE_MINUTOS. Devuelve cuántos."""
+    ahora = timezone.now()
+    limite = ahora - timedelta(minutes=getattr(settings, 'REPORTES_SIN_AVANCE_MINUTOS', 30))
+    colgados = TrabajoReporte.objects.filter(estado=TrabajoReporte.EN_PROCESO).filter(Q(actualizado__lt=limite) | Q(actualizado__isnull=True, creado__lt=limite))
+    return colgados.update(estado=TrabajoReporte.ERROR, mensaje_error=MENSAJE_INTERRUMPIDO, terminado=ahora)
+
+def recuperar_interrumpidos():
+    """Al arrancar el servidor: marca los interrumpidos y vuelve a mandar al pool los que seguían en cola.
+    Si otro proceso ya los tiene en su cola no pasa nada: ejecutar() toma cada trabajo una sola vez."""
+    try:
+        marcar_interrumpidos()
+        pendientes = list(TrabajoReporte.objects.filter(estado=TrabajoReporte.PENDIENTE).order_by('creado').values_list('pk', flat=True))
+    except DatabaseError:
+        return []  # Base todavía sin migrar
+    if getattr(settings, 'REPORTES_EN_SEGUNDO_PLANO', True):
+        for trabajo_id in pendientes: _pool_de_trabajo().submit(_ejecutar_en_hilo, trabajo_id)
+    return pendientes
+
+def limpiar_vencidos():
+    """Borra los trabajos (y sus archivos) más viejos que REPORTES_RETENCION_DIAS."""
+    marcar_interrumpidos()  # Así tampoco queda para siempre "Generando" uno que se cortó
+    limite = timezone.now() - timedelta(days=getattr(settings, 'REPORTES_RETENCION_DIAS', 7))
+    vencidos = TrabajoReporte.objects.filter(creado__lt=limite).exclude(estado=TrabajoReporte.EN_PROCESO)
+    for trabajo in vencidos.exclude(archivo=''):
+        try: os.remove(ruta_archivo(trabajo))
+        except FileNotFoundError: pass
+    vencidos.delete()
@@ -1,3 +1,35 @@
+import hmac
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 
-# Create your views here.
+from . import instrumentacion, metricas
+
+# ========================================================
+# PEDIDOS LENTOS (lee el log de tareas/instrumentacion.py)
+# ========================================================
+def rendimiento(request):
+    # El mismo permiso que muestra el enlace del menú (JAZZMIN_SETTINGS['custom_links'])
+    if not request.user.has_perm('tareas.ver_rendimiento'): raise PermissionDenied
+    solo_lentas = request.GET.get('todos') != '1'
+    contexto = {
+        **admin.site.each_context(request), 'title': 'Pedidos lentos' if solo_lentas else 'Últimos pedidos',
+        'mediciones': instrumentacion.mediciones_recientes(solo_lentas=solo_lentas), 'solo_lentas': solo_lentas,
+        'limite_ms': getattr(settings, 'INSTRUMENTACION_LENTO_MS', 1000),
+    }
+    return render(request, 'admin/rendimiento.html', contexto)
+
+# ========================================================
+# MÉTRICAS (formato de texto de Prometheus, ver tareas/metricas.py)
+# ========================================================
+def metricas_view(request):
+    # Desde la misma máquina (o el servidor de métricas que se agregue a METRICAS_IPS), con METRICAS_TOKEN, o un superusuario.
+    # REMOTE_ADDR es la IP del que se conecta: detrás de un proxy local es siempre 127.0.0.1 (ver core/settings.py)
+    permitidas = getattr(settings, 'METRICAS_IPS', ['127.0.0.1', '::1'])
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    con_token = bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if request.META.get('REMOTE_ADDR') not in permitidas and not con_token and not request.user.is_superuser: raise PermissionDenied
+    return HttpResponse(metricas.texto(), content_type='text/plain; version=0.0.4; charset=utf-8')